@@ -0,0 +1,182 @@
+import bisect
+import collections
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+# --- Latency Histogram ---
+class LatencyHistogram:
+    BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float("inf"))
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS_MS)
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.BUCKETS_MS, seconds * 1000)] += 1
+            self.total += 1
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the given fraction of samples.
+        with self.lock:
+            if not self.total:
+                return 0.0
+            target, seen = fraction * self.total, 0
+            for bound, count in zip(self.BUCKETS_MS, self.counts):
+                seen += count
+                if seen >= target:
+                    return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self.lock:
+            buckets = {f"<={bound:g}ms": count for bound, count in zip(self.BUCKETS_MS, self.counts)}
+        return {"count": self.total, "buckets": buckets, "p50_ms": self.percentile(0.5),
+                "p95_ms": self.percentile(0.95), "p99_ms": self.percentile(0.99)}
+
+# --- AI Gateway ---
+class AIRequest:
+    def __init__(self, prompt, timeout):
+        self.prompt = prompt
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.future = Future()
+        self.watchdog = None
+        self.started = False
+        self.chunks = []
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def add_listener(self, on_chunk):
+        with self.lock:
+            if on_chunk is None or on_chunk in self.listeners:
+                return
+            # Late joiners of a coalesced request get the chunks they missed first.
+            for text in self.chunks:
+                on_chunk(text)
+            self.listeners.append(on_chunk)
+
+    def emit(self, text):
+        with self.lock:
+            self.chunks.append(text)
+            for on_chunk in self.listeners:
+                on_chunk(text)
+
+    def finish(self, result=None, error=None):
+        with self.lock:
+            if self.future.done():
+                return False
+            if error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+            return True
+
+class AIGateway:
+    # `send(prompt, timeout)` must yield the response text in one or more chunks.
+    # Each call runs on its own daemon thread and at most `max_workers` run at once; the rest wait in submit order.
+    # A call that hangs past its deadline is abandoned: its slot goes to the next request and whatever the thread
+    # yields once it wakes up is dropped.
+    def __init__(self, send, max_workers=2, timeout=30.0, max_retries=3, backoff=0.5, max_backoff=8.0):
+        self.send = send
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.in_flight = {}
+        self.queued = collections.deque()
+        self.running = 0
+        self.closed = False
+        self.lock = threading.RLock()
+        self.latency = LatencyHistogram()
+        self.coalesced = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def submit(self, prompt, on_chunk=None, timeout=None):
+        # Identical prompts already in flight share one model call and one Future.
+        timeout = self.timeout if timeout is None else timeout
+        with self.lock:
+            request = self.in_flight.get(prompt)
+            if request is not None:
+                self.coalesced += 1
+            else:
+                request = AIRequest(prompt, timeout)
+                self.in_flight[prompt] = request
+                request.watchdog = threading.Timer(timeout, self._expire, args=(request,))
+                request.watchdog.daemon = True
+                request.future.add_done_callback(lambda future: self._forget(request))
+                self.queued.append(request)
+                self._dispatch()
+                request.watchdog.start()
+        request.add_listener(on_chunk)
+        return request.future
+
+    def _dispatch(self):
+        # Called with the lock held. Requests that timed out while queued are skipped.
+        while self.queued and self.running < self.max_workers and not self.closed:
+            request = self.queued.popleft()
+            if request.future.done():
+                continue
+            request.started = True
+            self.running += 1
+            threading.Thread(target=self._run, args=(request,), name="ai-gateway", daemon=True).start()
+
+    def _forget(self, request):
+        request.watchdog.cancel()
+        with self.lock:
+            if self.in_flight.get(request.prompt) is request:
+                del self.in_flight[request.prompt]
+            if request.started:
+                self.running -= 1
+                self._dispatch()
+
+    def _expire(self, request):
+        if request.finish(error=TimeoutError(f"AI request timed out after {request.timeout:g}s")):
+            with self.lock:
+                self.timeouts += 1
+
+    def _run(self, request):
+        started = time.monotonic()
+        attempt = 0
+        while not request.future.done():
+            remaining = request.deadline - time.monotonic()
+            try:
+                for text in self.send(request.prompt, max(remaining, 0.001)):
+                    if request.future.done():
+                        break
+                    request.emit(text)
+                request.finish(result="".join(request.chunks))
+            except Exception as e:
+                remaining = request.deadline - time.monotonic()
+                # Partial output can't be retried without duplicating text on screen.
+                if request.chunks or attempt >= self.max_retries or remaining <= 0:
+                    if request.finish(error=e):
+                        with self.lock:
+                            self.failures += 1
+                    break
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                with self.lock:
+                    self.retries += 1
+                time.sleep(min(delay, remaining))
+        self.latency.record(time.monotonic() - started)
+
+    def stats(self):
+        with self.lock:
+            return {"in_flight": len(self.in_flight), "queued": len(self.queued), "coalesced": self.coalesced,
+                    "retries": self.retries, "timeouts": self.timeouts, "failures": self.failures,
+                    "latency": self.latency.snapshot()}
+
+    def shutdown(self):
+        # Nothing waits on the worker threads; requests still queued fail at once.
+        with self.lock:
+            self.closed = True
+            queued, self.queued = list(self.queued), collections.deque()
+        for request in queued:
+            request.finish(error=RuntimeError("AI gateway shut down"))
@@ -0,0 +1,116 @@
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import sys
+import threading
+import pygame
+from paths import data_path
+
+# --- Pre-scaled Asset Cache ---
+# Scaled images are stored as raw RGBA pixels, keyed by the source file's hash and the target size,
+# so later launches skip both the PNG/JPEG decode and the rescale.
+# Pre-bake for common screens with: python asset_cache.py bake [WIDTHxHEIGHT ...]
+
+CACHE_DIR = data_path("asset_cache", "")
+CACHE_MAGIC = b"BBA1"
+HEADER = struct.Struct("<4sII")
+COMMON_RESOLUTIONS = [(1280, 720), (1366, 768), (1920, 1080), (2560, 1440), (3840, 2160)]
+ENABLED = os.environ.get("BITBYBIT_ASSET_CACHE", "1") != "0"
+
+# Hashes keyed by (path, mtime, size), so a cache hit only costs a stat instead of reading the whole source.
+# Loader threads share it, hence the lock.
+hash_memo = {}
+hash_memo_lock = threading.Lock()
+
+def source_hash(path):
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    with hash_memo_lock:
+        digest = hash_memo.get(key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        with hash_memo_lock:
+            hash_memo[key] = digest
+    return digest
+
+def cache_path(path, size=None, height=None):
+    target = f"{size[0]}x{size[1]}" if size else f"h{height}"
+    return os.path.join(CACHE_DIR, f"{source_hash(path)}_{target}.rgba")
+
+def load(target):
+    # Returns an RGBA surface straight from the mapped cache file at `target`, or None on a miss.
+    try:
+        with open(target, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, cached_width, cached_height = HEADER.unpack_from(mapped)
+            if magic != CACHE_MAGIC or len(mapped) != HEADER.size + cached_width * cached_height * 4:
+                return None
+            # frombuffer aliases the mapping, so copy into a surface that owns its pixels before unmapping.
+            pixels = memoryview(mapped)[HEADER.size:]
+            try:
+                return pygame.image.frombuffer(pixels, (cached_width, cached_height), "RGBA").copy()
+            finally:
+                pixels.release()
+    except (OSError, ValueError, BufferError, struct.error, pygame.error):
+        return None
+
+def store(target, surface):
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(CACHE_MAGIC, *surface.get_size()))
+            f.write(pygame.image.tobytes(surface, "RGBA"))
+        os.replace(temp_path, target)
+    except OSError as e:
+        print(f"Could not write asset cache {target}: {e}")
+
+def load_scaled(path, size=None, height=None):
+    # Scaled image for `size`, or for `height` keeping the aspect ratio; decodes and caches on a miss.
+    target = None
+    if ENABLED:
+        try:
+            target = cache_path(path, size, height)
+        except OSError:
+            pass
+    if target is not None:
+        cached = load(target)
+        if cached is not None:
+            return cached
+    image = pygame.image.load(path)
+    if height is not None:
+        size = (int(height * image.get_width() / image.get_height()), height)
+    image = pygame.transform.scale(image, size)
+    if target is not None:
+        store(target, image)
+    return image
+
+# --- Command Line ---
+def bake(resolutions):
+    from game import asset_manifest, list_animation_frames
+    for width, height in resolutions:
+        baked = 0
+        images, animations = asset_manifest(width, height)
+        jobs = [(path, size, None) for _, path, size, _ in images]
+        for _, base_path, sprite_height in animations:
+            if os.path.isdir(base_path):
+                jobs += [(frame, None, sprite_height) for frames in list_animation_frames(base_path).values() for frame in frames]
+        for path, size, sprite_height in jobs:
+            if os.path.exists(path):
+                load_scaled(path, size, sprite_height)
+                baked += 1
+        print(f"{width}x{height}: {baked} assets cached in {CACHE_DIR}")
+
+def main(argv):
+    if argv[:1] == ["clear"]:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"Cleared {CACHE_DIR}")
+    elif argv[:1] == ["bake"]:
+        resolutions = [tuple(int(n) for n in arg.lower().split("x")) for arg in argv[1:]] or COMMON_RESOLUTIONS
+        bake(resolutions)
+    else:
+        print("usage: python asset_cache.py bake [WIDTHxHEIGHT ...] | clear")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
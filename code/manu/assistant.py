@@ -0,0 +1,88 @@
+import multiprocessing
+import time
+
+def serve_assistant(commands):
+    # Imported here so tkinter and google.generativeai are only ever loaded in the assistant process.
+    from chatbot_app import run_chatbot_service
+    run_chatbot_service(commands)
+
+# --- AI Assistant Process ---
+class AssistantProcess:
+    HEALTH_CHECK_INTERVAL = 2000
+    SHUTDOWN_TIMEOUT = 1.0
+    # A child that keeps dying (no display for Tk, a broken install) is restarted with exponential backoff and
+    # given up on after MAX_RESTARTS; one that stays up for STABLE_AFTER seconds gets a clean slate again.
+    RESTART_BACKOFF = 2.0
+    MAX_RESTART_BACKOFF = 60.0
+    MAX_RESTARTS = 5
+    STABLE_AFTER = 30.0
+
+    def __init__(self):
+        self.process = None
+        self.commands = None
+        self.last_health_check = 0
+        self.started_at = 0.0
+        self.restarts = 0
+        self.next_restart = 0.0
+        self.gave_up = False
+
+    def start(self):
+        # A fresh queue per process: a child that died mid-read can leave the old one unusable.
+        self.commands = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=serve_assistant, args=(self.commands,), daemon=True)
+        self.process.start()
+        self.started_at = time.monotonic()
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def ensure_running(self):
+        now = time.monotonic()
+        if self.is_alive():
+            if self.restarts and now - self.started_at > self.STABLE_AFTER:
+                self.restarts = 0
+            return True
+        if self.process is None:
+            self.start()
+            return True
+        if self.gave_up or now < self.next_restart:
+            return False
+        if self.restarts >= self.MAX_RESTARTS:
+            self.gave_up = True
+            print(f"AI Assistant exited {self.restarts + 1} times in a row (last exit code {self.process.exitcode}); "
+                  "hints are unavailable until the game is restarted.")
+            return False
+        self.restarts += 1
+        self.next_restart = now + min(self.MAX_RESTART_BACKOFF, self.RESTART_BACKOFF * 2 ** (self.restarts - 1))
+        print(f"AI Assistant stopped (exit code {self.process.exitcode}), restart {self.restarts} of {self.MAX_RESTARTS}...")
+        self.start()
+        return True
+
+    def health_check(self, now):
+        if now - self.last_health_check > self.HEALTH_CHECK_INTERVAL:
+            self.last_health_check = now
+            self.ensure_running()
+
+    def send(self, command, payload=None):
+        # Dropped while the assistant is down and waiting out its backoff.
+        if self.ensure_running():
+            self.commands.put((command, payload))
+
+    def ask(self, prompt, problem_text=None, difficulty="beginner"):
+        self.send("prompt", {"prompt": prompt, "problem_text": problem_text, "difficulty": difficulty})
+
+    def show(self):
+        self.send("show")
+
+    def hide(self):
+        if self.is_alive():
+            self.commands.put(("hide", None))
+
+    def stop(self):
+        if self.is_alive():
+            self.commands.put(("quit", None))
+            self.process.join(self.SHUTDOWN_TIMEOUT)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.process = None
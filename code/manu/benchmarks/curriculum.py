@@ -0,0 +1,66 @@
+# Curriculum store benchmark: writes a synthetic curriculum.json with thousands of challenges, then times the
+# one-off index build, a warm open (what every later startup pays), entering a kingdom and playing through it,
+# and compares peak memory against building every Challenge up front.
+# Run from code/manu: python benchmarks/curriculum.py [challenges]
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curriculum import Challenge, CurriculumStore, QuestManager
+
+KINGDOMS = ("Python", "C++", "C")
+
+def write_curriculum(path, count):
+    curriculum = {
+        "kingdoms": [{"name": name, "language": name, "map_rect": [0, 0, 0.1, 0.1], "boss_asset": "boss",
+                      "boss_map_pos": [0, 0], "level_bg_asset": "bg"} for name in KINGDOMS],
+        "challenges": [{"kingdom": KINGDOMS[i % 3], "quest": f"Quest {i}", "difficulty": ("beginner", "intermediate", "expert")[i % 7 % 3],
+                        "xp": 50, "problem": f"Set the variable 'value_{i}' to {i} and explain what it stores in memory.",
+                        "answer": f"value_{i} = {i}"} for i in range(count)],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(curriculum, f)
+
+def timed(label, action):
+    started = time.perf_counter()
+    result = action()
+    print(f"{label:<34}{(time.perf_counter() - started) * 1000:>10.1f} ms")
+    return result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    with tempfile.TemporaryDirectory() as directory:
+        source, index = os.path.join(directory, "curriculum.json"), os.path.join(directory, "curriculum.sqlite3")
+        write_curriculum(source, count)
+        print(f"{count} challenges in {len(KINGDOMS)} kingdoms")
+        timed("first run (build index)", lambda: CurriculumStore(source, index).close())
+        store = timed("later startup (open + kingdoms)", lambda: CurriculumStore(source, index))
+        timed("read kingdom metadata", store.kingdoms)
+        quests = timed("enter kingdom", lambda: QuestManager(store, "Python"))
+
+        def play():
+            while not quests.all_quests_complete():
+                quests.get_current_challenge()
+                quests.advance_quest()
+        timed(f"play through {quests.total} challenges", play)
+
+        tracemalloc.start()
+        QuestManager(store, "Python")
+        streamed = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        tracemalloc.start()
+        with open(source, encoding="utf-8") as f:
+            everything = [Challenge(c["quest"], c["problem"], c["answer"], c["xp"], c["difficulty"]) for c in json.load(f)["challenges"]]
+        eager = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'peak memory, streamed kingdom':<34}{streamed / 1024:>10.0f} KB")
+        print(f"{'peak memory, all loaded up front':<34}{eager / 1024:>10.0f} KB  ({len(everything)} challenges)")
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Code editor benchmark: fills a CodeEditorBox with a long program and replays sustained key repeat
+# (typing, Enter, Backspace, cursor and page movement), drawing a frame after every keystroke like the game does.
+# Run from code/manu: python benchmarks/editor.py [lines] [keystrokes per scenario] [Python|C++|C|plain]
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from curriculum import Challenge
+from game import CodeEditorBox
+
+def key(code, unicode=""):
+    return pygame.event.Event(pygame.KEYDOWN, key=code, unicode=unicode, mod=0)
+
+SCENARIOS = {
+    "type/erase": lambda i: key(pygame.K_a, "abcdefghij"[i % 10]) if (i // 30) % 2 == 0 else key(pygame.K_BACKSPACE),
+    "enter+type": lambda i: key(pygame.K_RETURN) if i % 20 == 0 else key(pygame.K_x, "x"),
+    "backspace": lambda i: key(pygame.K_BACKSPACE),
+    "arrow down/up": lambda i: key(pygame.K_DOWN if (i // 500) % 2 == 0 else pygame.K_UP),
+    "page down/up": lambda i: key(pygame.K_PAGEDOWN if (i // 40) % 2 == 0 else pygame.K_PAGEUP),
+}
+
+def make_editor(screen, line_count, language):
+    width, height = screen.get_size()
+    challenge = Challenge("Benchmark", "Edit this long program without the editor slowing down.", "", 0)
+    editor = CodeEditorBox(width * 0.1, height * 0.2, width * 0.8, height * 0.6, challenge, language)
+    program = "\n".join(f"def function_{i}(value):  return value * {i} + len('padding text')" for i in range(line_count))
+    editor.line_index, editor.char_index = editor.buffer.insert_text(0, 0, program)
+    # Start mid-buffer so edits and scrolling happen away from either end.
+    editor.line_index, editor.char_index = line_count // 2, 10
+    editor.scroll_to_cursor()
+    return editor
+
+def run_scenario(screen, line_count, keystrokes, make_event, language):
+    editor = make_editor(screen, line_count, language)
+    editor.draw(screen)
+    timings = []
+    for i in range(keystrokes):
+        event = make_event(i)
+        started = time.perf_counter()
+        editor.handle_event(event)
+        editor.draw(screen)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    keystrokes = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    language = sys.argv[3] if len(sys.argv) > 3 else "Python"
+    pygame.init()
+    screen = pygame.display.set_mode((1280, 720))
+    print(f"{line_count}-line {language} buffer, {keystrokes} keystrokes per scenario (handle_event + draw)")
+    print(f"{'scenario':<16}{'keys/s':>10}{'p50 us':>10}{'p95 us':>10}{'max us':>10}")
+    for name, make_event in SCENARIOS.items():
+        timings = sorted(run_scenario(screen, line_count, keystrokes, make_event, language))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<16}{len(timings) / sum(timings):>10.0f}{statistics.median(timings) * 1e6:>10.0f}"
+              f"{p95 * 1e6:>10.0f}{timings[-1] * 1e6:>10.0f}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# Frame-time and allocation benchmark: replays scripted (or recorded) input through every game state on the
+# headless driver, rendering each frame through the normal Renderer, and writes per-scenario frame-time
+# percentiles and tracemalloc figures to JSON so two versions can be diffed.
+# Run from code/manu:
+#   python benchmarks/frames.py [--out frames.json] [--compare previous.json] [--replay recording.json]
+# --out defaults to benchmarks/frames.json under the data dir (see paths.py), outside the source tree.
+# Record a real session to replay with: BITBYBIT_RECORD_INPUT=recording.json python game.py
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from headless import HeadlessGame
+from paths import data_path
+from runtime import ReplayInput
+
+EDITOR_LINES = 200
+REGRESSION_THRESHOLD = 0.10
+REGRESSION_MIN_MS = 0.1  # ignore changes smaller than timer noise
+
+# --- Scenarios ---
+# Each scenario gets a fresh session, sets it up untimed, then returns a per-frame input script and a frame count
+# (or a stop condition) for the measured part.
+
+def reach_world_map(session):
+    session.controls.key(pygame.K_SPACE, " ")
+    session.step()
+
+def reach_challenge(session):
+    reach_world_map(session)
+    session.enter_kingdom("Python")
+    session.walk_to_boss()
+
+def splash(session):
+    return (lambda i: None), 300
+
+def world_map(session):
+    reach_world_map(session)
+    width, height = session.game.width, session.game.height
+    def script(i):
+        session.controls.mouse = (int(width * (0.1 + 0.8 * (i % 120) / 120)), int(height * 0.5))
+    return script, 300
+
+def level_walk(session):
+    reach_world_map(session)
+    session.enter_kingdom("Python")
+    def script(i):
+        direction = pygame.K_RIGHT if (i // 60) % 2 == 0 else pygame.K_LEFT
+        session.controls.held = {direction}
+    return script, 600
+
+def editor_typing(session):
+    reach_challenge(session)
+    editor = session.game.challenge_box
+    program = "\n".join(f"    total_{i} = compute(value_{i}, {i})  # step {i}" for i in range(EDITOR_LINES))
+    editor.line_index, editor.char_index = editor.buffer.insert_text(0, 0, program)
+    editor.line_index, editor.char_index = EDITOR_LINES // 2, 4
+    editor.update_cursor_offset()
+    editor.scroll_to_cursor()
+    text = "result = helper(score) + 1"
+    def script(i):
+        cycle = i % 40
+        if cycle < len(text):
+            session.controls.key(pygame.K_a, text[cycle])
+        elif cycle == len(text):
+            session.controls.key(pygame.K_RETURN, "\r")
+        elif cycle % 4 == 0:
+            session.controls.key(pygame.K_UP)
+        else:
+            session.controls.key(pygame.K_BACKSPACE)
+    return script, 600
+
+def battle(session):
+    reach_challenge(session)
+    challenge = session.game.quest_manager.get_current_challenge()
+    def script(i):
+        if i == 0:
+            session.controls.type_text(challenge.correct_answer)
+            session.controls.key(pygame.K_RETURN, "\r", pygame.KMOD_SHIFT)
+    # Submission through forging, attacking, impact and victory, until the level resumes.
+    return script, lambda i: i > 0 and session.state != 'battle'
+
+SCENARIOS = {"splash": splash, "world_map": world_map, "level_walk": level_walk,
+             "editor_typing": editor_typing, "battle": battle}
+
+def replay_scenario(path):
+    # Replays from the splash screen at the size the session was recorded at, so clicks land where they did.
+    with open(path, encoding="utf-8") as f:
+        size = tuple(json.load(f).get("size", (1280, 720)))
+    def replay(session):
+        recording = ReplayInput.load(path)
+        session.controls = recording
+        session.game.controls = recording
+        session.game.player.controls = recording
+        return (lambda i: None), lambda i: recording.finished() or not session.game.running
+    replay.size = size
+    return replay
+
+# --- Measurement ---
+def percentiles(values):
+    ordered = sorted(values)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1],
+            "mean": sum(ordered) / len(ordered)}
+
+def run(scenario, trace):
+    session = HeadlessGame(size=getattr(scenario, "size", (1280, 720)), render=True)
+    script, length = scenario(session)
+    done = length if callable(length) else (lambda i, n=length: i >= n)
+    frame_ms, alloc_kb, net_blocks = [], [], []
+    if trace:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    i = 0
+    while not done(i) and i < 20000:
+        script(i)
+        if trace:
+            blocks = sys.getallocatedblocks()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        session.step()
+        elapsed = time.perf_counter() - started
+        if trace:
+            # Read before anything below allocates, so the benchmark's own bookkeeping isn't counted.
+            blocks = sys.getallocatedblocks() - blocks
+            peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes
+            alloc_kb.append(peak_bytes / 1024)
+            net_blocks.append(blocks)
+        frame_ms.append(elapsed * 1000)
+        i += 1
+    result = {"frames": i, "frame_ms": percentiles(frame_ms)}
+    if trace:
+        ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+        growth = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        tracemalloc.stop()
+        result["frame_ms"] = None
+        result["alloc_kb_per_frame"] = percentiles(alloc_kb)
+        result["net_blocks_per_frame"] = sum(net_blocks) / len(net_blocks)
+        result["top_allocation_growth"] = [
+            {"site": f"{os.path.relpath(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+             "kb": round(stat.size_diff / 1024, 1), "blocks": stat.count_diff}
+            for stat in growth[:5] if stat.size_diff > 0]
+    return result
+
+def measure(name, scenario, repeats):
+    # Timing runs go without tracemalloc (it slows every allocation); one extra traced run gives the allocation figures.
+    # Each percentile is the best of the repeats, which filters out runs disturbed by the rest of the machine.
+    timed = [run(scenario, trace=False) for _ in range(repeats)]
+    best = {"frames": timed[0]["frames"], "frame_ms": {k: min(result["frame_ms"][k] for result in timed) for k in timed[0]["frame_ms"]}}
+    traced = run(scenario, trace=True)
+    summary = {"frames": best["frames"], "frame_ms": {k: round(v, 3) for k, v in best["frame_ms"].items()},
+               "alloc_kb_per_frame": {k: round(v, 2) for k, v in traced["alloc_kb_per_frame"].items()},
+               "net_blocks_per_frame": round(traced["net_blocks_per_frame"], 2),
+               "top_allocation_growth": traced["top_allocation_growth"]}
+    ms = summary["frame_ms"]
+    print(f"{name:<16}{summary['frames']:>7}{ms['p50']:>9.2f}{ms['p95']:>9.2f}{ms['p99']:>9.2f}"
+          f"{summary['alloc_kb_per_frame']['p95']:>14.1f}{summary['net_blocks_per_frame']:>10.1f}")
+    return summary
+
+def compare(results, path):
+    with open(path, encoding="utf-8") as f:
+        previous = json.load(f)["scenarios"]
+    regressions = []
+    print(f"\n{'vs ' + os.path.basename(path):<16}{'p95 before':>12}{'p95 now':>10}{'change':>9}")
+    for name, result in results.items():
+        if name not in previous:
+            continue
+        before, now = previous[name]["frame_ms"]["p95"], result["frame_ms"]["p95"]
+        change = (now - before) / before if before else 0.0
+        flag = "  REGRESSION" if change > REGRESSION_THRESHOLD and now - before > REGRESSION_MIN_MS else ""
+        print(f"{name:<16}{before:>12.2f}{now:>10.2f}{change:>+9.0%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame-time and allocation benchmark")
+    parser.add_argument("--out", default=data_path("benchmarks", "frames.json"))
+    parser.add_argument("--compare")
+    parser.add_argument("--replay")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--only", nargs="*")
+    args = parser.parse_args()
+
+    scenarios = {name: scenario for name, scenario in SCENARIOS.items() if not args.only or name in args.only}
+    if args.replay:
+        scenarios["replay"] = replay_scenario(args.replay)
+    print(f"{'scenario':<16}{'frames':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'alloc KB p95':>14}{'blocks':>10}")
+    results = {name: measure(name, scenario, args.repeats) for name, scenario in scenarios.items()}
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+              "pygame": pygame.version.ver, "machine": platform.machine(), "scenarios": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nwrote {args.out}")
+    if args.compare and compare(results, args.compare):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Grading benchmark: generates a class export's worth of attempts at every curriculum challenge (correct answers
+# re-spaced, re-quoted or commented, plus near misses) and grades them in-process and across a process pool.
+# Run from code/manu: python benchmarks/grading.py [attempts] [workers]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grading import curriculum_answers, grade_batch
+
+def variants(answer, language):
+    comment = "  # checked" if language == "Python" else "  // checked"
+    spaced = " ".join(answer.replace("(", " ( ").replace(")", " ) ").split())
+    return [
+        answer,
+        "".join(answer.split()),
+        spaced,
+        answer + comment,
+        answer.replace("'", '"') if language == "Python" else answer,
+        answer.replace("0", "1"),
+        answer[:-1],
+        "",
+    ]
+
+def make_attempts(answers, count, seed=1):
+    rng = random.Random(seed)
+    pools = {challenge_id: variants(answer, language) for challenge_id, (answer, language) in answers.items()}
+    challenge_ids = list(pools)
+    return [(challenge_id, rng.choice(pools[challenge_id])) for challenge_id in (rng.choice(challenge_ids) for _ in range(count))]
+
+def timed(answers, attempts, workers):
+    started = time.perf_counter()
+    results = grade_batch(answers, attempts, workers)
+    return results, time.perf_counter() - started
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    answers = curriculum_answers()
+    attempts = make_attempts(answers, count)
+    print(f"{count} attempts at {len(answers)} challenges")
+    serial, serial_time = timed(answers, attempts, 0)
+    print(f"{'in-process':<22}{count / serial_time:>12.0f} submissions/s   ({sum(serial)} passed)")
+    pooled, pooled_time = timed(answers, attempts, workers)
+    assert pooled == serial, "process pool disagreed with in-process grading"
+    print(f"{f'process pool ({workers})':<22}{count / pooled_time:>12.0f} submissions/s")
+
+if __name__ == "__main__":
+    main()
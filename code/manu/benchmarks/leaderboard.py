@@ -0,0 +1,114 @@
+# Leaderboard benchmark: seeds a fresh leaderboard with 100k players through batched ingestion, then times
+# rank / top-k / around-me lookups in process and over the local socket, sustained score updates applied in
+# batches (with lookups running alongside), and reopening the persisted board.
+# Run from code/manu: python benchmarks/leaderboard.py [players] [seconds]
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import Leaderboard, LeaderboardClient, LeaderboardServer
+
+LOOKUPS = 20000
+SOCKET_LOOKUPS = 5000
+UPDATE_BATCH = 1000
+UPDATE_RATE = 10000  # sustained score updates per second
+LOOKUP_RATE = 2000  # around-me lookups per second alongside them
+
+def timed(label, action, count=1):
+    started = time.perf_counter()
+    result = action()
+    elapsed = time.perf_counter() - started
+    per = f"{elapsed / count * 1e6:>10.1f} us each" if count > 1 else ""
+    print(f"{label:<40}{elapsed * 1000:>10.1f} ms{per}")
+    return result
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    rng = random.Random(7)
+    names = [f"player{i}" for i in range(players)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "leaderboard.sqlite3")
+        board = Leaderboard(path, flush_interval=3600)  # flushed by hand below
+
+        def seed():
+            for name in names:
+                board.submit(name, rng.randint(1, 40), rng.randint(0, 5000))
+            board.flush()
+        timed(f"ingest {players} players (one batch)", seed)
+
+        picks = [rng.choice(names) for _ in range(LOOKUPS)]
+        timed("rank lookups", lambda: [board.rank(name) for name in picks], LOOKUPS)
+        timed("top 10", lambda: [board.top(10) for _ in range(LOOKUPS)], LOOKUPS)
+        timed("around me (+-5)", lambda: [board.around(name, 5) for name in picks], LOOKUPS)
+
+        def updates():
+            batch = lambda: [board.submit(rng.choice(names), rng.randint(1, 40), rng.randint(0, 5000)) for _ in range(UPDATE_BATCH)]
+            batch()
+            return board.flush()
+        timed(f"one batch of {UPDATE_BATCH} score updates", updates, UPDATE_BATCH)
+
+        # Sustained load: a writer submits updates at a steady rate, a flusher applies them every 50 ms (as the
+        # background thread would) and a reader runs around-me lookups alongside.
+        stop, flushes, lookup_ms = threading.Event(), [], []
+        def writer():
+            per_tick = int(UPDATE_RATE / 100)
+            next_tick = time.perf_counter()
+            while not stop.is_set():
+                for _ in range(per_tick):
+                    board.submit(rng.choice(names), rng.randint(1, 40), rng.randint(0, 5000))
+                next_tick += 0.01
+                time.sleep(max(0.0, next_tick - time.perf_counter()))
+        def flusher():
+            while not stop.wait(0.05):
+                started = time.perf_counter()
+                count = board.flush()
+                flushes.append((count, (time.perf_counter() - started) * 1000))
+        def reader():
+            while not stop.is_set():
+                started = time.perf_counter()
+                board.around(rng.choice(names), 5)
+                lookup_ms.append((time.perf_counter() - started) * 1000)
+                time.sleep(1 / LOOKUP_RATE)
+        threads = [threading.Thread(target=target) for target in (writer, flusher, reader)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        applied = sum(count for count, _ in flushes)
+        batch_ms = [ms for _, ms in flushes]
+        print(f"{'sustained: updates applied':<40}{applied / seconds:>10.0f} /s  in {len(flushes)} batches "
+              f"(target {UPDATE_RATE}/s)")
+        print(f"{'sustained: batch apply + persist':<40}{percentile(batch_ms, 0.5):>10.3f} ms p50{percentile(batch_ms, 0.99):>10.3f} ms p99")
+        print(f"{'sustained: around-me lookup':<40}{percentile(lookup_ms, 0.5):>10.3f} ms p50{percentile(lookup_ms, 0.99):>10.3f} ms p99")
+
+        server = LeaderboardServer(board, port=0).start()
+        client = LeaderboardClient(server.server_address[1])
+        round_trips = []
+        for name in picks[:SOCKET_LOOKUPS]:
+            started = time.perf_counter()
+            client.rank(name)
+            round_trips.append((time.perf_counter() - started) * 1000)
+        print(f"{'socket rank lookup':<40}{percentile(round_trips, 0.5):>10.3f} ms p50{percentile(round_trips, 0.99):>10.3f} ms p99")
+        client.close()
+        server.shutdown()
+        server.server_close()
+        board.close()
+
+        reopened = timed(f"reopen from SQLite ({players} players)", lambda: Leaderboard(path))
+        assert len(reopened) == players
+        reopened.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Particle pool benchmark: keeps N sparks alive on screen (respawning bursts as they expire) and times the
+# update and the draw of a frame for the pooled NumPy system against the same particles as individual Sprites.
+# Both draw through Surface.blits, but the pool's draw also turns array positions into Python values, work the
+# sprites do in their update when they move their rects; the frame total is the fair comparison.
+# Run from code/manu: python benchmarks/particles.py [frames]
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from particles import ParticleKind, ParticlePool
+
+COUNTS = (100, 1000, 5000)
+SCREEN = pygame.Rect(0, 0, 1280, 720)
+LIFE = 60
+BURST = 50
+
+class SparkSprite(pygame.sprite.Sprite):
+    # What a spark costs as a Sprite: one Python update per particle per frame.
+    def __init__(self, image, pos, velocity):
+        super().__init__()
+        self.image = image
+        self.rect = image.get_rect(center=pos)
+        self.pos = pygame.math.Vector2(pos)
+        self.velocity = pygame.math.Vector2(velocity)
+        self.life = LIFE
+
+    def update(self):
+        self.velocity.y += 0.3
+        self.velocity *= 0.95
+        self.pos += self.velocity
+        self.rect.center = self.pos
+        self.life -= 1
+        if self.life <= 0 or not SCREEN.colliderect(self.rect):
+            self.kill()
+
+def burst_velocities(rng):
+    return [(rng.uniform(-9, 9), rng.uniform(-9, 9)) for _ in range(BURST)]
+
+def run_pool(screen, image, count, frames):
+    pool = ParticlePool([ParticleKind(image, gravity=0.3, drag=0.95, life=LIFE)], SCREEN, capacity=count)
+    rng = random.Random(1)
+    update_s = draw_s = 0.0
+    for _ in range(frames):
+        started = time.perf_counter()
+        while len(pool) + BURST <= count:
+            pool.burst(0, (rng.randrange(SCREEN.width), rng.randrange(SCREEN.height)), BURST, 9)
+        pool.update()
+        updated = time.perf_counter()
+        pool.draw(screen)
+        update_s += updated - started
+        draw_s += time.perf_counter() - updated
+    return update_s / frames, draw_s / frames, len(pool)
+
+def run_sprites(screen, image, count, frames):
+    group = pygame.sprite.Group()
+    rng = random.Random(1)
+    update_s = draw_s = 0.0
+    for _ in range(frames):
+        started = time.perf_counter()
+        while len(group) + BURST <= count:
+            center = (rng.randrange(SCREEN.width), rng.randrange(SCREEN.height))
+            group.add(SparkSprite(image, center, velocity) for velocity in burst_velocities(rng))
+        group.update()
+        updated = time.perf_counter()
+        group.draw(screen)
+        update_s += updated - started
+        draw_s += time.perf_counter() - updated
+    return update_s / frames, draw_s / frames, len(group)
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    pygame.init()
+    screen = pygame.Surface(SCREEN.size)
+    image = pygame.Surface((8, 8), pygame.SRCALPHA)
+    pygame.draw.circle(image, "gold", (4, 4), 4)
+    print(f"ms per frame, {frames} frames (spawning is included in update)")
+    print(f"{'particles':>10}{'pool update':>13}{'sprite update':>15}{'pool draw':>11}{'sprite draw':>13}"
+          f"{'pool total':>12}{'sprite total':>14}{'speedup':>9}")
+    for count in COUNTS:
+        pool_update, pool_draw, alive = run_pool(screen, image, count, frames)
+        sprite_update, sprite_draw, _ = run_sprites(screen, image, count, frames)
+        pool_total, sprite_total = pool_update + pool_draw, sprite_update + sprite_draw
+        print(f"{alive:>10}{pool_update * 1000:>13.3f}{sprite_update * 1000:>15.3f}{pool_draw * 1000:>11.3f}"
+              f"{sprite_draw * 1000:>13.3f}{pool_total * 1000:>12.3f}{sprite_total * 1000:>14.3f}{sprite_total / pool_total:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
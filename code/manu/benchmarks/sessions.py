@@ -0,0 +1,100 @@
+# Session server load generator: starts session_server in its own process (or targets one with --port), then
+# plays hundreds of concurrent learners through the whole curriculum over TCP, each making some wrong submissions
+# before the right one with a little think time in between, and reports throughput and response latency.
+# Run from code/manu: python benchmarks/sessions.py [--learners 300] [--rounds 5] [--think-ms 20] [--port N]
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curriculum import CurriculumStore
+from session_server import SessionClient, SessionServer
+
+def run_server(ready):
+    async def serve():
+        store = CurriculumStore()
+        server = await SessionServer(store).start(port=0)
+        ready.put(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+    asyncio.run(serve())
+
+def percentiles(values):
+    ordered = sorted(values)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
+
+async def learner(name, port, answers, args, latencies, rng):
+    async def timed(op, **fields):
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0, args.think_ms) / 1000)
+        started = time.perf_counter()
+        result = await client.request(op, **fields)
+        latencies.setdefault(op, []).append((time.perf_counter() - started) * 1000)
+        return result
+
+    started = time.perf_counter()
+    client = await SessionClient.connect(name, port)
+    latencies.setdefault("hello", []).append((time.perf_counter() - started) * 1000)
+    for kingdom in await timed("kingdoms"):
+        challenge = await timed("enter", kingdom=kingdom)
+        while challenge:
+            while rng.random() < args.mistake_rate:
+                await timed("submit", code="# not the answer yet")
+            result = await timed("submit", code=answers[kingdom, challenge["quest"]])
+            if not result["correct"]:
+                raise RuntimeError(f"{name}: correct answer to {challenge['quest']!r} was rejected")
+            challenge = result["next"]
+    await client.close()
+
+async def load(port, args):
+    store = CurriculumStore()
+    answers = {(kingdom, challenge.quest_name): challenge.correct_answer
+               for kingdom in store.kingdoms() for challenge in store.challenges(kingdom)}
+    store.close()
+    latencies, rng = {}, random.Random(1)
+    started = time.perf_counter()
+    for round_index in range(args.rounds):
+        await asyncio.gather(*(learner(f"learner-{round_index}-{i}", port, answers, args, latencies, rng)
+                               for i in range(args.learners)))
+    return time.perf_counter() - started, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Session server load generator")
+    parser.add_argument("--learners", type=int, default=300, help="concurrent learners per round")
+    parser.add_argument("--rounds", type=int, default=5, help="each round plays a fresh set of learners through")
+    parser.add_argument("--think-ms", type=float, default=20.0, help="random pause of up to this before each request")
+    parser.add_argument("--mistake-rate", type=float, default=0.5)
+    parser.add_argument("--port", type=int, help="load an already running server instead of starting one")
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        ready = multiprocessing.Queue()
+        server = multiprocessing.Process(target=run_server, args=(ready,), daemon=True)
+        server.start()
+        port = ready.get(timeout=30)
+    try:
+        elapsed, latencies = asyncio.run(load(port, args))
+    finally:
+        if server:
+            server.terminate()
+
+    requests = sum(len(values) for values in latencies.values())
+    print(f"{args.learners} concurrent learners x {args.rounds} rounds: {requests} requests in {elapsed:.2f}s "
+          f"= {requests / elapsed:.0f} requests/s (think time up to {args.think_ms:g} ms)")
+    print(f"{'op':<12}{'count':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    everything = [value for values in latencies.values() for value in values]
+    for op, values in list(latencies.items()) + [("all", everything)]:
+        stats = percentiles(values)
+        print(f"{op:<12}{len(values):>8}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['p99']:>9.2f}{stats['max']:>9.2f}")
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,73 @@
+# Spatial hash benchmark: moves thousands of sprites around a level at a constant density (the level grows with
+# the entity count, as a bigger level would) and times, per frame, re-indexing every sprite, one player-vs-group
+# collision query and a batch of point lookups, against the pairwise pygame.sprite checks they replace.
+# Run from code/manu: python benchmarks/spatial.py [frames]
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from spatial import SpatialGroup
+
+COUNTS = (100, 1000, 5000, 20000)
+AREA_PER_ENTITY = 300 * 300
+SPRITE_SIZE = 48
+POINT_QUERIES = 50
+
+class Entity(pygame.sprite.Sprite):
+    def __init__(self, rng, world):
+        super().__init__()
+        self.rect = pygame.Rect(rng.randrange(world.width), rng.randrange(world.height), SPRITE_SIZE, SPRITE_SIZE)
+        self.velocity = (rng.choice((-3, -1, 1, 3)), rng.choice((-3, -1, 1, 3)))
+        self.world = world
+
+    def update(self):
+        self.rect.move_ip(self.velocity)
+        self.rect.clamp_ip(self.world)
+
+def run(count, frames):
+    rng = random.Random(count)
+    side = int((count * AREA_PER_ENTITY) ** 0.5)
+    world = pygame.Rect(0, 0, side, side)
+    entities = [Entity(rng, world) for _ in range(count)]
+    indexed, plain = SpatialGroup(entities), pygame.sprite.Group(entities)
+    player = Entity(rng, world)
+    points = [(rng.randrange(side), rng.randrange(side)) for _ in range(POINT_QUERIES)]
+
+    move_s = query_s = pairwise_s = 0.0
+    hits = pairwise_hits = 0
+    for _ in range(frames):
+        started = time.perf_counter()
+        plain.update()  # moves the sprites (both groups hold the same ones), then re-indexes them
+        indexed.reindex()
+        move_s += time.perf_counter() - started
+
+        started = time.perf_counter()
+        hits += len(indexed.collide(player))
+        for point in points:
+            hits += len(indexed.at(point))
+        query_s += time.perf_counter() - started
+
+        started = time.perf_counter()
+        pairwise_hits += len(pygame.sprite.spritecollide(player, plain, False))
+        for point in points:
+            pairwise_hits += sum(1 for sprite in plain if sprite.rect.collidepoint(point))
+        pairwise_s += time.perf_counter() - started
+    assert hits == pairwise_hits, (hits, pairwise_hits)
+    return move_s / frames, query_s / frames, pairwise_s / frames
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    print(f"{POINT_QUERIES} point queries + 1 sprite-vs-group query per frame, {frames} frames")
+    print(f"{'entities':>9}{'move ms':>12}{'us/entity':>11}{'queries ms':>12}{'pairwise ms':>13}{'speedup':>9}")
+    for count in COUNTS:
+        move, query, pairwise = run(count, frames)
+        print(f"{count:>9}{move * 1000:>12.3f}{move * 1e6 / count:>11.2f}{query * 1000:>12.3f}"
+              f"{pairwise * 1000:>13.3f}{pairwise / query:>8.0f}x")
+
+if __name__ == "__main__":
+    main()
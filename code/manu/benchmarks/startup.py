@@ -0,0 +1,27 @@
+# Startup benchmark: launches game.py repeatedly with BITBYBIT_STARTUP_BENCHMARK=1 and reports import time,
+# time to first frame (splash on screen) and time until every asset is loaded.
+# Run from code/manu: python benchmarks/startup.py [runs]
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_once():
+    env = dict(os.environ, BITBYBIT_STARTUP_BENCHMARK="1", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    output = subprocess.run([sys.executable, "game.py"], cwd=GAME_DIR, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = [run_once() for _ in range(runs)]
+    print(f"{'metric':<18}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for metric in ("import_ms", "first_frame_ms", "assets_ready_ms"):
+        values = [result[metric] for result in results]
+        print(f"{metric:<18}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+if __name__ == "__main__":
+    main()
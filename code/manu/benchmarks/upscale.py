@@ -0,0 +1,82 @@
+# Upscale benchmark: draws onto a 1280x720 canvas and times Renderer.present() onto 1440p and 4K displays with
+# each filter, for full redraws, a frame where only a blinking cursor changed, and a frame where two walking
+# sprites changed. Also checks that nearest scaling of just the dirty rects matches a full-canvas scale.
+# Run from code/manu: python benchmarks/upscale.py [frames]
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from renderer import Renderer
+
+CANVAS = (1280, 720)
+DISPLAYS = ((1366, 768), (1920, 1080), (2560, 1440), (3840, 2160))
+FRAME_BUDGET_MS = 1000 / 60
+
+def paint(surface, rng, count=300):
+    for _ in range(count):
+        colour = [rng.randrange(256) for _ in range(3)]
+        surface.fill(colour, (rng.randrange(surface.get_width()), rng.randrange(surface.get_height()),
+                              rng.randrange(1, 80), rng.randrange(1, 80)))
+
+def per_frame_ms(renderer, frames, track):
+    started = time.perf_counter()
+    for i in range(frames):
+        renderer.begin_frame("scene")
+        track(renderer, i)
+        renderer.get_clip()
+        renderer.present()
+    return (time.perf_counter() - started) / frames * 1000
+
+def full_redraw(renderer, i):
+    renderer.invalidate()
+
+def cursor(renderer, i):
+    renderer.track("cursor", pygame.Rect(400, 300, 3, 40), i % 2)
+
+def sprites(renderer, i):
+    renderer.track("player", pygame.Rect(100 + i % 600, 420, 160, 200))
+    renderer.track("boss", pygame.Rect(900, 300, 250, 300), i)
+
+def mismatched_pixels(display, rng):
+    # Redraws random rects through the dirty path, then compares against one full-canvas scale.
+    renderer = Renderer(display, True, CANVAS, smooth=False)
+    paint(renderer.screen, rng)
+    renderer.present()
+    for i in range(50):
+        rect = pygame.Rect(rng.randrange(1200), rng.randrange(650), rng.randrange(1, 80), rng.randrange(1, 70))
+        renderer.begin_frame("scene")
+        renderer.track(i, rect)
+        renderer.screen.fill([rng.randrange(256) for _ in range(3)], rect)
+        renderer.get_clip()
+        renderer.present()
+    partial = pygame.image.tobytes(display, "RGB")
+    renderer.invalidate()
+    renderer.present()
+    return sum(a != b for a, b in zip(partial, pygame.image.tobytes(display, "RGB")))
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    pygame.init()
+    rng = random.Random(3)
+    print(f"{'display':<12}{'filter':<9}{'full ms':>9}{'cursor ms':>11}{'sprites ms':>12}{'exact':>7}")
+    for size in DISPLAYS:
+        display = pygame.display.set_mode(size)
+        for smooth in (False, True):
+            renderer = Renderer(display, True, CANVAS, smooth)
+            paint(renderer.screen, rng)
+            renderer.present()
+            full = per_frame_ms(renderer, max(1, frames // 10), full_redraw)
+            times = [per_frame_ms(renderer, frames, track) for track in (cursor, sprites)]
+            exact = "" if smooth else ("yes" if mismatched_pixels(display, rng) == 0 else "NO")
+            flags = "  over budget" if max(full, *times) > FRAME_BUDGET_MS else ""
+            print(f"{size[0]}x{size[1]:<7}{'smooth' if smooth else 'nearest':<9}{full:>9.2f}{times[0]:>11.3f}{times[1]:>12.2f}"
+                  f"{exact:>7}{flags}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import threading
+
+# --- Token-Budgeted Conversation History ---
+# Replaces an ever-growing chat history: the current challenge stays pinned, recent turns are kept verbatim,
+# and older turns are folded into a short running summary once the token budget is exceeded.
+
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+class ConversationHistory:
+    def __init__(self, token_budget=3000, summary_budget=400):
+        self.token_budget = token_budget
+        self.summary_budget = min(summary_budget, token_budget // 4)
+        self.context = ""
+        self.summary_lines = []
+        self.turns = []
+        self.lock = threading.Lock()
+
+    def pin_context(self, text):
+        with self.lock:
+            self.context = text
+
+    def add_turn(self, user_text, model_text):
+        with self.lock:
+            self.turns.append((user_text, model_text))
+            self._trim(0)
+
+    def build(self, prompt):
+        # Contents for a stateless generate_content call, alternating user/model roles as Gemini expects.
+        with self.lock:
+            self._trim(estimate_tokens(prompt))
+            contents = []
+            preamble = self._preamble()
+            if preamble:
+                contents.append({"role": "user", "parts": [preamble]})
+                contents.append({"role": "model", "parts": ["Understood."]})
+            for user_text, model_text in self.turns:
+                contents.append({"role": "user", "parts": [user_text]})
+                contents.append({"role": "model", "parts": [model_text]})
+            contents.append({"role": "user", "parts": [prompt]})
+            return contents
+
+    def token_count(self):
+        with self.lock:
+            return self._token_count()
+
+    def _preamble(self):
+        parts = []
+        if self.context:
+            parts.append(f"Context: {self.context}")
+        if self.summary_lines:
+            parts.append("Summary of the earlier conversation:\n" + "\n".join(self.summary_lines))
+        return "\n\n".join(parts)
+
+    def _token_count(self):
+        return estimate_tokens(self._preamble()) + sum(estimate_tokens(u) + estimate_tokens(m) for u, m in self.turns)
+
+    def _trim(self, reserve):
+        while self.turns and self._token_count() + reserve > self.token_budget:
+            self._fold(*self.turns.pop(0))
+
+    def _fold(self, user_text, model_text):
+        self.summary_lines.append(f"- Learner: {clip(user_text, 120)} / Assistant: {clip(model_text, 160)}")
+        while len(self.summary_lines) > 1 and estimate_tokens("\n".join(self.summary_lines)) > self.summary_budget:
+            self.summary_lines.pop(0)
@@ -1,8 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import threading
+import collections
+import queue
 import os
-import google.generativeai as genai
+import sqlite3
+from hint_cache import HintCache, make_hint_key
+from ai_gateway import AIGateway
+from chat_history import ConversationHistory
+from fake_model import FakeGenerativeModel, fake_model_enabled
 
 # --- Main Application Class ---
 class BitByBitChatbot(tk.Tk):
@@ -13,9 +18,21 @@ class BitByBitChatbot(tk.Tk):
     USER_BUBBLE_COLOR = "#A18BFF"
     HEADER_COLOR = "#A18BFF"
     INPUT_BG = "#ffffff"
+    COMMAND_POLL_MS = 100
+    RESPONSE_POLL_MS = 30
+    STREAM_RESPONSES = True
+    AI_TIMEOUT = 30.0
+    HISTORY_TOKEN_BUDGET = 3000
+    MAX_TRANSCRIPT_BUBBLES = 60
 
-    def __init__(self, initial_prompt=None):
+    def __init__(self, initial_prompt=None, keep_alive=False):
         super().__init__()
+        # A kept-alive window hides instead of closing, so the game can reuse it for later hints.
+        self.keep_alive = keep_alive
+        self.commands = None
+        if keep_alive:
+            self.withdraw()
+            self.protocol("WM_DELETE_WINDOW", self.close)
 
         # <<< FIX: This line forces the window to be always on top.
         self.attributes('-topmost', True)
@@ -25,19 +42,32 @@ class BitByBitChatbot(tk.Tk):
         self.configure(bg=self.BG_COLOR)
 
         self.api_key = os.environ.get("GEMINI_API_KEY")
-        self.chat_session = None
+        self.use_fake_model = fake_model_enabled()
+        self.model = None
+        self.gateway = None
+        self.history = ConversationHistory(self.HISTORY_TOKEN_BUDGET)
+        self.bubble_open = False
+        self.bubble_marks = collections.deque()
+        self.bubble_count = 0
+        # Worker threads never touch Tk widgets; they post to this queue and the Tk loop drains it.
+        self.responses = queue.Queue()
+        try:
+            self.hint_cache = HintCache()
+        except sqlite3.Error as e:
+            print(f"Hint cache unavailable: {e}")
+            self.hint_cache = None
 
         self.create_widgets()
+        self.after(self.RESPONSE_POLL_MS, self.drain_responses)
 
-        if not self.api_key:
+        if not self.api_key and not self.use_fake_model:
             self.set_input_state("disabled")
             self.add_ai_message("API Key not found. Please set the GEMINI_API_KEY environment variable.")
         else:
             self.initialize_ai_model()
             if initial_prompt:
-                self.add_ai_message("I see you're working on a challenge! How can I help with this?")
-                threading.Thread(target=self.get_ai_response, args=(initial_prompt,), daemon=True).start()
-            else:
+                self.ask_for_hint(initial_prompt)
+            elif not keep_alive:
                 self.add_ai_message("Hi! I'm your AI assistant. How can I help you?")
 
     def create_widgets(self):
@@ -45,7 +75,7 @@ class BitByBitChatbot(tk.Tk):
         header.pack(fill=tk.X, side=tk.TOP)
         close_btn = tk.Label(header, text="X", bg=self.HEADER_COLOR, fg="white", font=("Arial", 12, "bold"), cursor="hand2")
         close_btn.pack(side=tk.RIGHT, padx=10)
-        close_btn.bind("<Button-1>", lambda e: self.destroy())
+        close_btn.bind("<Button-1>", lambda e: self.close())
         title = tk.Label(header, text="AI ASSISTANT", bg=self.HEADER_COLOR, fg="white", font=("Arial", 14, "bold"))
         title.pack(pady=10)
 
@@ -83,35 +113,169 @@ class BitByBitChatbot(tk.Tk):
 
     def initialize_ai_model(self):
         try:
-            genai.configure(api_key=self.api_key)
-            self.chat_session = genai.GenerativeModel("gemini-1.5-flash").start_chat(history=[])
+            if self.use_fake_model:
+                self.model = FakeGenerativeModel()
+            else:
+                import google.generativeai as genai  # the heaviest import; skipped entirely with the fake model
+                genai.configure(api_key=self.api_key)
+                self.model = genai.GenerativeModel("gemini-1.5-flash")
+            # One call at a time: the conversation history must be extended one turn at a time. A call that hangs
+            # past AI_TIMEOUT is abandoned (it never adds its turn), so the next prompt still reaches the model.
+            self.gateway = AIGateway(self.send_to_model, max_workers=1, timeout=self.AI_TIMEOUT)
         except Exception as e:
             self.add_ai_message(f"Could not initialize AI model: {e}")
             self.set_input_state("disabled")
 
+    def ask_for_hint(self, prompt, problem_text=None, difficulty="beginner"):
+        # Hints are cached by (prompt, problem, difficulty); a hit is shown at once and needs no model or network.
+        cache_key = make_hint_key(prompt, problem_text, difficulty) if self.hint_cache else None
+        cached_hint = self.hint_cache.get(cache_key) if cache_key else None
+        if cached_hint is None and not self.model:
+            return
+        self.history.pin_context(f"The learner is stuck on this {difficulty} coding challenge: {problem_text or prompt}")
+        self.add_ai_message("I see you're working on a challenge! How can I help with this?")
+        if cached_hint is not None:
+            self.history.add_turn(prompt, cached_hint)
+            self.add_ai_message(cached_hint)
+            return
+        self.set_input_state("disabled")
+        self.request_ai_response(prompt, cache_key)
+
+    def show(self):
+        self.deiconify()
+        self.lift()
+        self.input_field.focus_set()
+
+    def hide(self):
+        self.withdraw()
+
+    def close(self):
+        if self.keep_alive:
+            self.hide()
+        else:
+            self.destroy()
+
+    def listen(self, commands):
+        self.commands = commands
+        self.after(self.COMMAND_POLL_MS, self.poll_commands)
+
+    def poll_commands(self):
+        try:
+            while True:
+                command, payload = self.commands.get_nowait()
+                if command == "prompt":
+                    self.show()
+                    self.ask_for_hint(**payload)
+                elif command == "show":
+                    self.show()
+                elif command == "hide":
+                    self.hide()
+                elif command == "quit":
+                    self.shutdown()
+                    return
+        except queue.Empty:
+            pass
+        self.after(self.COMMAND_POLL_MS, self.poll_commands)
+
+    def shutdown(self):
+        if self.gateway:
+            print(f"AI gateway: {self.gateway.stats()}")
+            self.gateway.shutdown()
+        if self.hint_cache:
+            print(f"Hint cache: {self.hint_cache.stats()}")
+            self.hint_cache.close()
+            self.hint_cache = None
+        self.destroy()
+
     def process_input_event(self, event=None):
         user_input = self.input_field.get().strip()
         if user_input:
             self.input_field.delete(0, tk.END)
             self.add_user_message(user_input)
             self.set_input_state("disabled")
-            threading.Thread(target=self.get_ai_response, args=(user_input,), daemon=True).start()
+            self.request_ai_response(user_input)
+
+    def send_to_model(self, prompt, timeout):
+        # Each call sends only the budgeted history, not the whole session.
+        contents = self.history.build(prompt)
+        request_options = {"timeout": timeout}
+        parts = []
+        if self.STREAM_RESPONSES:
+            for chunk in self.model.generate_content(contents, stream=True, request_options=request_options):
+                parts.append(chunk.text)
+                yield chunk.text
+        else:
+            parts.append(self.model.generate_content(contents, request_options=request_options).text)
+            yield parts[0]
+        self.history.add_turn(prompt, "".join(parts))
+
+    def request_ai_response(self, prompt, cache_key=None):
+        future = self.gateway.submit(prompt, on_chunk=self.on_ai_chunk)
+        future.add_done_callback(lambda future: self.on_ai_response(future, cache_key))
+
+    def on_ai_chunk(self, text):
+        self.responses.put(("chunk", text))
 
-    def get_ai_response(self, prompt):
+    def on_ai_response(self, future, cache_key):
+        # Runs on a gateway thread, so it only touches the queue and the cache.
+        error = None
         try:
-            response = self.chat_session.send_message(prompt)
-            self.add_ai_message(response.text)
+            response_text = future.result()
+            if cache_key and self.hint_cache and response_text:
+                self.hint_cache.put(cache_key, response_text)
+        except TimeoutError:
+            error = "The AI assistant took too long to answer. Please try again."
         except Exception as e:
-            self.add_ai_message(f"Error: {e}")
-        finally:
-            self.set_input_state("normal")
+            error = f"Error: {e}"
+        self.responses.put(("end", None))
+        if error:
+            self.responses.put(("message", error))
+        self.responses.put(("ready", None))
+
+    def drain_responses(self):
+        try:
+            while True:
+                kind, text = self.responses.get_nowait()
+                if kind == "chunk":
+                    if not self.bubble_open:
+                        self.start_bubble()
+                        self._add_message("\n", "ai_bubble")
+                        self.bubble_open = True
+                    self._add_message(text, "ai_bubble")
+                elif kind == "end":
+                    if self.bubble_open:
+                        self._add_message("\n", "ai_bubble")
+                        self.bubble_open = False
+                elif kind == "message":
+                    self.add_ai_message(text)
+                elif kind == "ready":
+                    self.set_input_state("normal")
+        except queue.Empty:
+            pass
+        self.after(self.RESPONSE_POLL_MS, self.drain_responses)
 
     def add_user_message(self, message):
+        self.start_bubble()
         self._add_message(f"\n{message}\n", "user_bubble")
 
     def add_ai_message(self, message):
+        self.start_bubble()
         self._add_message(f"\n{message}\n", "ai_bubble")
 
+    def start_bubble(self):
+        # Keep the transcript bounded: once there are too many bubbles, the oldest ones are deleted.
+        mark = f"bubble{self.bubble_count}"
+        self.bubble_count += 1
+        self.chat_window.mark_set(mark, "end-1c")
+        self.chat_window.mark_gravity(mark, tk.LEFT)
+        self.bubble_marks.append(mark)
+        if len(self.bubble_marks) > self.MAX_TRANSCRIPT_BUBBLES:
+            self.chat_window.config(state='normal')
+            self.chat_window.delete("1.0", self.bubble_marks[-self.MAX_TRANSCRIPT_BUBBLES])
+            self.chat_window.config(state='disabled')
+            while len(self.bubble_marks) > self.MAX_TRANSCRIPT_BUBBLES:
+                self.chat_window.mark_unset(self.bubble_marks.popleft())
+
     def _add_message(self, message, tag):
         self.chat_window.config(state='normal')
         self.chat_window.insert(tk.END, message, tag)
@@ -125,5 +289,11 @@ def run_chatbot_app(initial_prompt=None):
     app = BitByBitChatbot(initial_prompt=initial_prompt)
     app.mainloop()
 
+def run_chatbot_service(commands):
+    # Long-lived assistant: starts hidden and takes ("prompt" | "show" | "hide" | "quit", payload) commands.
+    app = BitByBitChatbot(keep_alive=True)
+    app.listen(commands)
+    app.mainloop()
+
 if __name__ == "__main__":
     run_chatbot_app("I need help with Python variables.")
\ No newline at end of file
@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+from collections import deque
+from paths import data_path
+
+# --- Curriculum Store ---
+# Challenges are authored in curriculum.json and compiled into an indexed SQLite file the first time the game
+# (or the grader) runs after the JSON changes. Startup only reads the small kingdoms table; a kingdom's
+# challenges are paged in when the player enters it.
+
+CURRICULUM_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "curriculum.json")
+SCHEMA_VERSION = 1
+
+class Challenge:
+    __slots__ = ("quest_name", "problem_text", "correct_answer", "xp_reward", "difficulty")
+
+    def __init__(self, quest_name, problem_text, correct_answer, xp_reward, difficulty="beginner"):
+        self.quest_name = quest_name
+        self.problem_text = problem_text
+        self.correct_answer = correct_answer
+        self.xp_reward = xp_reward
+        self.difficulty = difficulty
+
+class CurriculumStore:
+    def __init__(self, source=CURRICULUM_FILE, path=None):
+        self.source = source
+        self.path = path or data_path("curriculum.sqlite3")
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS kingdoms (position INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, data TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS challenges (
+                kingdom TEXT NOT NULL, position INTEGER NOT NULL, quest TEXT NOT NULL, difficulty TEXT NOT NULL,
+                problem TEXT NOT NULL, answer TEXT NOT NULL, xp INTEGER NOT NULL, PRIMARY KEY (kingdom, position));
+            CREATE UNIQUE INDEX IF NOT EXISTS challenges_quest ON challenges (kingdom, quest);
+            CREATE INDEX IF NOT EXISTS challenges_difficulty ON challenges (kingdom, difficulty, position);
+        """)
+        self.refresh()
+
+    def source_stamp(self):
+        stat = os.stat(self.source)
+        return f"{SCHEMA_VERSION}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def refresh(self):
+        # Recompiles the index only when curriculum.json has changed since it was last built.
+        stamp = self.source_stamp()
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        if row and row[0] == stamp:
+            return
+        with open(self.source, encoding="utf-8") as f:
+            curriculum = json.load(f)
+        with self.db:
+            self.db.execute("DELETE FROM kingdoms")
+            self.db.execute("DELETE FROM challenges")
+            self.db.executemany("INSERT INTO kingdoms VALUES (?, ?, ?)",
+                                ((i, kingdom["name"], json.dumps(kingdom)) for i, kingdom in enumerate(curriculum["kingdoms"])))
+            positions = {}
+            rows = []
+            for challenge in curriculum["challenges"]:
+                kingdom = challenge["kingdom"]
+                positions[kingdom] = positions.get(kingdom, -1) + 1
+                rows.append((kingdom, positions[kingdom], challenge["quest"], challenge.get("difficulty", "beginner"),
+                             challenge["problem"], challenge["answer"], challenge["xp"]))
+            self.db.executemany("INSERT INTO challenges VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (stamp,))
+
+    def kingdoms(self):
+        # {name: metadata} in authoring order; map positions are fractions of the screen size.
+        return {name: json.loads(data) for name, data in self.db.execute("SELECT name, data FROM kingdoms ORDER BY position")}
+
+    def count(self, kingdom, difficulty=None):
+        query, args = self._filter(kingdom, difficulty)
+        return self.db.execute(f"SELECT COUNT(*) FROM challenges WHERE {query}", args).fetchone()[0]
+
+    def page(self, kingdom, after=-1, limit=16, difficulty=None):
+        # Up to `limit` (position, Challenge) pairs following `after`, in curriculum order.
+        query, args = self._filter(kingdom, difficulty)
+        rows = self.db.execute(f"SELECT position, quest, problem, answer, xp, difficulty FROM challenges "
+                               f"WHERE {query} AND position > ? ORDER BY position LIMIT ?", args + (after, limit))
+        return [(row[0], Challenge(*row[1:])) for row in rows]
+
+    def challenges(self, kingdom, difficulty=None, page_size=256):
+        after = -1
+        while True:
+            page = self.page(kingdom, after, page_size, difficulty)
+            if not page:
+                return
+            for after, challenge in page:
+                yield challenge
+
+    def _filter(self, kingdom, difficulty):
+        if difficulty is None:
+            return "kingdom = ?", (kingdom,)
+        return "kingdom = ? AND difficulty = ?", (kingdom, difficulty)
+
+    def close(self):
+        self.db.close()
+
+class QuestManager:
+    # Walks one kingdom's challenges in order, holding only a small page of them in memory at a time.
+    PAGE_SIZE = 16
+
+    def __init__(self, store, kingdom, difficulty=None, completed=0):
+        self.store = store
+        self.kingdom = kingdom
+        self.difficulty = difficulty
+        self.total = store.count(kingdom, difficulty)
+        self.current_challenge_index = 0
+        self.upcoming = deque()
+        self.last_position = -1
+        self.fill()
+        # Resuming a saved game skips the challenges already beaten.
+        for _ in range(min(completed, self.total)):
+            self.advance_quest()
+
+    def fill(self):
+        if not self.upcoming:
+            page = self.store.page(self.kingdom, self.last_position, self.PAGE_SIZE, self.difficulty)
+            if page:
+                self.last_position = page[-1][0]
+                self.upcoming.extend(challenge for _, challenge in page)
+
+    def get_current_challenge(self):
+        return self.upcoming[0] if self.upcoming else None
+
+    def advance_quest(self):
+        if self.upcoming:
+            self.upcoming.popleft()
+        self.current_challenge_index += 1
+        self.fill()
+
+    def all_quests_complete(self):
+        return self.current_challenge_index >= self.total
@@ -0,0 +1,60 @@
+import os
+import time
+
+# --- Offline Stand-in for the Gemini Model ---
+# Mirrors the parts of google.generativeai the assistant uses (GenerativeModel.generate_content),
+# so the chat window can be exercised without network access or an API key.
+# Enable with BITBYBIT_FAKE_MODEL=1; tune with BITBYBIT_FAKE_FIRST_DELAY and BITBYBIT_FAKE_CHUNK_DELAY (seconds),
+# and BITBYBIT_FAKE_FAILURES to make the first N calls fail like a flaky connection.
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeResponse:
+    def __init__(self, chunks, first_delay, chunk_delay):
+        self.chunks = chunks
+        self.first_delay = first_delay
+        self.chunk_delay = chunk_delay
+
+    def __iter__(self):
+        time.sleep(self.first_delay)
+        for i, chunk in enumerate(self.chunks):
+            if i: time.sleep(self.chunk_delay)
+            yield FakeChunk(chunk)
+
+    @property
+    def text(self):
+        return "".join(chunk.text for chunk in self)
+
+class FakeGenerativeModel:
+    def __init__(self, model_name="fake", first_delay=None, chunk_delay=None, failures=None, chunk_size=12):
+        self.model_name = model_name
+        self.failures = int(os.environ.get("BITBYBIT_FAKE_FAILURES", 0)) if failures is None else failures
+        self.first_delay = float(os.environ.get("BITBYBIT_FAKE_FIRST_DELAY", 0.2)) if first_delay is None else first_delay
+        self.chunk_delay = float(os.environ.get("BITBYBIT_FAKE_CHUNK_DELAY", 0.05)) if chunk_delay is None else chunk_delay
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.last_contents = None
+
+    def make_reply(self, prompt):
+        return (f"Here's a hint: break the problem down. You asked about {prompt!r}. "
+                "Think about which keyword or operator does exactly that, then try writing it on one line.")
+
+    def respond(self, prompt, stream):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("fake model: simulated connection failure")
+        reply = self.make_reply(prompt)
+        chunks = [reply[i:i + self.chunk_size] for i in range(0, len(reply), self.chunk_size)]
+        response = FakeResponse(chunks, self.first_delay, self.chunk_delay)
+        if stream:
+            return response
+        return FakeChunk(response.text)
+
+    def generate_content(self, contents, stream=False, request_options=None):
+        self.last_contents = contents
+        return self.respond(contents[-1]["parts"][0], stream)
+
+def fake_model_enabled():
+    return bool(os.environ.get("BITBYBIT_FAKE_MODEL"))
@@ -0,0 +1,74 @@
+import warnings
+import pygame
+
+# --- Font Registry ---
+# Every UI element asks here instead of constructing its own pygame.font.Font, so each (face, size) is loaded once.
+
+MONOSPACE_FACES = "consolas,dejavusansmono,menlo,couriernew,liberationmono,monospace"
+
+_fonts = {}
+_atlases = {}
+_monospace_path = False
+
+def monospace_path():
+    # Resolved once; falls back to pygame's default face where no monospace font is installed.
+    global _monospace_path
+    if _monospace_path is False:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            _monospace_path = pygame.font.match_font(MONOSPACE_FACES)
+    return _monospace_path
+
+def get_font(size, monospace=False):
+    key = (size, monospace)
+    if key not in _fonts:
+        _fonts[key] = pygame.font.Font(monospace_path() if monospace else None, size)
+    return _fonts[key]
+
+def get_atlas(size):
+    if size not in _atlases:
+        _atlases[size] = GlyphAtlas(get_font(size, monospace=True))
+    return _atlases[size]
+
+# --- Glyph Atlas ---
+class GlyphAtlas:
+    # Glyphs are rendered once per (character, color); a line of text is then composed from cached glyphs
+    # with a single Surface.blits call instead of a font.render per edit.
+    def __init__(self, font):
+        self.font = font
+        self.height = font.get_height()
+        self.glyphs = {}
+        self.advances = {}
+
+    def advance(self, char):
+        if char not in self.advances:
+            metrics = self.font.metrics(char)
+            self.advances[char] = metrics[0][4] if metrics and metrics[0] else self.font.size(char)[0]
+        return self.advances[char]
+
+    def glyph(self, char, color):
+        key = (char, color)
+        if key not in self.glyphs:
+            self.glyphs[key] = self.font.render(char, True, color)
+        return self.glyphs[key]
+
+    def width(self, text):
+        return sum(self.advance(char) for char in text)
+
+    def render(self, spans, background=None):
+        # `spans` is a list of (text, color); returns one surface holding the whole line. With a background
+        # color the surface is opaque, so blitting it every frame is a plain copy rather than an alpha blend.
+        size = (max(1, sum(self.width(text) for text, _ in spans)), self.height)
+        if background is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+        else:
+            surface = pygame.Surface(size)
+            surface.fill(background)
+        x, blits = 0, []
+        for text, color in spans:
+            for char in text:
+                if not char.isspace():
+                    blits.append((self.glyph(char, color), (x, 0)))
+                x += self.advance(char)
+        surface.blits(blits, False)
+        return surface
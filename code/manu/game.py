@@ -1,9 +1,31 @@
+import time
+STARTUP_TIME = time.perf_counter()
 import pygame
 import sys
 import os
+import json
 import asyncio
 import multiprocessing
-from chatbot_app import run_chatbot_app
+import weakref
+import getpass
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asset_cache
+from assistant import AssistantProcess
+from renderer import Renderer
+from text_buffer import TextBuffer
+from fonts import get_font, get_atlas
+from syntax import Highlighter
+from grading import grade
+from curriculum import CurriculumStore
+from session import LearningSession
+from runtime import RealClock, LiveInput, RecordingInput
+from profiler import NULL_PROFILER, Profiler
+from spatial import SpatialGroup, SpatialHash
+from particles import ParticleKind, ParticlePool
+from savegame import SaveJournal
+from leaderboard import Leaderboard, LeaderboardServer
+IMPORT_DURATION = time.perf_counter() - STARTUP_TIME
 
 # --- Configuration ---
 WIDTH, HEIGHT = 1280, 720
@@ -13,6 +35,21 @@ FONT_SIZE_EDITOR = 36
 FONT_SIZE_LARGE = 100
 FONT_SIZE_MEDIUM = 60
 FONT_SIZE_MAP = 50
+HINT_DIFFICULTY = "beginner"  # beginner, intermediate or expert; part of the hint cache key
+CHALLENGE_DIFFICULTY = None  # only play challenges of this difficulty from curriculum.json; None plays them all
+USE_DIRTY_RECTS = True  # set to False to fall back to full-screen flips every frame
+RENDER_RESOLUTION = None  # e.g. (1280, 720): draw at a fixed size and upscale once per frame; None draws at native size
+RENDER_FILTER = "nearest"  # or "smooth": softer, but rescales the whole canvas every changed frame (~24 ms at 4K)
+EDITOR_KEY_REPEAT = (400, 30)  # (delay ms, interval ms) for held keys in the code editor
+ASSET_LOADER_THREADS = 4
+ASSET_MEMORY_BUDGET_MB = 128  # decoded surfaces kept resident; least-recently-used unpinned ones are evicted past this
+RECORD_INPUT = os.environ.get("BITBYBIT_RECORD_INPUT")  # path to save this session's input for benchmarks/frames.py --replay
+STARTUP_BENCHMARK = os.environ.get("BITBYBIT_STARTUP_BENCHMARK") == "1"  # print startup timings and exit
+SAVE_PROGRESS = True  # keep XP and cleared kingdoms between sessions; see savegame.py
+PLAYER_NAME = os.environ.get("BITBYBIT_PLAYER") or getpass.getuser()  # this machine's name on the leaderboard
+LEADERBOARD_PORT = None  # e.g. 8765: also serve leaderboard lookups on 127.0.0.1 from the game; see leaderboard.py
+PROFILE = os.environ.get("BITBYBIT_PROFILE") == "1"  # instrument the main loop; F3 shows the overlay, F4 exports a trace
+PROFILE_TRACE = os.environ.get("BITBYBIT_PROFILE_TRACE")  # also write the Chrome trace here on exit
 
 # --- Colors ---
 COLOR_BG = "#1a1a2e"
@@ -26,42 +63,27 @@ COLOR_XP_BAR_BG = "#4a4a6a"
 COLOR_XP_BAR_FILL = "#34d399"
 COLOR_CHALLENGE_BG = "#22223B"
 COLOR_CHALLENGE_BORDER = "#F2E9E4"
-
-# --- Challenge & Quest Management ---
-class Challenge:
-    def __init__(self, quest_name, problem_text, correct_answer, xp_reward):
-        self.quest_name = quest_name
-        self.problem_text = problem_text
-        self.correct_answer = correct_answer
-        self.xp_reward = xp_reward
-
-class QuestManager:
-    def __init__(self, challenges):
-        self.challenges = challenges
-        self.current_challenge_index = 0
-
-    def get_current_challenge(self):
-        return self.challenges[self.current_challenge_index] if self.current_challenge_index < len(self.challenges) else None
-
-    def advance_quest(self):
-        self.current_challenge_index += 1
-
-    def all_quests_complete(self):
-        return self.current_challenge_index >= len(self.challenges)
+COLOR_SYNTAX = {"text": COLOR_TEXT, "keyword": "#C77DFF", "builtin": "#7DD3FC", "string": "#FBBF24",
+                "number": "#FB923C", "comment": "#9A8C98", "preprocessor": "#F472B6"}
 
 # --- UI Elements ---
 class CodeEditorBox(pygame.sprite.Sprite):
-    def __init__(self, x, y, w, h, challenge):
+    def __init__(self, x, y, w, h, challenge, language=None, clock=None):
         super().__init__()
+        self.clock = clock or RealClock()
         self.rect = pygame.Rect(x, y, w, h)
         self.challenge = challenge
-        self.lines = [""]
+        self.language = language
+        self.buffer = TextBuffer()
         self.line_index = 0
         self.char_index = 0
+        self.scroll_line = 0
+        self.version = 0
         
-        self.font_problem = pygame.font.Font(None, FONT_SIZE_CHALLENGE)
-        self.font_editor = pygame.font.Font(None, FONT_SIZE_EDITOR)
-        self.font_info = pygame.font.Font(None, 24)
+        self.font_problem = get_font(FONT_SIZE_CHALLENGE)
+        self.atlas = get_atlas(FONT_SIZE_EDITOR)
+        self.font_info = get_font(24)
+        self.highlighter = Highlighter(language)
         
         self.show_error = False
         self.error_timer = 0
@@ -71,121 +93,188 @@ class CodeEditorBox(pygame.sprite.Sprite):
         self.cursor_timer = 0
         self.CURSOR_BLINK_RATE = 500
 
+        # Render cache: problem layout is keyed on (problem_text, width), editor lines are composed from the glyph
+        # atlas on edit only, and the visible blit list is rebuilt only when the text or scroll position changes.
+        self.problem_layout_key = None
+        self.problem_surfaces = []
+        self.info_surface = self.font_info.render("Press [Shift+Enter] to Run Code", True, COLOR_YELLOW)
+        self.line_surfaces = weakref.WeakKeyDictionary()
+        self.visible_blits = []
+        self.visible_key = None
+        self.cursor_x_offset = 0
+        self.layout_problem()
+
+    def layout_problem(self):
+        layout_key = (self.challenge.problem_text, self.rect.width)
+        if layout_key == self.problem_layout_key:
+            return
+        words = self.challenge.problem_text.split(' ')
+        lines, current_line = [], ""
+        for word in words:
+            if self.font_problem.size(current_line + word)[0] < self.rect.width - 60:
+                current_line += word + " "
+            else:
+                lines.append(current_line)
+                current_line = word + " "
+        lines.append(current_line)
+        self.problem_surfaces = [self.font_problem.render(line, True, COLOR_TEXT) for line in lines]
+        self.problem_layout_key = layout_key
+        # The editor viewport is whatever the problem text leaves above the info line.
+        line_height = self.atlas.height
+        self.editor_rect = pygame.Rect(self.rect.x + 30, self.rect.y + len(lines) * self.font_problem.get_height() + 40,
+                                       self.rect.width - 60, 0)
+        self.editor_rect.height = max(line_height, self.rect.bottom - 50 - self.editor_rect.y)
+        self.visible_line_count = max(1, self.editor_rect.height // line_height)
+
+    def line_surface(self, line, start_state, tokens):
+        cached = self.line_surfaces.get(line)
+        if cached is None or cached[:2] != (line.version, start_state):
+            surface = self.atlas.render([(text, COLOR_SYNTAX.get(kind, COLOR_TEXT)) for kind, text in tokens], COLOR_CHALLENGE_BG)
+            cached = (line.version, start_state, surface)
+            self.line_surfaces[line] = cached
+        return cached[2]
+
+    def update_cursor_offset(self):
+        self.cursor_x_offset = self.atlas.width(self.buffer.line_text(self.line_index)[:self.char_index])
+
+    def scroll_to(self, first_line):
+        max_scroll = max(0, self.buffer.line_count() - self.visible_line_count)
+        self.scroll_line = min(max(0, first_line), max_scroll)
+
+    def scroll_to_cursor(self):
+        if self.line_index < self.scroll_line:
+            self.scroll_to(self.line_index)
+        elif self.line_index >= self.scroll_line + self.visible_line_count:
+            self.scroll_to(self.line_index - self.visible_line_count + 1)
+
     def handle_event(self, event):
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_RETURN and (pygame.key.get_mods() & pygame.KMOD_SHIFT):
-                user_code = "\n".join(self.lines)
-                is_correct = "".join(user_code.split()) == "".join(self.challenge.correct_answer.split())
+        if event.type == pygame.MOUSEWHEEL:
+            self.scroll_to(self.scroll_line - event.y * 3)
+            self.version += 1
+        elif event.type == pygame.KEYDOWN:
+            self.version += 1
+            buffer = self.buffer
+            if event.key == pygame.K_RETURN and (event.mod & pygame.KMOD_SHIFT):
+                is_correct = grade(self.challenge.correct_answer, buffer.text(), self.language)
                 if not is_correct:
                     self.trigger_error_flash()
                 return is_correct
             elif event.key == pygame.K_RETURN:
-                line_after_cursor = self.lines[self.line_index][self.char_index:]
-                self.lines[self.line_index] = self.lines[self.line_index][:self.char_index]
+                self.highlighter.invalidate(self.line_index)
+                buffer.split_line(self.line_index, self.char_index)
                 self.line_index += 1
-                self.lines.insert(self.line_index, line_after_cursor)
                 self.char_index = 0
             elif event.key == pygame.K_BACKSPACE:
-                if self.char_index > 0:
-                    current_line = self.lines[self.line_index]
-                    self.lines[self.line_index] = current_line[:self.char_index-1] + current_line[self.char_index:]
-                    self.char_index -= 1
-                elif self.line_index > 0:
-                    prev_line_len = len(self.lines[self.line_index - 1])
-                    self.lines[self.line_index - 1] += self.lines.pop(self.line_index)
-                    self.line_index -= 1
-                    self.char_index = prev_line_len
+                self.highlighter.invalidate(max(0, self.line_index - 1) if self.char_index == 0 else self.line_index)
+                self.line_index, self.char_index = buffer.delete_before(self.line_index, self.char_index)
             elif event.key == pygame.K_LEFT:
                 if self.char_index > 0: self.char_index -= 1
                 elif self.line_index > 0:
                     self.line_index -= 1
-                    self.char_index = len(self.lines[self.line_index])
+                    self.char_index = buffer.line_length(self.line_index)
             elif event.key == pygame.K_RIGHT:
-                if self.char_index < len(self.lines[self.line_index]): self.char_index += 1
-                elif self.line_index < len(self.lines) - 1:
+                if self.char_index < buffer.line_length(self.line_index): self.char_index += 1
+                elif self.line_index < buffer.line_count() - 1:
                     self.line_index += 1
                     self.char_index = 0
-            elif event.key == pygame.K_UP:
+            elif event.key in (pygame.K_UP, pygame.K_PAGEUP):
+                step = 1 if event.key == pygame.K_UP else self.visible_line_count
                 if self.line_index > 0:
-                    self.line_index -= 1
-                    self.char_index = min(self.char_index, len(self.lines[self.line_index]))
-            elif event.key == pygame.K_DOWN:
-                if self.line_index < len(self.lines) - 1:
-                    self.line_index += 1
-                    self.char_index = min(self.char_index, len(self.lines[self.line_index]))
-            else:
-                current_line = self.lines[self.line_index]
-                self.lines[self.line_index] = current_line[:self.char_index] + event.unicode + current_line[self.char_index:]
-                self.char_index += len(event.unicode)
+                    self.line_index = max(0, self.line_index - step)
+                    self.char_index = min(self.char_index, buffer.line_length(self.line_index))
+            elif event.key in (pygame.K_DOWN, pygame.K_PAGEDOWN):
+                step = 1 if event.key == pygame.K_DOWN else self.visible_line_count
+                if self.line_index < buffer.line_count() - 1:
+                    self.line_index = min(buffer.line_count() - 1, self.line_index + step)
+                    self.char_index = min(self.char_index, buffer.line_length(self.line_index))
+            elif event.unicode:
+                self.highlighter.invalidate(self.line_index)
+                self.line_index, self.char_index = buffer.insert_text(self.line_index, self.char_index, event.unicode)
+            self.update_cursor_offset()
+            self.scroll_to_cursor()
         return None
 
     def trigger_error_flash(self):
         self.show_error = True
-        self.error_timer = pygame.time.get_ticks()
+        self.error_timer = self.clock.now()
 
     def update(self):
-        if self.show_error and pygame.time.get_ticks() - self.error_timer > self.ERROR_FLASH_DURATION:
+        now = self.clock.now()
+        if self.show_error and now - self.error_timer > self.ERROR_FLASH_DURATION:
             self.show_error = False
-        if pygame.time.get_ticks() - self.cursor_timer > self.CURSOR_BLINK_RATE:
+        if now - self.cursor_timer > self.CURSOR_BLINK_RATE:
             self.cursor_visible = not self.cursor_visible
-            self.cursor_timer = pygame.time.get_ticks()
+            self.cursor_timer = now
+
+    def render_state(self):
+        return (self.version, self.cursor_visible, self.show_error)
 
     def draw(self, screen):
         pygame.draw.rect(screen, COLOR_CHALLENGE_BG, self.rect, border_radius=15)
         border_color = COLOR_RED if self.show_error else COLOR_CHALLENGE_BORDER
         pygame.draw.rect(screen, border_color, self.rect, 4, border_radius=15)
         
-        words = self.challenge.problem_text.split(' ')
-        lines, current_line = [], ""
-        for word in words:
-            if self.font_problem.size(current_line + word)[0] < self.rect.width - 60:
-                current_line += word + " "
-            else:
-                lines.append(current_line)
-                current_line = word + " "
-        lines.append(current_line)
-
-        y_offset = 0
-        for i, line in enumerate(lines):
-            text_surface = self.font_problem.render(line, True, COLOR_TEXT)
-            screen.blit(text_surface, (self.rect.x + 30, self.rect.y + 30 + i * self.font_problem.get_height()))
-        y_offset = len(lines) * self.font_problem.get_height()
+        self.layout_problem()
+        problem_line_height = self.font_problem.get_height()
+        for i, text_surface in enumerate(self.problem_surfaces):
+            screen.blit(text_surface, (self.rect.x + 30, self.rect.y + 30 + i * problem_line_height))
 
-        info_text = self.font_info.render("Press [Shift+Enter] to Run Code", True, COLOR_YELLOW)
-        screen.blit(info_text, (self.rect.x + 30, self.rect.bottom - 40))
+        screen.blit(self.info_surface, (self.rect.x + 30, self.rect.bottom - 40))
         
-        editor_area_y_start = self.rect.y + y_offset + 40
-        line_height = self.font_editor.get_height()
-        for i, line_text in enumerate(self.lines):
-            line_surface = self.font_editor.render(line_text, True, COLOR_TEXT)
-            screen.blit(line_surface, (self.rect.x + 30, editor_area_y_start + i * line_height))
+        # Only the lines inside the viewport are highlighted, rendered or blitted, however long the buffer is.
+        line_height = self.atlas.height
+        visible_key = (self.buffer.version, self.scroll_line)
+        if self.visible_key != visible_key:
+            visible = self.highlighter.visible(self.buffer.lines, self.scroll_line, self.visible_line_count)
+            self.visible_blits = [(self.line_surface(line, start_state, tokens), (self.editor_rect.x, self.editor_rect.y + i * line_height))
+                                  for i, (line, start_state, tokens) in enumerate(visible)]
+            self.visible_key = visible_key
+        previous_clip = screen.get_clip()
+        screen.set_clip(self.editor_rect.clip(previous_clip) if previous_clip else self.editor_rect)
+        screen.blits(self.visible_blits, False)
+        screen.set_clip(previous_clip)
+
+        line_count = self.buffer.line_count()
+        if line_count > self.visible_line_count:
+            track = pygame.Rect(self.rect.right - 22, self.editor_rect.y, 6, self.editor_rect.height)
+            thumb_height = max(12, track.height * self.visible_line_count // line_count)
+            thumb_y = track.y + (track.height - thumb_height) * self.scroll_line // max(1, line_count - self.visible_line_count)
+            pygame.draw.rect(screen, COLOR_CHALLENGE_BORDER, (track.x, thumb_y, track.width, thumb_height), border_radius=3)
         
-        if self.cursor_visible:
-            line_up_to_cursor = self.lines[self.line_index][:self.char_index]
-            cursor_x_offset = self.font_editor.size(line_up_to_cursor)[0]
-            cursor_pos_x = self.rect.x + 30 + cursor_x_offset
-            cursor_pos_y = editor_area_y_start + self.line_index * line_height
+        if self.cursor_visible and self.scroll_line <= self.line_index < self.scroll_line + self.visible_line_count:
+            cursor_pos_x = self.editor_rect.x + self.cursor_x_offset
+            cursor_pos_y = self.editor_rect.y + (self.line_index - self.scroll_line) * line_height
             cursor_rect = pygame.Rect(cursor_pos_x, cursor_pos_y, 2, line_height)
             pygame.draw.rect(screen, COLOR_TEXT, cursor_rect)
 
 class HUD:
-    def __init__(self, player_stats, quest_manager):
+    def __init__(self, player_stats, quest_manager, clock=None):
         self.player_stats = player_stats
+        self.clock = clock or RealClock()
         self.quest_manager = quest_manager
-        self.font = pygame.font.Font(None, FONT_SIZE_QUEST)
-        self.small_font = pygame.font.Font(None, 24)
+        self.font = get_font(FONT_SIZE_QUEST)
+        self.small_font = get_font(24)
         self.LEVEL_UP_FLASH_DURATION = 1000
+        self.rect = pygame.Rect(20, 20, 300, 120)
+        # Pre-composited layers, one per level text color, rebuilt only when the stats or objective change.
+        self.layers = {}
+        self.layer_key = None
 
-    def draw(self, screen):
-        hud_surface = pygame.Surface((300, 120), pygame.SRCALPHA)
-        hud_surface.fill(COLOR_UI_BG)
-        level_text_str = f"Level: {self.player_stats['level']}"
-        level_color = COLOR_WHITE
+    def get_level_color(self):
         if self.player_stats['level_up_active']:
-            if pygame.time.get_ticks() - self.player_stats['level_up_timer'] < self.LEVEL_UP_FLASH_DURATION:
-                if (pygame.time.get_ticks() // 200) % 2 == 0: level_color = COLOR_GOLD
+            now = self.clock.now()
+            if now - self.player_stats['level_up_timer'] < self.LEVEL_UP_FLASH_DURATION:
+                if (now // 200) % 2 == 0: return COLOR_GOLD
             else: self.player_stats['level_up_active'] = False
-        level_text = self.font.render(level_text_str, True, level_color)
+        return COLOR_WHITE
+
+    def render_state(self):
+        return (self.player_stats.version, self.quest_manager.current_challenge_index, self.get_level_color())
+
+    def build_layer(self, level_color):
+        hud_surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        hud_surface.fill(COLOR_UI_BG)
+        level_text = self.font.render(f"Level: {self.player_stats['level']}", True, level_color)
         hud_surface.blit(level_text, (10, 5))
         xp_text = self.small_font.render(f"XP: {self.player_stats['xp']} / {self.player_stats['next_level_xp']}", True, COLOR_WHITE)
         hud_surface.blit(xp_text, (10, 45))
@@ -198,16 +287,27 @@ class HUD:
         quest_text_str = f"Objective: {current_challenge.quest_name}" if current_challenge else "Kingdom Cleared!"
         quest_text = self.small_font.render(quest_text_str, True, COLOR_WHITE)
         hud_surface.blit(quest_text, (10, 95))
-        screen.blit(hud_surface, (20, 20))
+        return hud_surface
+
+    def refresh_layers(self):
+        layer_key = (self.player_stats.version, self.quest_manager.current_challenge_index)
+        if layer_key != self.layer_key:
+            self.layers = {color: self.build_layer(color) for color in (COLOR_WHITE, COLOR_GOLD)}
+            self.layer_key = layer_key
+
+    def draw(self, screen):
+        self.refresh_layers()
+        screen.blit(self.layers[self.get_level_color()], self.rect)
 
 # --- Game Sprites ---
 class Player(pygame.sprite.Sprite):
-    def __init__(self, animations, pos):
+    def __init__(self, animations, pos, controls=None):
         super().__init__()
+        self.controls = controls or LiveInput()
         self.animations = animations
         self.status = 'idle'
         self.current_frame = 0
-        self.image = self.animations[self.status][self.current_frame]
+        self.image = self.animations.frame(self.status, self.current_frame)
         self.rect = self.image.get_rect(midbottom=pos)
         self.pos = pygame.math.Vector2(self.rect.midbottom)
         self.direction = pygame.math.Vector2(0, 0)
@@ -221,7 +321,7 @@ class Player(pygame.sprite.Sprite):
         self.rect.midbottom = self.pos
 
     def get_input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.controls.pressed()
         self.direction.x = (keys[pygame.K_RIGHT] or keys[pygame.K_d]) - (keys[pygame.K_LEFT] or keys[pygame.K_a])
         self.direction.y = (keys[pygame.K_DOWN] or keys[pygame.K_s]) - (keys[pygame.K_UP] or keys[pygame.K_w])
         if self.direction.x > 0: self.facing_right = True
@@ -232,10 +332,8 @@ class Player(pygame.sprite.Sprite):
         self.animation_timer += dt
         if self.animation_timer >= self.animation_speed:
             self.animation_timer = 0
-            animation_frames = self.animations[self.status]
-            self.current_frame = (self.current_frame + 1) % len(animation_frames)
-            new_image = animation_frames[self.current_frame]
-            self.image = pygame.transform.flip(new_image, not self.facing_right, False)
+            self.current_frame = (self.current_frame + 1) % self.animations.frame_count(self.status)
+            self.image = self.animations.frame(self.status, self.current_frame, self.facing_right)
 
     def move(self):
         if self.direction.length() > 0: self.direction.normalize_ip()
@@ -248,8 +346,9 @@ class Player(pygame.sprite.Sprite):
         self.move()
 
 class Boss(pygame.sprite.Sprite):
-    def __init__(self, pos, image):
+    def __init__(self, pos, image, clock=None):
         super().__init__()
+        self.clock = clock or RealClock()
         self.original_image = image
         self.image = image
         self.rect = self.image.get_rect(midbottom=pos)
@@ -269,271 +368,590 @@ class Boss(pygame.sprite.Sprite):
 
     def get_hit(self):
         self.is_hit = True
-        self.hit_timer = pygame.time.get_ticks()
+        self.hit_timer = self.clock.now()
 
     def update(self):
         if self.is_hit:
-            if pygame.time.get_ticks() - self.hit_timer < self.HIT_SHAKE_DURATION:
-                self.rect.centerx = self.pos[0] + (pygame.time.get_ticks() % 100 // 25 - 2) * 5
+            now = self.clock.now()
+            if now - self.hit_timer < self.HIT_SHAKE_DURATION:
+                self.rect.centerx = self.pos[0] + (now % 100 // 25 - 2) * 5
             else:
                 self.is_hit = False
                 self.rect.midbottom = self.pos
 
-class Weapon(pygame.sprite.Sprite):
-    def __init__(self, pos, image, target_pos):
-        super().__init__()
-        self.image = image
-        self.rect = self.image.get_rect(center=pos)
-        self.pos = pygame.math.Vector2(self.rect.center)
-        direction = pygame.math.Vector2(target_pos) - self.pos
-        if direction.length() > 0:
-            self.velocity = direction.normalize() * 15
-        else:
-            self.velocity = pygame.math.Vector2(0,0)
-    
-    def update(self):
-        self.pos += self.velocity
-        self.rect.center = self.pos
-        if not pygame.display.get_surface().get_rect().colliderect(self.rect):
-            self.kill()
-
 class MapIcon(pygame.sprite.Sprite):
     def __init__(self, pos, image):
         super().__init__()
         self.image = image
         self.rect = self.image.get_rect(center=pos)
 
+# --- Animation Banks ---
+class AnimationBank:
+    # Every frame pre-flipped for both facings, plus scaled variants built on first request.
+    # One bank is shared by every sprite that uses the animation, so advancing a frame is just an index lookup.
+    def __init__(self, animations):
+        self.frames = {}
+        flipped = {}
+        for anim_type, frames in animations.items():
+            if id(frames) not in flipped:
+                flipped[id(frames)] = [pygame.transform.flip(frame, True, False) for frame in frames]
+            self.frames[(anim_type, True)] = frames
+            self.frames[(anim_type, False)] = flipped[id(frames)]
+        self.scaled_frames = {}
+
+    def frame_count(self, anim_type):
+        return len(self.frames[(anim_type, True)])
+
+    def frame(self, anim_type, index, facing_right=True):
+        return self.frames[(anim_type, facing_right)][index]
+
+    def scaled(self, anim_type, index, size, facing_right=True):
+        key = (anim_type, index, tuple(size), facing_right)
+        if key not in self.scaled_frames:
+            self.scaled_frames[key] = pygame.transform.scale(self.frame(anim_type, index, facing_right), size)
+        return self.scaled_frames[key]
+
+    def surfaces(self):
+        # Distinct surfaces only: animation types may share a frame list (e.g. walk falling back to idle).
+        unique = {}
+        for frames in list(self.frames.values()) + [list(self.scaled_frames.values())]:
+            for frame in frames:
+                unique[id(frame)] = frame
+        return list(unique.values())
+
 # --- Asset Loading ---
-def load_all_animations(base_path, screen_height):
-    animations = {}
-    sprite_height = int(screen_height * 0.2)
-    if not os.path.exists(base_path) or not os.listdir(base_path):
-        placeholder = pygame.Surface((int(sprite_height * 0.75), sprite_height), pygame.SRCALPHA)
-        placeholder.fill((255, 105, 180))
-        return {'idle': [placeholder], 'walk': [placeholder]}
-    
+def asset_manifest(width, height):
+    # (name, path, size, fallback color) for every image, and (name, frames dir, sprite height) for animations.
+    boss_size = (int(width * 0.15), int(height * 0.25))
+    images = [
+        ("splash", "frontpage.png", (width, height), (20, 20, 40)),
+        ("map", "bg.png", (width, height), (20, 20, 40)),
+        ("python_level_bg", "plains.jpg", (width, height), (118, 184, 82)),
+        ("cpp_level_bg", "castleswwwapizo.jpg", (width, height), (135, 135, 135)),
+        ("c_level_bg", "canyon.jpeg", (width, height), (184, 118, 82)),
+        ("weapon", "weapon.png", (60, 60), "cyan"),
+        ("hint_icon", "hint_icon.png", (50, 50), (148, 0, 211)),
+        ("python_boss", "brrbrrpatapim.png", boss_size, "green"),
+        ("cpp_boss", "boss.png", boss_size, "red"),
+        ("c_boss", "bull boss.png", boss_size, "gray"),
+    ]
+    animations = [("player", "frames", int(height * 0.2))]
+    return images, animations
+
+def list_animation_frames(base_path):
+    frames = {}
     for anim_type in os.listdir(base_path):
         anim_path = os.path.join(base_path, anim_type)
         if os.path.isdir(anim_path):
-            frames = []
-            for filename in sorted(os.listdir(anim_path)):
-                if filename.endswith(".png"):
-                    try:
-                        image_path = os.path.join(anim_path, filename)
-                        image = pygame.image.load(image_path).convert_alpha()
-                        aspect_ratio = image.get_width() / image.get_height()
-                        sprite_width = int(sprite_height * aspect_ratio)
-                        image = pygame.transform.scale(image, (sprite_width, sprite_height))
-                        frames.append(image)
-                    except pygame.error as e:
-                        print(f"Could not load image {filename}: {e}")
-            if frames: animations[anim_type] = frames
-    
+            frames[anim_type] = [os.path.join(anim_path, filename) for filename in sorted(os.listdir(anim_path)) if filename.endswith(".png")]
+    return frames
+
+def decode_image(path, size=None, height=None):
+    # Safe to run on a loader thread: decoding and scaling only, no display-dependent calls.
+    return asset_cache.load_scaled(path, size, height)
+
+def load_all_animations(frame_jobs, sprite_height):
+    if frame_jobs is None:
+        placeholder = pygame.Surface((int(sprite_height * 0.75), sprite_height), pygame.SRCALPHA)
+        placeholder.fill((255, 105, 180))
+        return AnimationBank({'idle': [placeholder], 'walk': [placeholder]})
+
+    animations = {}
+    for anim_type, jobs in frame_jobs.items():
+        frames = []
+        for filename, future in jobs:
+            try:
+                frames.append(future.result().convert_alpha())
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"Could not load image {filename}: {e}")
+        if frames: animations[anim_type] = frames
+
     if 'idle' not in animations: animations['idle'] = [pygame.Surface((1,1), pygame.SRCALPHA)]
     if 'walk' not in animations: animations['walk'] = animations['idle']
-    return animations
+    return AnimationBank(animations)
+
+def asset_bytes(asset):
+    if isinstance(asset, pygame.Surface):
+        return asset.get_width() * asset.get_height() * asset.get_bytesize()
+    return sum(asset_bytes(frame) for frame in asset.surfaces())
+
+class AssetManager:
+    # Decodes and scales on a thread pool; convert_alpha() and fallbacks run on the main thread.
+    # Registered images are kept resident under a byte budget: the least-recently-used ones that aren't pinned
+    # get evicted and are simply reloaded (from the on-disk cache) the next time they're needed.
+    def __init__(self, budget_bytes=ASSET_MEMORY_BUDGET_MB * 1024 * 1024, max_workers=ASSET_LOADER_THREADS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="assets")
+        self.budget_bytes = budget_bytes
+        self.sources = {}
+        self.jobs = {}
+        self.assets = OrderedDict()
+        self.sizes = {}
+        self.pinned = set()
+
+    def register(self, name, path, size, fallback_color):
+        self.sources[name] = (path, size, fallback_color)
+
+    def load(self, name):
+        if name in self.assets or name in self.jobs:
+            return
+        path, size, fallback_color = self.sources[name]
+        future = self.executor.submit(decode_image, path, size)
+        self.jobs[name] = ([future], lambda: self.finish_image(future, size, fallback_color))
+
+    def prefetch(self, names):
+        for name in names:
+            self.load(name)
+
+    def finish_image(self, future, size, fallback_color):
+        try:
+            return future.result().convert_alpha()
+        except (pygame.error, FileNotFoundError):
+            surface = pygame.Surface(size)
+            surface.fill(fallback_color)
+            return surface
+
+    def animations(self, name, base_path, sprite_height):
+        frame_jobs = None
+        if os.path.exists(base_path) and os.listdir(base_path):
+            frame_jobs = {anim_type: [(os.path.basename(path), self.executor.submit(decode_image, path, height=sprite_height)) for path in paths]
+                          for anim_type, paths in list_animation_frames(base_path).items()}
+        futures = [future for jobs in (frame_jobs or {}).values() for _, future in jobs]
+        self.jobs[name] = (futures, lambda: load_all_animations(frame_jobs, sprite_height))
+
+    def poll(self):
+        # Finishes every job whose decodes are done; returns True once nothing is pending.
+        for name, (futures, finish) in list(self.jobs.items()):
+            if all(future.done() for future in futures):
+                del self.jobs[name]
+                self.add(name, finish())
+        return not self.jobs
+
+    def add(self, name, asset):
+        self.assets[name] = asset
+        self.assets.move_to_end(name)
+        self.sizes[name] = asset_bytes(asset)
+        self.evict(keep=name)
+
+    def pin(self, names):
+        self.pinned = set(names)
+        self.evict()
+
+    def evict(self, keep=None):
+        # `keep` is the asset just added: when the pinned set alone is over budget it would otherwise go first.
+        resident = self.resident_bytes()
+        for name in list(self.assets):
+            if resident <= self.budget_bytes:
+                break
+            # Only registered images can be reloaded, so anything else stays resident.
+            if name in self.pinned or name not in self.sources or name == keep:
+                continue
+            del self.assets[name]
+            resident -= self.sizes.pop(name)
+
+    def resident_bytes(self):
+        return sum(self.sizes.values())
+
+    def report(self):
+        return f"{self.resident_bytes() / (1024 * 1024):.1f} MB resident in {len(self.assets)} assets (budget {self.budget_bytes / (1024 * 1024):.0f} MB)"
+
+    def __getitem__(self, name):
+        if name not in self.assets:
+            self.load(name)
+            futures, finish = self.jobs.pop(name)
+            asset = finish()
+            self.add(name, asset)
+            return asset
+        self.assets.move_to_end(name)
+        return self.assets[name]
+
+def next_kingdom(kingdoms, kingdom_progress, after=None):
+    # The likely next kingdom: the first uncleared one after `after`, in map order.
+    names = list(kingdoms)
+    start = names.index(after) + 1 if after in kingdoms else 0
+    for name in names[start:] + names[:start]:
+        if not kingdom_progress[name] and name != after:
+            return name
+    return None
+
+# --- Game State Machine ---
+SHARED_ASSETS = ("player", "weapon", "hint_icon")
+
+class Game:
+    # splash -> world_map -> level -> challenge -> battle -> ... -> gameover. Time comes only from `clock` and input
+    # only from `controls`, so headless.py can step the same logic from a script without a window or real time.
+    BATTLE_DURATIONS = {'forging': 500, 'attacking': 1000, 'impact': 300, 'victory': 1500}
+    WEAPON, SPARK = 0, 1  # particle kinds
+
+    def __init__(self, screen, assets, clock, controls, assistant, curriculum, renderer=None, log=print, profiler=NULL_PROFILER, save=None, leaderboard=None):
+        self.screen = screen
+        self.width, self.height = screen.get_size()
+        self.assets = assets
+        self.clock = clock
+        self.controls = controls
+        self.assistant = assistant
+        self.curriculum = curriculum
+        self.renderer = renderer
+        self.log = log
+        self.profiler = profiler
+        self.save = save
+        self.leaderboard = leaderboard
+        width, height = self.width, self.height
+
+        # --- Kingdom Data ---
+        # Only kingdom metadata is read here; each kingdom's challenges are paged in from the store on entry.
+        self.kingdoms = {}
+        for name, data in curriculum.kingdoms().items():
+            x, y, w, h = data["map_rect"]
+            self.kingdoms[name] = dict(data, map_rect=pygame.Rect(width * x, height * y, width * w, height * h),
+                                       boss_map_pos=(width * data["boss_map_pos"][0], height * data["boss_map_pos"][1]))
+        # Quest order, XP and kingdom completion are the session's; Game plays its results out on screen.
+        self.session = LearningSession(curriculum, self.kingdoms, CHALLENGE_DIFFICULTY)
+        # World-map clicks look up the kingdom under the cursor in a grid instead of testing every map_rect.
+        self.map_regions = SpatialHash()
+        for name, data in self.kingdoms.items():
+            self.map_regions.insert(name, data["map_rect"])
+        self.kingdom_assets = {name: (data["level_bg_asset"], data["boss_asset"]) for name, data in self.kingdoms.items()}
+
+        # --- Player and Global State ---
+        player_animations = assets["player"]
+        self.weapon_img, self.hint_icon_img = assets["weapon"], assets["hint_icon"]
+        if save:
+            self.player_stats.update(save.state["player_stats"])
+            self.kingdom_progress.update({name: True for name in save.state["kingdom_progress"] if name in self.kingdoms})
+            # Saves written before the last victory also cleared its kingdom can hold a finished kingdom that was
+            # never marked complete; entering it would leave no boss to fight.
+            for name, completed in list(save.state["quests_completed"].items()):
+                if name in self.kingdoms and completed >= curriculum.count(name, CHALLENGE_DIFFICULTY):
+                    self.kingdom_progress[name] = True
+                    self.record_save(save.record_kingdom_complete, name)
+        self.player = Player(player_animations, (0, 0), controls)
+        self.boss = Boss((0, 0), assets["cpp_boss"], clock)
+        self.player_group = pygame.sprite.GroupSingle(self.player)
+        self.boss_group = SpatialGroup(self.boss)
+        # Thrown weapons and hit sparks share one preallocated pool, culled against the screen rect.
+        spark = pygame.Surface((8, 8), pygame.SRCALPHA)
+        pygame.draw.circle(spark, COLOR_GOLD, (4, 4), 4)
+        self.particles = ParticlePool([ParticleKind(self.weapon_img), ParticleKind(spark, gravity=0.3, drag=0.95, life=40)],
+                                      screen.get_rect())
+
+        map_icon_size = (80, 80)
+        self.map_player_icon = MapIcon((width * 0.9, height * 0.9), player_animations.scaled('idle', 0, map_icon_size))
+        self.map_boss_icons = pygame.sprite.Group([MapIcon(data["boss_map_pos"], pygame.transform.scale(assets[data["boss_asset"]], map_icon_size)) for data in self.kingdoms.values()])
+
+        self.hud, self.challenge_box, self.current_kingdom_key = None, None, None
+        self.hint_button_rect = None
+
+        big_font = get_font(FONT_SIZE_LARGE)
+        medium_font = get_font(FONT_SIZE_MEDIUM)
+        self.victory_text = big_font.render("VICTORY!", True, COLOR_GOLD)
+        self.forging_text = medium_font.render("Forging Weapon...", True, COLOR_YELLOW)
+        self.success_text = big_font.render("SUCCESS!", True, COLOR_GOLD)
+        self.restart_text = get_font(FONT_SIZE_QUEST).render("Press R to start a new game", True, COLOR_TEXT)
+        self.center_rects = {text: text.get_rect(center=(width/2, height/2)) for text in (self.victory_text, self.forging_text, self.success_text)}
+        self.center_rects[self.restart_text] = self.restart_text.get_rect(midtop=(width/2, self.center_rects[self.victory_text].bottom + 20))
+
+        self.game_state, self.battle_stage, self.battle_timer, self.battle_result = 'splash', 'forging', 0, None
+        self.running = True
+        upcoming_kingdom = next_kingdom(self.kingdoms, self.kingdom_progress)
+        if upcoming_kingdom: assets.prefetch(self.kingdom_assets[upcoming_kingdom])
+
+    @property
+    def player_stats(self):
+        return self.session.player_stats
+
+    @property
+    def kingdom_progress(self):
+        return self.session.kingdom_progress
+
+    @property
+    def quest_manager(self):
+        return self.session.quest_manager
+
+    def to_canvas(self, pos):
+        return self.renderer.to_canvas(pos) if self.renderer else pos
+
+    def step(self):
+        # One frame of input and game logic; drawing is separate so headless runs can skip it.
+        profiler = self.profiler
+        with profiler.phase("tick"):
+            dt = self.clock.tick(60)
+        with profiler.phase("events"):
+            events = self.controls.events()
+            mouse_pos = self.to_canvas(self.controls.mouse_pos())
+            for event in events:
+                if profiler.handle_event(event): continue
+                if self.renderer: self.renderer.handle_event(event)
+                self.handle_event(event, mouse_pos)
+        with profiler.phase(f"update:{self.game_state}"):
+            self.update(dt)
+        profiler.gauge("player", len(self.player_group))
+        profiler.gauge("boss", len(self.boss_group))
+        profiler.gauge("particles", len(self.particles))
+        profiler.gauge("map_icons", len(self.map_boss_icons))
+
+    def handle_event(self, event, mouse_pos):
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            self.running = False
+
+        if self.game_state == 'splash' and (event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN):
+            # A save with every kingdom cleared goes straight to the victory screen, which offers a new game.
+            self.game_state = 'gameover' if all(self.kingdom_progress.values()) else 'world_map'
+            self.assets.pin(SHARED_ASSETS + ("map",))
+
+        elif self.game_state == 'gameover' and event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+            self.new_game()
+
+        elif self.game_state == 'world_map' and event.type == pygame.MOUSEBUTTONDOWN:
+            for key in self.map_regions.query_point(mouse_pos):
+                if not self.kingdom_progress[key]:
+                    self.enter_kingdom(key)
+                    break
+
+        elif self.game_state == 'challenge':
+            if event.type == pygame.MOUSEBUTTONDOWN and self.hint_button_rect and self.hint_button_rect.collidepoint(self.to_canvas(event.pos)):
+                current_challenge = self.quest_manager.get_current_challenge()
+                prompt = f"I need a hint for this problem: \"{current_challenge.problem_text}\"."
+                self.assistant.ask(prompt, current_challenge.problem_text, HINT_DIFFICULTY)
+
+            if self.challenge_box:
+                is_correct = self.challenge_box.handle_event(event)
+                if is_correct is True:
+                    self.assistant.hide()
+                    self.game_state = 'battle'
+                    self.battle_stage = 'forging'
+                    self.battle_timer = self.clock.now()
+
+    def record_save(self, record, *args):
+        # A failed save writer ends saving for this run, not the game.
+        try:
+            record(*args)
+        except OSError as e:
+            print(e)
+            self.save = None
+
+    def new_game(self):
+        self.session.reset()
+        if self.save: self.record_save(self.save.record_reset)
+        self.game_state = 'world_map'
+        self.assets.prefetch(self.kingdom_assets[next_kingdom(self.kingdoms, self.kingdom_progress)])
+
+    def enter_kingdom(self, key):
+        data = self.kingdoms[key]
+        self.current_kingdom_key = key
+        completed = self.save.state["quests_completed"].get(key, 0) if self.save else 0
+        self.session.enter(key, completed)
+        self.hud = HUD(self.player_stats, self.quest_manager, self.clock)
+        self.player.set_pos((self.width * 0.1, self.height * 0.8))
+        self.boss.set_pos((self.width * 0.9, self.height * 0.8))
+        self.assets.pin(SHARED_ASSETS + self.kingdom_assets[key])
+        self.boss.set_image(self.assets[data["boss_asset"]])
+        self.boss_group.reindex()
+        upcoming_kingdom = next_kingdom(self.kingdoms, self.kingdom_progress, after=key)
+        if upcoming_kingdom: self.assets.prefetch(self.kingdom_assets[upcoming_kingdom])
+        if self.log: self.log(f"Entering {key}: {self.assets.report()}")
+        self.game_state = 'level'
 
-def load_image(path, size, fallback_color):
-    try:
-        return pygame.transform.scale(pygame.image.load(path).convert_alpha(), size)
-    except pygame.error:
-        surface = pygame.Surface(size)
-        surface.fill(fallback_color)
-        return surface
+    def update(self, dt):
+        with self.profiler.phase("assistant"):
+            self.assistant.health_check(self.clock.now())
+        with self.profiler.phase("assets"):
+            self.assets.poll()
+        if self.game_state == 'level':
+            self.player_group.update(dt)
+            if self.boss_group.collide(self.player) and not self.quest_manager.all_quests_complete():
+                self.game_state = 'challenge'
+                current_challenge = self.quest_manager.get_current_challenge()
+                dialog_w, dialog_h = self.width * 0.8, self.height * 0.6
+                self.challenge_box = CodeEditorBox((self.width - dialog_w) / 2, (self.height - dialog_h) / 2, dialog_w, dialog_h, current_challenge,
+                                                   self.kingdoms[self.current_kingdom_key]["language"], self.clock)
+                # <<< FIX: Calculate the button's rect as soon as the challenge box is created.
+                self.hint_button_rect = self.hint_icon_img.get_rect(topright=(self.challenge_box.rect.right - 15, self.challenge_box.rect.top + 15))
+
+        elif self.game_state == 'challenge' and self.challenge_box:
+            self.challenge_box.update()
+
+        elif self.game_state == 'battle':
+            self.update_battle()
+
+    def update_battle(self):
+        player_stats, boss = self.player_stats, self.boss
+        self.boss_group.update()
+        self.particles.update()
+        current_time = self.clock.now()
+
+        if self.battle_stage == 'forging' and current_time - self.battle_timer > self.BATTLE_DURATIONS['forging']:
+            self.particles.fire(self.WEAPON, self.player.rect.center, boss.rect.center, 15)
+            self.battle_stage = 'attacking'
+            self.battle_timer = current_time
+        elif self.battle_stage == 'attacking' and (not self.particles.count(self.WEAPON) or current_time - self.battle_timer > self.BATTLE_DURATIONS['attacking']):
+            self.battle_stage = 'impact'
+            self.battle_timer = current_time
+            boss.get_hit()
+            self.particles.clear(self.WEAPON)
+            self.particles.burst(self.SPARK, boss.rect.center, 32, 9)
+        elif self.battle_stage == 'impact' and current_time - self.battle_timer > self.BATTLE_DURATIONS['impact']:
+            self.battle_stage = 'victory'
+            self.battle_timer = current_time
+            self.battle_result = result = self.session.complete_challenge(current_time)
+            if self.save: self.record_save(self.save.record_victory, self.current_kingdom_key, result["quests_completed"],
+                                           player_stats, "kingdom_complete" in result)
+            if self.leaderboard: self.leaderboard.submit(PLAYER_NAME, player_stats['level'], player_stats['xp'])
+        elif self.battle_stage == 'victory' and current_time - self.battle_timer > self.BATTLE_DURATIONS['victory']:
+            if "kingdom_complete" in self.battle_result:
+                self.game_state = 'world_map'
+                self.assets.pin(SHARED_ASSETS + ("map",))
+                upcoming_kingdom = next_kingdom(self.kingdoms, self.kingdom_progress, after=self.current_kingdom_key)
+                if upcoming_kingdom: self.assets.prefetch(self.kingdom_assets[upcoming_kingdom])
+                if self.battle_result["game_complete"]: self.game_state = 'gameover'
+            else:
+                self.game_state = 'level'
+
+    def draw(self):
+        with self.profiler.phase("draw"):
+            self.draw_frame()
+        with self.profiler.phase("present"):
+            self.renderer.present()
+
+    def draw_frame(self):
+        renderer, screen, assets, game_state, profiler = self.renderer, self.screen, self.assets, self.game_state, self.profiler
+        renderer.begin_frame((game_state, self.current_kingdom_key))
+        if game_state in ['level', 'challenge', 'battle']:
+            renderer.track('player', self.player.rect, self.player.image)
+            renderer.track('boss', self.boss.rect, self.boss.image)
+            if self.hud: renderer.track('hud', self.hud.rect, self.hud.render_state())
+            if game_state == 'challenge':
+                renderer.track('challenge_box', self.challenge_box.rect, self.challenge_box.render_state())
+            elif game_state == 'battle':
+                particles_rect = self.particles.bounding_rect()
+                if particles_rect: renderer.track('particles', particles_rect)
+                if self.battle_stage == 'forging': renderer.track('battle_text', self.center_rects[self.forging_text])
+                elif self.battle_stage == 'victory': renderer.track('battle_text', self.center_rects[self.success_text])
+        # The overlay changes every frame, so its area is repainted and redrawn every frame while it is shown.
+        if profiler.overlay_visible: renderer.track('profiler', profiler.overlay_rect(screen), profiler.frame_index)
+
+        clip_rect = renderer.get_clip()
+        if clip_rect:
+            screen.set_clip(clip_rect)
+            screen.fill(COLOR_BG)
+            if game_state == 'splash':
+                screen.blit(assets["splash"], (0, 0))
+            elif game_state == 'world_map':
+                screen.blit(assets["map"], (0, 0))
+                self.map_boss_icons.draw(screen)
+                screen.blit(self.map_player_icon.image, self.map_player_icon.rect)
+            elif game_state == 'gameover':
+                screen.blit(assets["map"], (0, 0))
+                screen.blit(self.victory_text, self.center_rects[self.victory_text])
+                screen.blit(self.restart_text, self.center_rects[self.restart_text])
+            elif game_state in ['level', 'challenge', 'battle']:
+                screen.blit(assets[self.kingdoms[self.current_kingdom_key]['level_bg_asset']], (0, 0))
+                self.player_group.draw(screen)
+                self.boss_group.draw(screen)
+                if self.hud: self.hud.draw(screen)
+                if game_state == 'challenge':
+                    self.challenge_box.draw(screen)
+                    # <<< FIX: Now we just draw the button; its rect is already calculated.
+                    if self.hint_button_rect:
+                        screen.blit(self.hint_icon_img, self.hint_button_rect)
+                elif game_state == 'battle':
+                    self.particles.draw(screen)
+                    if self.battle_stage == 'forging':
+                        screen.blit(self.forging_text, self.center_rects[self.forging_text])
+                    elif self.battle_stage == 'victory':
+                        screen.blit(self.success_text, self.center_rects[self.success_text])
+            screen.set_clip(None)
+            if profiler.overlay_visible: profiler.draw_overlay(screen)
+
+STARTUP_ASSETS = ("map", "weapon", "hint_icon", "python_boss", "cpp_boss", "c_boss")
+
+def create_assets(width, height):
+    # Registers every image in the manifest; returns the manager and the animations still to be queued.
+    assets = AssetManager()
+    images, animations = asset_manifest(width, height)
+    for name, path, size, fallback_color in images:
+        assets.register(name, path, size, fallback_color)
+    return assets, animations
+
+def queue_startup_assets(assets, animations):
+    assets.prefetch(STARTUP_ASSETS)
+    for name, base_path, sprite_height in animations:
+        assets.animations(name, base_path, sprite_height)
 
-# --- Main Game Function ---
 async def main():
     pygame.init()
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    # Created before anything loads, so the instrumented font and surface classes see every allocation.
+    profiler = Profiler() if PROFILE else NULL_PROFILER
+    display = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    renderer = Renderer(display, USE_DIRTY_RECTS, RENDER_RESOLUTION, RENDER_FILTER == "smooth")
+    pygame.key.set_repeat(*EDITOR_KEY_REPEAT)
+    screen = renderer.screen
     global WIDTH, HEIGHT
     WIDTH, HEIGHT = screen.get_size()
     pygame.display.set_caption("Code Kingdoms")
-    clock = pygame.time.Clock()
+    clock = RealClock()
 
     # --- Load assets ---
-    splash_image = load_image("frontpage.png", (WIDTH, HEIGHT), (20, 20, 40))
-    map_image = load_image("bg.png", (WIDTH, HEIGHT), (20, 20, 40))
-    python_level_bg = load_image("plains.jpg", (WIDTH, HEIGHT), (118, 184, 82))
-    cpp_level_bg = load_image("castleswwwapizo.jpg", (WIDTH, HEIGHT), (135, 135, 135))
-    c_level_bg = load_image("canyon.jpeg", (WIDTH, HEIGHT), (184, 118, 82))
-    player_animations = load_all_animations("frames", HEIGHT)
-    weapon_img = load_image("weapon.png", (60, 60), "cyan")
-    hint_icon_img = load_image("hint_icon.png", (50, 50), (148, 0, 211))
-
-    boss_size = (int(WIDTH * 0.15), int(HEIGHT * 0.25))
-    python_boss_img = load_image("brrbrrpatapim.png", boss_size, "green")
-    cpp_boss_img = load_image("boss.png", boss_size, "red")
-    c_boss_img = load_image("bull boss.png", boss_size, "gray")
-
-    # --- Kingdom Data ---
-    python_curriculum = [
-        Challenge("Learn Variables", "A variable 'score' needs to be set to 0.", "score=0", 50),
-        Challenge("Learn Basic Math", "Increase 'score' by 10 (using shorthand).", "score+=10", 50),
-        Challenge("Multi-line Code", "If age is 18 or over, print 'adult'.", "ifage>=18:print('adult')", 100),
-    ]
-    c_plus_plus_curriculum = [
-        Challenge("C++ Variables", "Declare an integer 'health' and set it to 100.", "inthealth=100;", 75),
-        Challenge("C++ Output", "Print 'Hello, Castle!' to the console.", "std::cout<<\"Hello,Castle!\";", 75),
-    ]
-    c_curriculum = [
-        Challenge("C Pointers", "Declare an integer pointer named 'ptr'.", "int*ptr;", 100),
-        Challenge("C Memory", "Allocate memory for 10 integers.", "malloc(10*sizeof(int))", 100),
-    ]
-    kingdoms = {
-        "Python": {"curriculum": python_curriculum, "map_rect": pygame.Rect(WIDTH*0.05, HEIGHT*0.1, WIDTH*0.4, HEIGHT*0.4), "boss_img": python_boss_img, "boss_map_pos": (WIDTH*0.25, HEIGHT*0.3), "level_bg": python_level_bg},
-        "C++": {"curriculum": c_plus_plus_curriculum, "map_rect": pygame.Rect(WIDTH*0.55, HEIGHT*0.05, WIDTH*0.4, HEIGHT*0.5), "boss_img": cpp_boss_img, "boss_map_pos": (WIDTH*0.75, HEIGHT*0.25), "level_bg": cpp_level_bg},
-        "C": {"curriculum": c_curriculum, "map_rect": pygame.Rect(WIDTH*0.05, HEIGHT*0.6, WIDTH*0.4, HEIGHT*0.35), "boss_img": c_boss_img, "boss_map_pos": (WIDTH*0.25, HEIGHT*0.8), "level_bg": c_level_bg},
-    }
-    kingdom_progress = {name: False for name in kingdoms}
-
-    # --- Player and Global State ---
-    player_stats = {'level': 1, 'xp': 0, 'next_level_xp': 100, 'level_up_active': False, 'level_up_timer': 0}
-    player = Player(player_animations, (0, 0))
-    boss = Boss((0, 0), cpp_boss_img)
-    player_group = pygame.sprite.GroupSingle(player)
-    boss_group = pygame.sprite.GroupSingle(boss)
-    weapon_group = pygame.sprite.Group()
-
-    map_icon_size = (80, 80)
-    map_player_icon = MapIcon((WIDTH * 0.9, HEIGHT * 0.9), pygame.transform.scale(player.image, map_icon_size))
-    map_boss_icons = pygame.sprite.Group([MapIcon(data["boss_map_pos"], pygame.transform.scale(data["boss_img"], map_icon_size)) for data in kingdoms.values()])
-    
-    quest_manager, hud, challenge_box, current_kingdom_key = None, None, None, None
-    chatbot_process, hint_button_rect = None, None
-
-    big_font = pygame.font.Font(None, FONT_SIZE_LARGE)
-    medium_font = pygame.font.Font(None, FONT_SIZE_MEDIUM)
-
-    game_state, battle_stage, battle_timer = 'splash', 'forging', 0
-    BATTLE_DURATIONS = {'forging': 500, 'attacking': 1000, 'impact': 300, 'victory': 1500}
+    # The splash goes up first; the shared assets decode on a thread pool behind it.
+    # Level backgrounds are loaded per kingdom when it is entered (or prefetched from the world map).
+    assets, animations = create_assets(WIDTH, HEIGHT)
+    assets.pin(SHARED_ASSETS + ("splash",))
+    screen.blit(assets["splash"], (0, 0))
+    renderer.present()
+    first_frame_duration = time.perf_counter() - STARTUP_TIME
+
+    queue_startup_assets(assets, animations)
+    # Keep the window responsive while loading; other input stays queued for the main loop.
+    with profiler.phase("startup:load assets"):
+        while not assets.poll():
+            pygame.event.pump()
+            if pygame.event.get(pygame.QUIT):
+                pygame.quit()
+                sys.exit()
+            clock.tick(60)
+    assets_ready_duration = time.perf_counter() - STARTUP_TIME
+
+    if STARTUP_BENCHMARK:
+        print(json.dumps({"import_ms": IMPORT_DURATION * 1000, "first_frame_ms": first_frame_duration * 1000,
+                          "assets_ready_ms": assets_ready_duration * 1000, "resident_mb": assets.resident_bytes() / (1024 * 1024)}))
+        pygame.quit()
+        return
+
+    # Pre-warm the AI assistant in the background so the first hint doesn't pay for its startup.
+    assistant = AssistantProcess()
+    with profiler.phase("startup:assistant start"):
+        assistant.start()
+    with profiler.phase("startup:curriculum"):
+        curriculum = CurriculumStore()
+    controls = RecordingInput(LiveInput()) if RECORD_INPUT else LiveInput()
+    save = SaveJournal() if SAVE_PROGRESS else None
+    leaderboard = Leaderboard()
+    server = LeaderboardServer(leaderboard, LEADERBOARD_PORT).start() if LEADERBOARD_PORT else None
+    game = Game(screen, assets, clock, controls, assistant, curriculum, renderer, profiler=profiler, save=save,
+                leaderboard=leaderboard)
 
     # --- Main Loop ---
-    running = True
-    while running:
-        dt = clock.tick(60)
-        mouse_pos = pygame.mouse.get_pos()
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                running = False
-            
-            if game_state == 'splash' and (event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN):
-                game_state = 'world_map'
-            
-            elif game_state == 'world_map' and event.type == pygame.MOUSEBUTTONDOWN:
-                for key, data in kingdoms.items():
-                    if data["map_rect"].collidepoint(mouse_pos) and not kingdom_progress[key]:
-                        current_kingdom_key = key
-                        quest_manager = QuestManager(data["curriculum"])
-                        hud = HUD(player_stats, quest_manager)
-                        player.set_pos((WIDTH * 0.1, HEIGHT * 0.8))
-                        boss.set_pos((WIDTH * 0.9, HEIGHT * 0.8))
-                        boss.set_image(data["boss_img"])
-                        game_state = 'level'
-                        break
-
-            elif game_state == 'challenge':
-                if event.type == pygame.MOUSEBUTTONDOWN and hint_button_rect and hint_button_rect.collidepoint(event.pos):
-                    if chatbot_process is None or not chatbot_process.is_alive():
-                        print("Launching AI Assistant...")
-                        current_challenge = quest_manager.get_current_challenge()
-                        prompt = f"I need a hint for this problem: \"{current_challenge.problem_text}\"."
-                        chatbot_process = multiprocessing.Process(target=run_chatbot_app, args=(prompt,))
-                        chatbot_process.start()
-
-                if challenge_box:
-                    is_correct = challenge_box.handle_event(event)
-                    if is_correct is True:
-                        game_state = 'battle'
-                        battle_stage = 'forging'
-                        battle_timer = pygame.time.get_ticks()
-
-        # --- Update Logic ---
-        if game_state == 'level':
-            player_group.update(dt)
-            if pygame.sprite.spritecollide(player, boss_group, False) and not quest_manager.all_quests_complete():
-                game_state = 'challenge'
-                current_challenge = quest_manager.get_current_challenge()
-                dialog_w, dialog_h = WIDTH * 0.8, HEIGHT * 0.6
-                challenge_box = CodeEditorBox((WIDTH - dialog_w) / 2, (HEIGHT - dialog_h) / 2, dialog_w, dialog_h, current_challenge)
-                # <<< FIX: Calculate the button's rect as soon as the challenge box is created.
-                hint_button_rect = hint_icon_img.get_rect(topright=(challenge_box.rect.right - 15, challenge_box.rect.top + 15))
-        
-        elif game_state == 'challenge' and challenge_box:
-            challenge_box.update()
-        
-        elif game_state == 'battle':
-            boss_group.update()
-            weapon_group.update()
-            current_time = pygame.time.get_ticks()
-
-            if battle_stage == 'forging' and current_time - battle_timer > BATTLE_DURATIONS['forging']:
-                weapon = Weapon(player.rect.center, weapon_img, boss.rect.center)
-                weapon_group.add(weapon)
-                battle_stage = 'attacking'
-                battle_timer = current_time 
-            elif battle_stage == 'attacking' and (not weapon_group or current_time - battle_timer > BATTLE_DURATIONS['attacking']):
-                 battle_stage = 'impact'
-                 battle_timer = current_time
-                 boss.get_hit()
-                 weapon_group.empty()
-            elif battle_stage == 'impact' and current_time - battle_timer > BATTLE_DURATIONS['impact']:
-                battle_stage = 'victory'
-                battle_timer = current_time
-                reward = quest_manager.get_current_challenge().xp_reward
-                player_stats['xp'] += reward
-                if player_stats['xp'] >= player_stats['next_level_xp']:
-                    player_stats['level'] += 1
-                    player_stats['xp'] -= player_stats['next_level_xp']
-                    player_stats['next_level_xp'] = int(player_stats['next_level_xp'] * 1.5)
-                    player_stats['level_up_active'] = True
-                    player_stats['level_up_timer'] = pygame.time.get_ticks()
-                quest_manager.advance_quest()
-            elif battle_stage == 'victory' and current_time - battle_timer > BATTLE_DURATIONS['victory']:
-                if quest_manager.all_quests_complete():
-                    kingdom_progress[current_kingdom_key] = True
-                    game_state = 'world_map'
-                    if all(kingdom_progress.values()): game_state = 'gameover'
-                else:
-                    game_state = 'level'
-
-        # --- Drawing Logic ---
-        screen.fill(COLOR_BG)
-        if game_state == 'splash':
-            screen.blit(splash_image, (0, 0))
-        elif game_state == 'world_map':
-            screen.blit(map_image, (0, 0))
-            map_boss_icons.draw(screen)
-            screen.blit(map_player_icon.image, map_player_icon.rect)
-        elif game_state == 'gameover':
-            screen.blit(map_image, (0, 0))
-            title_text = big_font.render("VICTORY!", True, COLOR_GOLD)
-            screen.blit(title_text, title_text.get_rect(center=(WIDTH/2, HEIGHT/2)))
-        elif game_state in ['level', 'challenge', 'battle']:
-            screen.blit(kingdoms[current_kingdom_key]['level_bg'], (0, 0))
-            player_group.draw(screen)
-            boss_group.draw(screen)
-            if hud: hud.draw(screen)
-            if game_state == 'challenge':
-                challenge_box.draw(screen)
-                # <<< FIX: Now we just draw the button; its rect is already calculated.
-                if hint_button_rect:
-                    screen.blit(hint_icon_img, hint_button_rect)
-            elif game_state == 'battle':
-                weapon_group.draw(screen)
-                if battle_stage == 'forging':
-                    text = medium_font.render("Forging Weapon...", True, COLOR_YELLOW)
-                    screen.blit(text, text.get_rect(center=(WIDTH/2, HEIGHT/2)))
-                elif battle_stage == 'victory':
-                    text = big_font.render("SUCCESS!", True, COLOR_GOLD)
-                    screen.blit(text, text.get_rect(center=(WIDTH/2, HEIGHT/2)))
-
-        pygame.display.flip()
-        await asyncio.sleep(0)
-
-    if chatbot_process and chatbot_process.is_alive():
-        chatbot_process.terminate()
-        chatbot_process.join()
+    while game.running:
+        profiler.begin_frame()
+        game.step()
+        game.draw()
+        with profiler.phase("sleep"):
+            await asyncio.sleep(0)
+        profiler.end_frame()
+
+    if RECORD_INPUT:
+        controls.save(RECORD_INPUT, screen.get_size())
+    if PROFILE and PROFILE_TRACE:
+        profiler.export_trace(PROFILE_TRACE)
+    if save:
+        try:
+            save.close()
+        except OSError as e:
+            print(e)
+    if server:
+        server.shutdown()
+    leaderboard.close()
+    assistant.stop()
+    curriculum.close()
     pygame.quit()
     sys.exit()
 
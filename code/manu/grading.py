@@ -0,0 +1,128 @@
+import ast
+import io
+import json
+import re
+import sys
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from curriculum import CurriculumStore
+
+# --- Headless Answer Grading ---
+# A submission passes if it matches the stored answer once whitespace is stripped (the original rule), or if both
+# reduce to the same canonical form: the AST for Python, else a token stream with comments and layout removed.
+# So `print("adult")` matches `print('adult')` and `int *ptr; // pointer` matches `int* ptr;`.
+# Regrade a class export offline with: python grading.py regrade export.jsonl [workers]
+
+# Longer submissions are only compared whitespace-stripped: canonicalizing pathological input (thousands of nested
+# operators) can exhaust the parser's recursion limit or memory.
+MAX_CANONICAL_LENGTH = 5000
+
+C_TOKEN = re.compile(r"""
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<number>(?:0[xX][0-9a-fA-F]+|\d+\.?\d*(?:[eE][+-]?\d+)?)[uUlLfF]*)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<operator><<=|>>=|->\*?|\+\+|--|<<|>>|<=|>=|==|!=|&&|\|\||::|[-+*/%&|^!=<>]=|\.\.\.|.)
+""", re.VERBOSE | re.DOTALL)
+
+def whitespace_key(code):
+    return "".join(code.split())
+
+def python_tokens(code):
+    # Token text without comments, indentation or newlines; None if the code doesn't tokenize.
+    try:
+        tokens = tokenize.generate_tokens(io.StringIO(code).readline)
+        return tuple(token.string for token in tokens if token.type not in (
+            tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER))
+    except (tokenize.TokenError, IndentationError, SyntaxError, RecursionError, MemoryError):
+        return None
+
+def python_canonical(code):
+    code = code.strip()
+    try:
+        return ("ast", ast.dump(ast.parse(code)))
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        tokens = python_tokens(code)
+        return ("tokens", tokens) if tokens is not None else None
+
+def c_canonical(code):
+    tokens = tuple(match.group() for match in C_TOKEN.finditer(code.strip()) if match.lastgroup != "space")
+    return ("tokens", tokens) if tokens else None
+
+CANONICALIZERS = {"Python": python_canonical, "C++": c_canonical, "C": c_canonical}
+
+def canonicalize(code, language):
+    canonicalizer = CANONICALIZERS.get(language)
+    return canonicalizer(code) if canonicalizer and len(code) <= MAX_CANONICAL_LENGTH else None
+
+class AnswerKey:
+    # The forms of one correct answer, computed once and reused for every submission graded against it.
+    def __init__(self, answer, language):
+        self.language = language
+        self.stripped = whitespace_key(answer)
+        self.canonical = canonicalize(answer, language)
+
+    def matches(self, submission):
+        if whitespace_key(submission) == self.stripped:
+            return True
+        return self.canonical is not None and canonicalize(submission, self.language) == self.canonical
+
+@lru_cache(maxsize=1024)
+def answer_key(answer, language):
+    return AnswerKey(answer, language)
+
+def grade(answer, submission, language=None):
+    return answer_key(answer, language).matches(submission)
+
+# --- Batch Grading ---
+_worker_keys = {}
+
+def _init_worker(answers):
+    # Each worker builds the answer keys once, then only submissions cross the process boundary.
+    _worker_keys.clear()
+    _worker_keys.update({challenge_id: AnswerKey(answer, language) for challenge_id, (answer, language) in answers.items()})
+
+def _grade_chunk(chunk):
+    return [_worker_keys[challenge_id].matches(submission) for challenge_id, submission in chunk]
+
+def grade_batch(answers, submissions, workers=None, chunk_size=2000):
+    # `answers` maps challenge id -> (answer, language); `submissions` is a sequence of (challenge id, code).
+    # Returns one bool per submission, in order. workers=0 grades in this process.
+    submissions = list(submissions)
+    if workers == 0 or len(submissions) <= chunk_size:
+        keys = {challenge_id: answer_key(answer, language) for challenge_id, (answer, language) in answers.items()}
+        return [keys[challenge_id].matches(submission) for challenge_id, submission in submissions]
+    chunks = [submissions[i:i + chunk_size] for i in range(0, len(submissions), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(answers,)) as executor:
+        return [result for results in executor.map(_grade_chunk, chunks) for result in results]
+
+def curriculum_answers(store=None):
+    # {(kingdom, quest name): (answer, language)} for every challenge in the curriculum store; quest names are
+    # only unique within a kingdom.
+    store = store or CurriculumStore()
+    return {(kingdom, challenge.quest_name): (challenge.correct_answer, data["language"])
+            for kingdom, data in store.kingdoms().items() for challenge in store.challenges(kingdom)}
+
+# --- Command Line ---
+def regrade(path, workers=None):
+    # Export lines are JSON objects with "kingdom", "quest" (the challenge's quest name) and "submission" keys.
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    answers = curriculum_answers()
+    challenge_id = lambda record: (str(record.get("kingdom")), str(record.get("quest")))
+    known = [record for record in records if challenge_id(record) in answers]
+    results = grade_batch(answers, [(challenge_id(record), str(record.get("submission", ""))) for record in known], workers)
+    for record, passed in zip(known, results):
+        record["passed"] = passed
+        print(json.dumps(record))
+    print(f"{sum(results)}/{len(results)} passed, {len(records) - len(known)} skipped (unknown kingdom or quest)", file=sys.stderr)
+
+def main(argv):
+    if argv[:1] == ["regrade"] and len(argv) >= 2:
+        regrade(argv[1], int(argv[2]) if len(argv) > 2 else None)
+    else:
+        print("usage: python grading.py regrade export.jsonl [workers]")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+
+# --- Headless Simulation Driver ---
+# Runs the real Game state machine on the SDL dummy video driver with a simulated clock and scripted input, so
+# sessions run as fast as the CPU allows and replay identically. Rendering is optional (render=True draws every
+# frame through the normal Renderer into an offscreen surface).
+# Scripted playthroughs: python headless.py [sessions] [--render]
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from curriculum import CurriculumStore
+from game import Game, create_assets, queue_startup_assets
+from renderer import Renderer
+from runtime import ScriptedInput, SimulatedClock
+
+class OfflineAssistant:
+    # Stands in for AssistantProcess: records hint requests instead of starting the chat window.
+    def __init__(self):
+        self.asked = []
+
+    def start(self):
+        pass
+
+    def health_check(self, now):
+        pass
+
+    def ask(self, prompt, problem_text=None, difficulty="beginner"):
+        self.asked.append(prompt)
+
+    def show(self):
+        pass
+
+    def hide(self):
+        pass
+
+    def stop(self):
+        pass
+
+_assets = {}
+
+def shared_assets(size):
+    # Sessions of the same size share one set of decoded assets; loading waits for every decode to finish.
+    if size not in _assets:
+        assets, animations = create_assets(*size)
+        queue_startup_assets(assets, animations)
+        while not assets.poll():
+            time.sleep(0.001)
+        _assets[size] = assets
+    return _assets[size]
+
+class HeadlessGame:
+    def __init__(self, size=(1280, 720), render=False, store=None, save=None):
+        if not pygame.get_init():
+            pygame.init()
+        if pygame.display.get_surface() is None or pygame.display.get_surface().get_size() != size:
+            pygame.display.set_mode(size)
+        self.clock = SimulatedClock()
+        self.controls = ScriptedInput()
+        self.assistant = OfflineAssistant()
+        self.store = store or CurriculumStore()
+        screen = pygame.Surface(size)
+        self.renderer = Renderer(screen) if render else None
+        self.game = Game(screen, shared_assets(size), self.clock, self.controls, self.assistant, self.store,
+                         self.renderer, log=None, save=save)
+        self.frames = 0
+
+    @property
+    def state(self):
+        return self.game.game_state
+
+    def step(self, frames=1):
+        for _ in range(frames):
+            self.game.step()
+            if self.renderer:
+                self.game.draw()
+            self.frames += 1
+
+    def run_until(self, condition, max_frames=10000):
+        # Steps until condition() holds; returns False if it never did within max_frames.
+        for _ in range(max_frames):
+            if condition():
+                return True
+            self.step()
+        return condition()
+
+    def enter_kingdom(self, name):
+        self.controls.click(self.game.kingdoms[name]["map_rect"].center)
+        self.step()
+
+    def walk_to_boss(self):
+        self.controls.hold(pygame.K_RIGHT)
+        reached = self.run_until(lambda: self.state != 'level')
+        self.controls.release(pygame.K_RIGHT)
+        return reached
+
+    def submit(self, code):
+        self.controls.type_text(code)
+        self.controls.key(pygame.K_RETURN, "\r", pygame.KMOD_SHIFT)
+        self.step()
+
+    def clear_editor(self):
+        for _ in range(len(self.game.challenge_box.buffer.text())):
+            self.controls.key(pygame.K_BACKSPACE)
+        self.step()
+
+    def play_kingdom(self, name, mistakes=0):
+        # Beats every challenge in a kingdom, submitting `mistakes` wrong answers before each right one.
+        self.enter_kingdom(name)
+        while self.state == 'level':
+            if not self.walk_to_boss():
+                raise RuntimeError(f"never reached the boss in {name}")
+            challenge = self.game.quest_manager.get_current_challenge()
+            for _ in range(mistakes):
+                self.submit("# not the answer")
+                self.step(30)
+                self.clear_editor()
+            self.submit(challenge.correct_answer)
+            if self.state != 'battle':
+                raise RuntimeError(f"correct answer to {challenge.quest_name!r} was rejected")
+            if not self.run_until(lambda: self.state != 'battle'):
+                raise RuntimeError(f"battle never finished in {name}")
+
+    def play_through(self, mistakes=0):
+        self.controls.key(pygame.K_SPACE, " ")
+        self.step()
+        for name in self.game.kingdoms:
+            self.play_kingdom(name, mistakes)
+        return self.summary()
+
+    def summary(self):
+        stats = self.game.player_stats
+        return {"state": self.state, "frames": self.frames, "simulated_s": self.clock.now() / 1000,
+                "level": stats['level'], "xp": stats['xp'], "hints_asked": len(self.assistant.asked)}
+
+def main(argv):
+    sessions = int(argv[0]) if argv and argv[0].isdigit() else 5
+    render = "--render" in argv
+    store = CurriculumStore()
+    shared_assets((1280, 720))
+    results, total_frames, started = [], 0, time.perf_counter()
+    for _ in range(sessions):
+        session = HeadlessGame(render=render, store=store)
+        results.append(session.play_through(mistakes=1))
+        total_frames += session.frames
+    elapsed = time.perf_counter() - started
+    print(f"{sessions} playthroughs ({'rendered' if render else 'no rendering'}): {total_frames} steps in {elapsed:.2f}s "
+          f"= {total_frames / elapsed:.0f} steps/s, {results[0]['simulated_s'] * sessions / elapsed:.0f}x real time")
+    print(results[0])
+    print("deterministic:", all(result == results[0] for result in results))
+    store.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
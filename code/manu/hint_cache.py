@@ -0,0 +1,82 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from paths import data_path
+
+# --- Hint Cache ---
+# Two tiers: an in-memory LRU in front of an on-disk SQLite store. Entries expire after `ttl` seconds and
+# the disk store is trimmed to `max_entries` by least-recent use.
+
+def normalize_text(text):
+    return " ".join((text or "").lower().split())
+
+def make_hint_key(prompt, problem_text, difficulty):
+    raw = "\x1f".join(normalize_text(part) for part in (prompt, problem_text, difficulty))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class HintCache:
+    def __init__(self, path=None, memory_size=128, ttl=30 * 24 * 3600, max_entries=5000):
+        self.path = path or data_path("hint_cache.sqlite3")
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Hints are stored from the assistant's worker threads.
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS hints (key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                        "created REAL NOT NULL, last_used REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS hints_last_used ON hints (last_used)")
+        self.db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.memory.pop(key, None)
+            row = self.db.execute("SELECT response, created FROM hints WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                if row is not None:
+                    self.db.execute("DELETE FROM hints WHERE key = ?", (key,))
+                    self.db.commit()
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE hints SET last_used = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        now = time.time()
+        with self.lock:
+            self._remember(key, response, now)
+            self.db.execute("INSERT OR REPLACE INTO hints (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                            (key, response, now, now))
+            self.db.execute("DELETE FROM hints WHERE created < ?", (now - self.ttl,))
+            self.db.execute("DELETE FROM hints WHERE key NOT IN (SELECT key FROM hints ORDER BY last_used DESC LIMIT ?)",
+                            (self.max_entries,))
+            self.db.commit()
+
+    def _remember(self, key, response, created):
+        self.memory[key] = (response, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self.memory)}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,303 @@
+import bisect
+import json
+import socket
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+from paths import data_path
+
+# --- Leaderboard ---
+# Every player's best score is a (-level, -xp, name) key in one ordered index, so the best player is first and
+# rank, top-k and neighbours-around-me are O(log n) lookups plus a short slice. Score updates are queued by submit()
+# and applied in batches by a background thread (a big batch re-sorts once instead of moving keys one at a time),
+# which also writes each batch to SQLite in a single transaction. A lower score (say, after starting a new game)
+# never replaces a player's best.
+# Serve lookups to other processes with: python leaderboard.py serve [port]
+
+DEFAULT_PORT = 8765
+FLUSH_INTERVAL = 0.25  # seconds between batches
+REBUILD_FRACTION = 0.25  # batches touching more than this share of players re-sort instead of inserting one by one
+
+# --- Ordered Index ---
+class SortedKeys:
+    # Sorted keys kept in bisect-maintained sublists of about LOAD keys, with a Fenwick tree over the sublist
+    # lengths. Inserting or removing a key shifts one short sublist instead of the whole board, and a key's
+    # position is a bisect over the sublist maxima plus a tree walk.
+    LOAD = 512
+
+    def __init__(self, keys=()):
+        self.build(sorted(keys))
+
+    def __len__(self):
+        return self.size
+
+    def build(self, ordered):
+        load = self.LOAD
+        self.lists = [ordered[i:i + load] for i in range(0, len(ordered), load)]
+        self.maxes = [sublist[-1] for sublist in self.lists]
+        self.size = len(ordered)
+        self.rebuild_tree()
+
+    def rebuild_tree(self):
+        tree = [0] + [len(sublist) for sublist in self.lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def tree_add(self, index, delta):
+        tree, i = self.tree, index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def keys_before(self, index):
+        # How many keys are in the sublists before `index`.
+        tree, i, total = self.tree, index, 0
+        while i:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def locate(self, position):
+        # (sublist, offset) holding the key at `position`.
+        tree, index, step = self.tree, 0, 1 << (len(self.tree).bit_length())
+        while step:
+            if index + step < len(tree) and tree[index + step] <= position:
+                index += step
+                position -= tree[index]
+            step >>= 1
+        return index, position
+
+    def add(self, key):
+        if not self.lists:
+            self.build([key])
+            return
+        i = min(bisect.bisect_left(self.maxes, key), len(self.lists) - 1)
+        sublist = self.lists[i]
+        bisect.insort(sublist, key)
+        self.maxes[i] = sublist[-1]
+        self.size += 1
+        if len(sublist) > 2 * self.LOAD:
+            self.lists[i:i + 1] = [sublist[:self.LOAD], sublist[self.LOAD:]]
+            self.maxes[i:i + 1] = [self.lists[i][-1], self.lists[i + 1][-1]]
+            self.rebuild_tree()
+        else:
+            self.tree_add(i, 1)
+
+    def remove(self, key):
+        i = bisect.bisect_left(self.maxes, key)
+        sublist = self.lists[i]
+        del sublist[bisect.bisect_left(sublist, key)]
+        self.size -= 1
+        if sublist:
+            self.maxes[i] = sublist[-1]
+            self.tree_add(i, -1)
+        else:
+            del self.lists[i], self.maxes[i]
+            self.rebuild_tree()
+
+    def index(self, key):
+        i = bisect.bisect_left(self.maxes, key)
+        if i == len(self.lists):
+            return self.size
+        return self.keys_before(i) + bisect.bisect_left(self.lists[i], key)
+
+    def slice(self, start, stop):
+        start, stop = max(0, start), min(stop, self.size)
+        if start >= stop:
+            return []
+        i, offset = self.locate(start)
+        keys = []
+        while len(keys) < stop - start:
+            keys.extend(self.lists[i][offset:offset + stop - start - len(keys)])
+            i, offset = i + 1, 0
+        return keys
+
+def score_key(name, level, xp):
+    return (-level, -xp, name)
+
+def entry(rank, key):
+    return {"rank": rank, "player": key[2], "level": -key[0], "xp": -key[1]}
+
+class Leaderboard:
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL):
+        self.path = path or data_path("leaderboard.sqlite3")
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()  # guards the index
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.flushes = 0
+        # Batches are written from the flusher thread.
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS players (name TEXT PRIMARY KEY, level INTEGER NOT NULL, "
+                        "xp INTEGER NOT NULL, updated REAL NOT NULL)")
+        self.db.commit()
+        self.scores = {name: score_key(name, level, xp) for name, level, xp in self.db.execute("SELECT name, level, xp FROM players")}
+        self.keys = SortedKeys(self.scores.values())
+        self.closed = threading.Event()
+        self.flusher = threading.Thread(target=self.flush_loop, name="leaderboard-flush", daemon=True)
+        self.flusher.start()
+
+    def __len__(self):
+        return len(self.keys)
+
+    # --- Ingestion ---
+    def submit(self, player, level, xp):
+        # Cheap enough to call from the frame loop; only the best score per player is kept until the next batch.
+        with self.pending_lock:
+            best = self.pending.get(player)
+            if best is None or (level, xp) > best:
+                self.pending[player] = (level, xp)
+
+    def flush(self):
+        with self.pending_lock:
+            batch, self.pending = self.pending, {}
+        if not batch:
+            return 0
+        with self.lock:
+            improved = self.apply(batch)
+        now = time.time()
+        self.db.executemany("INSERT INTO players (name, level, xp, updated) VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT(name) DO UPDATE SET level = excluded.level, xp = excluded.xp, updated = excluded.updated",
+                            ((name, level, xp, now) for name, (level, xp) in improved.items()))
+        self.db.commit()
+        self.flushes += 1
+        return len(batch)
+
+    def apply(self, batch):
+        # Returns the part of `batch` that beat the player's best score (a smaller key), which is all that changes.
+        scores, keys = self.scores, self.keys
+        batch = {name: (level, xp) for name, (level, xp) in batch.items()
+                 if name not in scores or score_key(name, level, xp) < scores[name]}
+        if len(batch) > len(keys) * REBUILD_FRACTION:
+            scores.update((name, score_key(name, level, xp)) for name, (level, xp) in batch.items())
+            self.keys = SortedKeys(scores.values())
+            return batch
+        for name, (level, xp) in batch.items():
+            key = score_key(name, level, xp)
+            old = scores.get(name)
+            if old is not None:
+                keys.remove(old)
+            keys.add(key)
+            scores[name] = key
+        return batch
+
+    def flush_loop(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self.closed.set()
+        self.flusher.join()
+        self.flush()
+        self.db.close()
+
+    # --- Queries ---
+    def rank(self, player):
+        with self.lock:
+            key = self.scores.get(player)
+            return entry(self.keys.index(key) + 1, key) if key else None
+
+    def top(self, k=10):
+        with self.lock:
+            return [entry(i + 1, key) for i, key in enumerate(self.keys.slice(0, k))]
+
+    def around(self, player, radius=5):
+        with self.lock:
+            key = self.scores.get(player)
+            if key is None:
+                return []
+            index = self.keys.index(key)
+            start = max(0, index - radius)
+            return [entry(start + i + 1, key) for i, key in enumerate(self.keys.slice(start, index + radius + 1))]
+
+    def query(self, request):
+        # One request from the socket server: {"op": "rank" | "top" | "around" | "submit", ...}.
+        op = request["op"]
+        if op == "rank":
+            return self.rank(request["player"])
+        if op == "top":
+            return self.top(int(request.get("k", 10)))
+        if op == "around":
+            return self.around(request["player"], int(request.get("radius", 5)))
+        if op == "submit":
+            self.submit(request["player"], int(request["level"]), int(request["xp"]))
+            return True
+        raise KeyError(f"unknown op {op!r}")
+
+# --- Local Socket Server ---
+# Newline-delimited JSON over TCP on localhost: each request line gets one {"ok": ..., "result"/"error": ...} line.
+class LeaderboardHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = {"ok": True, "result": self.server.leaderboard.query(json.loads(line))}
+            except (ValueError, KeyError, TypeError) as error:
+                response = {"ok": False, "error": str(error)}
+            except Exception as error:
+                # A bug in one query fails that request, not the connection.
+                response = {"ok": False, "error": f"internal error: {type(error).__name__}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+class LeaderboardServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, leaderboard, port=DEFAULT_PORT):
+        self.leaderboard = leaderboard
+        super().__init__(("127.0.0.1", port), LeaderboardHandler)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="leaderboard-server", daemon=True).start()
+        return self
+
+class LeaderboardClient:
+    def __init__(self, port=DEFAULT_PORT, timeout=5.0):
+        self.socket = socket.create_connection(("127.0.0.1", port), timeout)
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, op, **fields):
+        self.file.write(json.dumps(dict(fields, op=op)).encode("utf-8") + b"\n")
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if not response["ok"]:
+            raise KeyError(response["error"])
+        return response["result"]
+
+    def rank(self, player):
+        return self.request("rank", player=player)
+
+    def top(self, k=10):
+        return self.request("top", k=k)
+
+    def around(self, player, radius=5):
+        return self.request("around", player=player, radius=radius)
+
+    def submit(self, player, level, xp):
+        return self.request("submit", player=player, level=level, xp=xp)
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+def main(argv):
+    if not argv or argv[0] != "serve":
+        print("usage: python leaderboard.py serve [port]")
+        return
+    port = int(argv[1]) if len(argv) > 1 else DEFAULT_PORT
+    leaderboard = Leaderboard()
+    server = LeaderboardServer(leaderboard, port)
+    print(f"Serving {len(leaderboard)} players on 127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    leaderboard.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
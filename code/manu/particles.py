@@ -0,0 +1,126 @@
+import numpy as np
+import pygame
+
+# --- Particle Pool ---
+# Projectiles and particles live in fixed-size NumPy arrays instead of one Sprite each: a frame moves, ages and
+# culls every live particle in a few array operations, and draws them with a single Surface.blits call.
+# Slots are reused through a free list, so a burst of sparks allocates nothing once the pool exists.
+# Like the sprites, positions and velocities are in pixels per frame.
+
+class ParticleKind:
+    def __init__(self, image, gravity=0.0, drag=1.0, life=None):
+        self.image = image
+        self.gravity = gravity
+        self.drag = drag
+        self.life = life  # frames; None lives until it leaves the bounds
+
+class ParticlePool:
+    def __init__(self, kinds, bounds, capacity=1024, seed=0):
+        self.kinds = list(kinds)
+        self.images = [kind.image for kind in self.kinds]
+        self.bounds = pygame.Rect(bounds)  # cached once; particles wholly outside it are culled
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.vel = np.zeros((capacity, 2), np.float32)
+        self.life = np.zeros(capacity, np.float32)
+        self.kind = np.zeros(capacity, np.int16)
+        self.half = np.zeros((capacity, 2), np.float32)  # each slot's half image size
+        self.slot_images = [None] * capacity  # each slot's image, so drawing needs no per-kind lookup
+        self.active = np.zeros(capacity, bool)
+        self.drawn = None  # (live slots, integer top-lefts), cached until the pool next changes
+        self.free = list(range(capacity - 1, -1, -1))
+        self.rng = np.random.default_rng(seed)
+        # Per-kind tables, indexed by each particle's kind.
+        self.half_size = np.array([kind.image.get_size() for kind in self.kinds], np.float32) / 2
+        self.gravity = np.array([kind.gravity for kind in self.kinds], np.float32)
+        self.drag = np.array([kind.drag for kind in self.kinds], np.float32)
+        self.lifespan = np.array([np.inf if kind.life is None else kind.life for kind in self.kinds], np.float32)
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def count(self, kind):
+        return int(np.count_nonzero(self.active & (self.kind == kind)))
+
+    # --- Spawning ---
+    def spawn(self, kind, positions, velocities):
+        # Spawns one particle per row; when the pool is full the extra ones are dropped.
+        positions, velocities = np.atleast_2d(positions), np.atleast_2d(velocities)
+        count = min(len(positions), len(self.free))
+        if count == 0:
+            return
+        slots = [self.free.pop() for _ in range(count)]
+        self.pos[slots] = positions[:count]
+        self.vel[slots] = velocities[:count]
+        self.life[slots] = self.lifespan[kind]
+        self.kind[slots] = kind
+        self.half[slots] = self.half_size[kind]
+        self.active[slots] = True
+        image = self.images[kind]
+        for slot in slots:
+            self.slot_images[slot] = image
+        self.drawn = None
+
+    def fire(self, kind, start, target, speed):
+        direction = np.subtract(target, start, dtype=np.float32)
+        length = np.hypot(*direction)
+        self.spawn(kind, start, direction / length * speed if length else (0, 0))
+
+    def burst(self, kind, center, count, speed):
+        angles = self.rng.uniform(0, 2 * np.pi, count)
+        speeds = self.rng.uniform(0.3, 1.0, count) * speed
+        velocities = np.column_stack((np.cos(angles) * speeds, np.sin(angles) * speeds))
+        self.spawn(kind, np.repeat(np.atleast_2d(center), count, axis=0), velocities)
+
+    def release(self, slots):
+        self.active[slots] = False
+        self.free.extend(slots.tolist())
+        self.drawn = None
+
+    def clear(self, kind=None):
+        self.release(np.flatnonzero(self.active if kind is None else self.active & (self.kind == kind)))
+
+    # --- Simulation ---
+    def update(self):
+        # One vectorized step for every live particle; expired and off-screen ones go back to the free list.
+        live = np.flatnonzero(self.active)
+        if not len(live):
+            return
+        kinds = self.kind[live]
+        vel = self.vel[live]
+        vel[:, 1] += self.gravity[kinds]
+        vel *= self.drag[kinds, None]
+        pos = self.pos[live] + vel
+        self.vel[live], self.pos[live] = vel, pos
+        self.life[live] -= 1
+        self.drawn = None
+
+        half, bounds = self.half[live], self.bounds
+        dead = ((pos[:, 0] + half[:, 0] < bounds.left) | (pos[:, 0] - half[:, 0] > bounds.right) |
+                (pos[:, 1] + half[:, 1] < bounds.top) | (pos[:, 1] - half[:, 1] > bounds.bottom) | (self.life[live] <= 0))
+        if dead.any():
+            self.release(live[dead])
+
+    # --- Drawing ---
+    def topleft(self):
+        # Shared by bounding_rect() and draw(), which both run every frame.
+        if self.drawn is None:
+            live = np.flatnonzero(self.active)
+            self.drawn = live, (self.pos[live] - self.half[live]).astype(np.int32)
+        return self.drawn
+
+    def bounding_rect(self):
+        # One rect around every live particle, for the renderer's dirty tracking; None when the pool is empty.
+        live, topleft = self.topleft()
+        if not len(live):
+            return None
+        bottomright = topleft + (self.half[live] * 2).astype(np.int32)
+        left, top = topleft.min(axis=0).tolist()
+        right, bottom = bottomright.max(axis=0).tolist()
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def draw(self, screen):
+        # Converting columns rather than rows to lists skips building a small list per particle.
+        live, topleft = self.topleft()
+        xs, ys = topleft.T.tolist()
+        screen.blits(zip(map(self.slot_images.__getitem__, live.tolist()), zip(xs, ys)), False)
@@ -0,0 +1,10 @@
+import os
+
+# --- User Data Location ---
+# Caches and saves live outside the source tree; override with BITBYBIT_DATA_DIR.
+DATA_DIR = os.environ.get("BITBYBIT_DATA_DIR", os.path.join(os.path.expanduser("~"), ".bitbybit"))
+
+def data_path(*parts):
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+import pygame
+from paths import data_path
+
+# --- Main Loop Profiler ---
+# Off by default; BITBYBIT_PROFILE=1 turns it on. Every frame is split into named phases (tick, events,
+# update:<game_state>, draw, present, sleep, ...) and pygame is instrumented to count font renders and new
+# surfaces. F3 toggles an overlay with a frame-time graph; F4 writes the recorded phases as a Chrome trace
+# (open in chrome://tracing or https://ui.perfetto.dev).
+
+GRAPH_FRAMES = 180
+MAX_TRACE_EVENTS = 200000  # ~a minute of frames; older events drop off the front
+OVERLAY_SIZE = (420, 250)
+OVERLAY_REFRESH_FRAMES = 15  # overlay text is re-rendered this often, the graph every frame
+FRAME_BUDGET_MS = 1000 / 60
+TRANSFORMS = ("scale", "smoothscale", "scale_by", "smoothscale_by", "flip", "rotate", "rotozoom")
+COLOR_PANEL = (10, 10, 20, 200)
+COLOR_GRAPH = (52, 211, 153)
+COLOR_GRAPH_SLOW = (239, 68, 68)
+COLOR_GUIDE = (120, 120, 150)
+COLOR_TEXT = (242, 233, 228)
+
+# --- pygame Instrumentation ---
+# Installed once, before any fonts are created. Counters are shared by every Profiler.
+counters = Counter()
+_RealSurface, _RealFont = pygame.Surface, pygame.font.Font
+
+class _SurfaceType(type):
+    # Keeps isinstance(x, pygame.Surface) true for surfaces that came from transforms, fonts or images.
+    def __instancecheck__(cls, obj):
+        return isinstance(obj, _RealSurface)
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, _RealSurface)
+
+class CountingSurface(_RealSurface, metaclass=_SurfaceType):
+    def __init__(self, *args, **kwargs):
+        counters["surfaces"] += 1
+        super().__init__(*args, **kwargs)
+
+class CountingFont(_RealFont):
+    def render(self, *args, **kwargs):
+        counters["font.render"] += 1
+        counters["surfaces"] += 1
+        return super().render(*args, **kwargs)
+
+def counting(function, name, allocates=lambda args, kwargs: True):
+    def wrapper(*args, **kwargs):
+        counters[name] += 1
+        if allocates(args, kwargs):
+            counters["surfaces"] += 1
+        return function(*args, **kwargs)
+    wrapper.__wrapped__ = function
+    return wrapper
+
+def instrument_pygame():
+    if pygame.Surface is CountingSurface:
+        return
+    pygame.Surface = CountingSurface
+    pygame.font.Font = CountingFont
+    # Transforms given a dest surface reuse it instead of allocating.
+    no_dest = lambda args, kwargs: len(args) < 3 and "dest" not in kwargs and "dest_surface" not in kwargs
+    for name in TRANSFORMS:
+        if hasattr(pygame.transform, name):
+            setattr(pygame.transform, name, counting(getattr(pygame.transform, name), "transform", no_dest))
+    for name in ("load", "frombuffer", "fromstring", "frombytes"):
+        if hasattr(pygame.image, name):
+            setattr(pygame.image, name, counting(getattr(pygame.image, name), "image.load"))
+
+# --- Profilers ---
+class NullProfiler:
+    # What the game runs with when profiling is off: every hook is a no-op.
+    overlay_visible = False
+    _phase = nullcontext()
+
+    def phase(self, name):
+        return self._phase
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def gauge(self, name, value):
+        pass
+
+    def handle_event(self, event):
+        return False
+
+NULL_PROFILER = NullProfiler()
+
+class Profiler:
+    def __init__(self):
+        instrument_pygame()
+        self.origin = time.perf_counter()
+        self.pid, self.tid = os.getpid(), threading.get_ident()
+        self.events = deque(maxlen=MAX_TRACE_EVENTS)
+        self.frame_times = deque(maxlen=GRAPH_FRAMES)
+        self.phase_ms, self.last_phase_ms = Counter(), Counter()
+        self.gauges = {}
+        self.frame_counters = {}
+        self.counted = Counter(counters)
+        self.frame_index = 0
+        self.frame_start = None
+        self.overlay_visible = False
+        self.font = None
+        self.panel = None
+
+    def timestamp(self, when):
+        return (when - self.origin) * 1e6
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phase_ms[name] += (end - start) * 1000
+            self.events.append({"name": name, "cat": name.split(":")[0], "ph": "X", "pid": self.pid, "tid": self.tid,
+                                "ts": self.timestamp(start), "dur": (end - start) * 1e6})
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        end = time.perf_counter()
+        if self.frame_start is None:
+            return
+        self.frame_times.append((end - self.frame_start) * 1000)
+        self.events.append({"name": "frame", "cat": "frame", "ph": "X", "pid": self.pid, "tid": self.tid,
+                            "ts": self.timestamp(self.frame_start), "dur": (end - self.frame_start) * 1e6,
+                            "args": {"frame": self.frame_index}})
+        # Counters are cumulative; each frame records what happened during it.
+        self.frame_counters = {name: counters[name] - self.counted[name] for name in counters}
+        self.counted = Counter(counters)
+        self.events.append({"name": "allocations", "ph": "C", "pid": self.pid, "ts": self.timestamp(end),
+                            "args": dict(self.frame_counters)})
+        if self.gauges:
+            self.events.append({"name": "sprites", "ph": "C", "pid": self.pid, "ts": self.timestamp(end),
+                                "args": dict(self.gauges)})
+        self.last_phase_ms, self.phase_ms = self.phase_ms, Counter()
+        self.frame_index += 1
+
+    def handle_event(self, event):
+        # Returns True for the profiler's own keys so the game doesn't also see them.
+        if event.type != pygame.KEYDOWN or event.key not in (pygame.K_F3, pygame.K_F4):
+            return False
+        if event.key == pygame.K_F3:
+            self.overlay_visible = not self.overlay_visible
+            self.panel = None
+        else:
+            print(f"Wrote trace to {self.export_trace()}")
+        return True
+
+    def export_trace(self, path=None):
+        path = path or data_path("traces", time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "Code Kingdoms"}},
+                    {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": self.tid, "args": {"name": "main loop"}}]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}, f)
+        return path
+
+    # --- Overlay ---
+    def overlay_rect(self, screen):
+        return pygame.Rect(screen.get_width() - OVERLAY_SIZE[0] - 10, screen.get_height() - OVERLAY_SIZE[1] - 10, *OVERLAY_SIZE)
+
+    def overlay_lines(self):
+        times = sorted(self.frame_times)
+        p50 = times[len(times) // 2] if times else 0.0
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))] if times else 0.0
+        lines = [f"frame p50 {p50:.1f} ms  p99 {p99:.1f} ms  max {times[-1] if times else 0:.1f} ms"]
+        phases = sorted(self.last_phase_ms.items(), key=lambda item: -item[1])
+        lines += [f"  {name:<22}{ms:>7.2f} ms" for name, ms in phases[:5]]
+        frame = self.frame_counters
+        lines.append(f"font.render {frame.get('font.render', 0)}  surfaces {frame.get('surfaces', 0)}  "
+                     f"transforms {frame.get('transform', 0)}")
+        if self.gauges:
+            lines.append("sprites " + "  ".join(f"{name} {value}" for name, value in self.gauges.items()))
+        return lines
+
+    def draw_overlay(self, screen):
+        # Drawn with the uninstrumented classes so the overlay doesn't show up in its own counters.
+        rect = self.overlay_rect(screen)
+        if self.font is None:
+            self.font = _RealFont(None, 20)
+        if self.panel is None or self.frame_index % OVERLAY_REFRESH_FRAMES == 0:
+            self.panel = _RealSurface(OVERLAY_SIZE, pygame.SRCALPHA)
+            self.panel.fill(COLOR_PANEL)
+            for i, line in enumerate(self.overlay_lines()):
+                self.panel.blit(self.font.render(line, True, COLOR_TEXT), (8, 6 + i * 18))
+        screen.blit(self.panel, rect)
+
+        graph = pygame.Rect(rect.x + 8, rect.bottom - 78, rect.width - 16, 70)
+        scale = graph.height / (FRAME_BUDGET_MS * 3)
+        for budget in (FRAME_BUDGET_MS, FRAME_BUDGET_MS * 2):
+            y = graph.bottom - budget * scale
+            pygame.draw.line(screen, COLOR_GUIDE, (graph.left, y), (graph.right, y))
+        bar_width = graph.width / GRAPH_FRAMES
+        for i, ms in enumerate(self.frame_times):
+            x = graph.left + i * bar_width
+            top = graph.bottom - min(ms * scale, graph.height)
+            pygame.draw.line(screen, COLOR_GRAPH_SLOW if ms > FRAME_BUDGET_MS * 1.5 else COLOR_GRAPH, (x, graph.bottom), (x, top))
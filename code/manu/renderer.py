@@ -0,0 +1,118 @@
+from fractions import Fraction
+import pygame
+
+# Events that mean the window contents may have been lost and must be redrawn in full.
+EXPOSE_EVENTS = {pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED,
+                 pygame.WINDOWSIZECHANGED, pygame.WINDOWFOCUSGAINED}
+
+# --- Dirty-Rect Renderer ---
+class Renderer:
+    # With a `resolution`, everything draws onto a fixed-size canvas (self.screen) that is scaled onto the
+    # display, letterboxed to keep its aspect ratio.
+    def __init__(self, display, use_dirty_rects=True, resolution=None, smooth=False):
+        self.display = display
+        self.screen = pygame.Surface(resolution).convert() if resolution else display
+        self.screen_rect = self.screen.get_rect()
+        self.smooth = smooth
+        display_width, display_height = display.get_size()
+        self.scale = min(display_width / self.screen_rect.width, display_height / self.screen_rect.height)
+        self.viewport = pygame.Rect(0, 0, round(self.screen_rect.width * self.scale), round(self.screen_rect.height * self.scale))
+        self.viewport.center = display.get_rect().center
+        self.blocks = (Fraction(self.viewport.width, self.screen_rect.width).denominator,
+                       Fraction(self.viewport.height, self.screen_rect.height).denominator)
+        self.use_dirty_rects = use_dirty_rects
+        self.scene_key = None
+        self.full_redraw = True
+        self.dirty_rects = []
+        self.tracked = {}
+        self.seen = set()
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def handle_event(self, event):
+        if event.type in EXPOSE_EVENTS:
+            self.invalidate()
+
+    def begin_frame(self, scene_key):
+        if scene_key != self.scene_key:
+            self.scene_key = scene_key
+            self.tracked.clear()
+            self.invalidate()
+        self.dirty_rects = []
+        self.seen = set()
+
+    def track(self, key, rect, state=None):
+        # An element is dirty when its rect or its visual state differs from the last frame.
+        self.seen.add(key)
+        previous = self.tracked.get(key)
+        if previous is None or previous[0] != rect or previous[1] != state:
+            if previous is not None:
+                self.dirty_rects.append(previous[0])
+            self.dirty_rects.append(pygame.Rect(rect))
+            self.tracked[key] = (pygame.Rect(rect), state)
+
+    def _collect_removed(self):
+        for key in [key for key in self.tracked if key not in self.seen]:
+            self.dirty_rects.append(self.tracked.pop(key)[0])
+
+    def get_clip(self):
+        # Returns the area that must be repainted this frame, or None when nothing changed.
+        self._collect_removed()
+        if not self.use_dirty_rects or self.full_redraw:
+            return self.screen_rect
+        self.dirty_rects = [rect.clip(self.screen_rect) for rect in self.dirty_rects]
+        self.dirty_rects = [rect for rect in self.dirty_rects if rect.width and rect.height]
+        if not self.dirty_rects:
+            return None
+        return self.dirty_rects[0].unionall(self.dirty_rects[1:])
+
+    def to_canvas(self, pos):
+        # Maps display (mouse) coordinates back onto the canvas.
+        if self.screen is self.display:
+            return pos
+        return (int((pos[0] - self.viewport.x) / self.scale), int((pos[1] - self.viewport.y) / self.scale))
+
+    def to_display(self, rect):
+        # Canvas rect to display rect, padded a pixel for the smooth filter's bleed.
+        left = self.viewport.x + int(rect.left * self.scale) - 1
+        top = self.viewport.y + int(rect.top * self.scale) - 1
+        return pygame.Rect(left, top, int(rect.width * self.scale) + 3, int(rect.height * self.scale) + 3).clip(self.viewport)
+
+    def scale_region(self, rect):
+        # Nearest scaling of one dirty canvas rect, widened to whole blocks of the scale's denominator (1920/1280 =
+        # 3/2 scales 2x2 canvas blocks to 3x3 display blocks), so its pixels match a full-canvas scale exactly.
+        (width, height), (block_x, block_y) = self.viewport.size, self.blocks
+        left, top = rect.left // block_x * block_x, rect.top // block_y * block_y
+        right, bottom = -(-rect.right // block_x) * block_x, -(-rect.bottom // block_y) * block_y
+        source = pygame.Rect(left, top, right - left, bottom - top)
+        screen_width, screen_height = self.screen_rect.size
+        size = (source.width * width // screen_width, source.height * height // screen_height)
+        position = (self.viewport.x + left * width // screen_width, self.viewport.y + top * height // screen_height)
+        pygame.transform.scale(self.screen.subsurface(source), size, self.display.subsurface(position, size))
+
+    def upscale(self):
+        # Nearest scaling redoes only the dirty rects, so a blinking cursor costs a cursor-sized scale. The smooth
+        # filter blends across rect edges and has no such exact partial form: it rescales the whole canvas.
+        if not self.smooth and not self.full_redraw and self.use_dirty_rects:
+            for rect in self.dirty_rects:
+                self.scale_region(rect)
+            return
+        if self.full_redraw:
+            self.display.fill((0, 0, 0))
+        target = self.display.subsurface(self.viewport)
+        if self.smooth:
+            pygame.transform.smoothscale(self.screen, self.viewport.size, target)
+        else:
+            pygame.transform.scale(self.screen, self.viewport.size, target)
+
+    def present(self):
+        scaled = self.screen is not self.display
+        if scaled and (self.full_redraw or self.dirty_rects or not self.use_dirty_rects):
+            self.upscale()
+        if not self.use_dirty_rects or self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        elif self.dirty_rects:
+            pygame.display.update([self.to_display(rect) for rect in self.dirty_rects] if scaled else self.dirty_rects)
+        self.dirty_rects = []
@@ -0,0 +1,158 @@
+import json
+import pygame
+
+# --- Clocks ---
+# Game logic reads time only through a clock and input only through an input source, so the same state machine
+# runs against the real window or against a script at whatever speed the caller steps it.
+
+class RealClock:
+    def __init__(self):
+        self.clock = pygame.time.Clock()
+
+    def tick(self, fps):
+        return self.clock.tick(fps)
+
+    def now(self):
+        return pygame.time.get_ticks()
+
+class SimulatedClock:
+    # Advances a fixed step per tick without sleeping, so every run of a script sees identical timings.
+    def __init__(self, start_ms=0):
+        self.time = start_ms
+
+    def tick(self, fps):
+        step = 1000 / fps
+        self.time += step
+        return step
+
+    def advance(self, ms):
+        self.time += ms
+
+    def now(self):
+        return int(self.time)
+
+# --- Input Sources ---
+class LiveInput:
+    def events(self):
+        return pygame.event.get()
+
+    def pressed(self):
+        return pygame.key.get_pressed()
+
+    def mouse_pos(self):
+        return pygame.mouse.get_pos()
+
+class HeldKeys:
+    # Indexable like pygame.key.get_pressed() for the keys a script is holding down.
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+class ScriptedInput:
+    def __init__(self):
+        self.queue = []
+        self.held = set()
+        self.mouse = (0, 0)
+
+    def events(self):
+        events, self.queue = self.queue, []
+        return events
+
+    def pressed(self):
+        return HeldKeys(self.held)
+
+    def mouse_pos(self):
+        return self.mouse
+
+    def post(self, event_type, **attributes):
+        self.queue.append(pygame.event.Event(event_type, **attributes))
+
+    def key(self, key, unicode="", mod=0):
+        self.post(pygame.KEYDOWN, key=key, unicode=unicode, mod=mod)
+        self.post(pygame.KEYUP, key=key, mod=mod)
+
+    def type_text(self, text):
+        for char in text:
+            if char == "\n":
+                self.key(pygame.K_RETURN, "\r")
+            else:
+                self.key(ord(char.lower()) if char.isalnum() else 0, char)
+
+    def click(self, pos, button=1):
+        self.mouse = pos
+        self.post(pygame.MOUSEBUTTONDOWN, pos=pos, button=button)
+        self.post(pygame.MOUSEBUTTONUP, pos=pos, button=button)
+
+    def hold(self, key):
+        self.held.add(key)
+
+    def release(self, key):
+        self.held.discard(key)
+
+# --- Input Recording ---
+# Record a real session with BITBYBIT_RECORD_INPUT=path.json; benchmarks/frames.py --replay path.json plays it back.
+RECORDED_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s)
+EVENT_FIELDS = ("key", "unicode", "mod", "pos", "button", "x", "y")
+
+def event_to_dict(event):
+    record = {"type": event.type}
+    for field in EVENT_FIELDS:
+        if hasattr(event, field):
+            value = getattr(event, field)
+            record[field] = list(value) if isinstance(value, tuple) else value
+    return record
+
+def event_from_dict(record):
+    attributes = {field: tuple(value) if isinstance(value, list) else value for field, value in record.items() if field != "type"}
+    return pygame.event.Event(record["type"], **attributes)
+
+class RecordingInput:
+    # Passes a source through unchanged while logging, once per frame, its events, held keys and mouse position.
+    def __init__(self, source):
+        self.source = source
+        self.frames = []
+
+    def events(self):
+        events = self.source.events()
+        pressed = self.source.pressed()
+        self.frames.append({"events": [event_to_dict(event) for event in events if event.type in (
+                                pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL, pygame.QUIT)],
+                            "held": [key for key in RECORDED_KEYS if pressed[key]],
+                            "mouse": list(self.source.mouse_pos())})
+        return events
+
+    def pressed(self):
+        return self.source.pressed()
+
+    def mouse_pos(self):
+        return self.source.mouse_pos()
+
+    def save(self, path, size):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"size": list(size), "frames": self.frames}, f)
+
+class ReplayInput(ScriptedInput):
+    # Feeds a recording back one frame per events() call; returns no input once it runs out.
+    def __init__(self, frames):
+        super().__init__()
+        self.frames = frames
+        self.index = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["frames"])
+
+    def finished(self):
+        return self.index >= len(self.frames)
+
+    def events(self):
+        if not self.finished():
+            frame = self.frames[self.index]
+            self.index += 1
+            self.held = set(frame["held"])
+            self.mouse = tuple(frame["mouse"])
+            self.queue.extend(event_from_dict(record) for record in frame["events"])
+        return super().events()
@@ -0,0 +1,145 @@
+import copy
+import json
+import os
+import queue
+import threading
+from paths import data_path
+
+# --- Save Game ---
+# Progress is saved as an append-only journal of events (one JSON line each), folded into a snapshot every
+# SNAPSHOT_EVERY events. Loading reads the snapshot and replays the few journal lines after it.
+# The game only ever calls record(), which queues the event; a background thread does the writing and fsyncs,
+# so a save never stalls a frame.
+# Crash safety: the snapshot is replaced atomically, journal lines older than the snapshot are skipped by their
+# sequence number, and a line torn by a crash mid-write is ignored on load.
+# If the writer fails (disk full, permissions), it stops and the error is raised from the next record() or close().
+
+SNAPSHOT_EVERY = 50
+SAVED_STATS = ("level", "xp", "next_level_xp")
+
+def new_state():
+    return {"seq": 0, "player_stats": {}, "kingdom_progress": {}, "quests_completed": {}}
+
+def apply_event(state, event):
+    state["seq"] = event["seq"]
+    if event["type"] == "victory":
+        state["player_stats"] = event["player_stats"]
+        state["quests_completed"][event["kingdom"]] = event["quests_completed"]
+        # The last victory in a kingdom also clears it, in the same line, so no crash can land in between.
+        if event.get("kingdom_complete"):
+            state["kingdom_progress"][event["kingdom"]] = True
+            state["quests_completed"].pop(event["kingdom"], None)
+    elif event["type"] == "kingdom_complete":
+        state["kingdom_progress"][event["kingdom"]] = True
+        state["quests_completed"].pop(event["kingdom"], None)
+    elif event["type"] == "reset":
+        state.update(new_state(), seq=event["seq"])
+
+class SaveJournal:
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.dirname(data_path("save", "journal.jsonl"))
+        self.journal_path = os.path.join(self.directory, "journal.jsonl")
+        self.snapshot_path = os.path.join(self.directory, "snapshot.json")
+        self.torn_tail = False
+        self.error = None
+        self.state = self.load()
+        self.seq = self.state["seq"]
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, args=(copy.deepcopy(self.state),), name="save-writer", daemon=True)
+        self.writer.start()
+
+    # --- Loading ---
+    def load(self):
+        state = new_state()
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                state = json.load(f)
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    # Only the last line can be torn; appending resumes on a fresh line after it.
+                    self.torn_tail = not line.endswith("\n")
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if event["seq"] > state["seq"]:
+                        apply_event(state, event)
+        return state
+
+    # --- Recording (game thread) ---
+    def record(self, event_type, **fields):
+        self.check()
+        self.seq += 1
+        event = dict(fields, type=event_type, seq=self.seq)
+        apply_event(self.state, event)
+        self.pending.put(event)
+
+    def record_victory(self, kingdom, quests_completed, player_stats, kingdom_complete=False):
+        self.record("victory", kingdom=kingdom, quests_completed=quests_completed, kingdom_complete=kingdom_complete,
+                    player_stats={key: player_stats[key] for key in SAVED_STATS})
+
+    def record_kingdom_complete(self, kingdom):
+        self.record("kingdom_complete", kingdom=kingdom)
+
+    def record_reset(self):
+        self.record("reset")
+
+    def close(self):
+        # Waits for every queued event to reach disk.
+        self.pending.put(None)
+        self.writer.join()
+        self.check()
+
+    def check(self):
+        if self.error is not None:
+            raise OSError(f"progress is no longer being saved: {self.error}") from self.error
+
+    # --- Writing (background thread) ---
+    def write_loop(self, state):
+        # `state` is this thread's own copy of what is on disk, for the next snapshot.
+        try:
+            self.write_events(state)
+        except Exception as e:
+            print(f"Could not save progress: {e}")
+            self.error = e
+
+    def write_events(self, state):
+        since_snapshot, closing = 0, False
+        with open(self.journal_path, "a", encoding="utf-8") as journal:
+            if self.torn_tail:
+                journal.write("\n")
+            while not closing:
+                # Everything that queued up while the last batch was written shares one fsync.
+                batch = [self.pending.get()]
+                while not self.pending.empty():
+                    batch.append(self.pending.get_nowait())
+                if None in batch:
+                    closing = True
+                    batch = batch[:batch.index(None)]
+                for event in batch:
+                    journal.write(json.dumps(event) + "\n")
+                    apply_event(state, event)
+                journal.flush()
+                os.fsync(journal.fileno())
+                since_snapshot += len(batch)
+                if since_snapshot >= SNAPSHOT_EVERY:
+                    self.write_snapshot(state)
+                    journal.truncate(0)
+                    since_snapshot = 0
+
+    def write_snapshot(self, state):
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+        # The rename only survives a power cut once the directory entry is on disk, and the journal is
+        # truncated right after. Windows can't open a directory for fsync.
+        if os.name != "nt":
+            fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
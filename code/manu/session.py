@@ -0,0 +1,104 @@
+import time
+from curriculum import QuestManager
+from grading import grade
+
+# --- Player Stats ---
+class PlayerStats(dict):
+    # A dict that bumps `version` whenever a value changes, so views can cache what they draw from it.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key] != value:
+            self.version += 1
+        super().__setitem__(key, value)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+def new_player_stats():
+    return PlayerStats({'level': 1, 'xp': 0, 'next_level_xp': 100, 'level_up_active': False, 'level_up_timer': 0})
+
+def award_xp(player_stats, reward, now):
+    # Adds a beaten challenge's XP; each level needs 1.5x the XP of the one before. Returns True on a level-up.
+    player_stats['xp'] += reward
+    if player_stats['xp'] < player_stats['next_level_xp']:
+        return False
+    player_stats['level'] += 1
+    player_stats['xp'] -= player_stats['next_level_xp']
+    player_stats['next_level_xp'] = int(player_stats['next_level_xp'] * 1.5)
+    player_stats['level_up_active'] = True
+    player_stats['level_up_timer'] = now
+    return True
+
+# --- Learning Session ---
+class LearningSession:
+    # One learner's run through the curriculum without pygame: quest order, grading, XP and kingdom completion as
+    # plain method calls returning JSON-ready dicts. Game owns one and plays its results out with sprites and
+    # timers; session_server.py keeps one per connected learner. `kingdoms` may be shared between sessions.
+    def __init__(self, store, kingdoms=None, difficulty=None):
+        self.store = store
+        self.kingdoms = kingdoms or store.kingdoms()
+        self.difficulty = difficulty
+        self.kingdom_progress = {name: False for name in self.kingdoms}
+        self.player_stats = new_player_stats()
+        self.kingdom, self.quest_manager = None, None
+        self.submissions = 0
+
+    def enter(self, kingdom, completed=0):
+        # `completed` resumes a kingdom part-way through, skipping challenges already beaten.
+        if kingdom not in self.kingdoms:
+            raise ValueError(f"no kingdom named {kingdom!r}")
+        if self.kingdom_progress[kingdom]:
+            raise ValueError(f"{kingdom} is already cleared")
+        self.kingdom = kingdom
+        self.quest_manager = QuestManager(self.store, kingdom, self.difficulty, completed)
+        return self.challenge()
+
+    def reset(self):
+        # Stats are reset in place, so views holding player_stats keep drawing the live dict.
+        self.player_stats.update(new_player_stats())
+        self.kingdom_progress = {name: False for name in self.kingdoms}
+        self.kingdom, self.quest_manager = None, None
+
+    def challenge(self):
+        current = self.quest_manager.get_current_challenge() if self.quest_manager else None
+        if current is None:
+            return None
+        return {"kingdom": self.kingdom, "quest": current.quest_name, "problem": current.problem_text,
+                "difficulty": current.difficulty, "xp": current.xp_reward,
+                "index": self.quest_manager.current_challenge_index, "total": self.quest_manager.total}
+
+    def submit(self, code):
+        current = self.quest_manager.get_current_challenge() if self.quest_manager else None
+        if current is None:
+            raise ValueError("no challenge in progress; enter a kingdom first")
+        self.submissions += 1
+        result = {"correct": grade(current.correct_answer, code, self.kingdoms[self.kingdom]["language"])}
+        if result["correct"]:
+            result.update(self.complete_challenge(int(time.monotonic() * 1000)))
+        result["stats"] = self.stats()
+        return result
+
+    def complete_challenge(self, now):
+        # Awards the current challenge and moves on to the next; beating a kingdom's last one clears it.
+        current = self.quest_manager.get_current_challenge()
+        result = {"xp_gained": current.xp_reward, "level_up": award_xp(self.player_stats, current.xp_reward, now)}
+        self.quest_manager.advance_quest()
+        result["quests_completed"] = self.quest_manager.current_challenge_index
+        if self.quest_manager.all_quests_complete():
+            self.kingdom_progress[self.kingdom] = True
+            result["kingdom_complete"] = self.kingdom
+            result["game_complete"] = all(self.kingdom_progress.values())
+            self.kingdom, self.quest_manager = None, None
+        result["next"] = self.challenge()
+        return result
+
+    def stats(self):
+        return {key: self.player_stats[key] for key in ('level', 'xp', 'next_level_xp')}
+
+    def state(self):
+        return {"stats": self.stats(), "kingdom_progress": dict(self.kingdom_progress), "kingdom": self.kingdom,
+                "challenge": self.challenge(), "submissions": self.submissions}
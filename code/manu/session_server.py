@@ -0,0 +1,128 @@
+import asyncio
+import json
+import sys
+from curriculum import CurriculumStore
+from session import LearningSession
+
+# --- Session Server ---
+# Hosts many learners from one machine: an asyncio TCP server keeps one LearningSession per learner name and
+# answers newline-delimited JSON requests, so clients only have to render. A learner who reconnects with the
+# same name picks up where they left off (until the server restarts).
+#   {"op": "hello", "learner": "sam"}                 -> session state; must come first on a connection
+#   {"op": "kingdoms"} / {"op": "state"} / {"op": "challenge"}
+#   {"op": "enter", "kingdom": "Python"}              -> first challenge
+#   {"op": "submit", "code": "score = 0"}             -> {"correct": ..., "stats": ..., "next": ...}
+# Each request gets one {"ok": true, "result": ...} or {"ok": false, "error": ...} line back.
+# Run with: python session_server.py [port]
+
+DEFAULT_PORT = 8766
+
+class SessionServer:
+    def __init__(self, store, difficulty=None, leaderboard=None):
+        self.store = store
+        self.difficulty = difficulty
+        self.leaderboard = leaderboard
+        self.kingdoms = store.kingdoms()
+        self.sessions = {}
+        self.requests = 0
+
+    def session(self, learner):
+        if not isinstance(learner, str) or not learner:
+            raise ValueError("hello needs a learner name")
+        if learner not in self.sessions:
+            self.sessions[learner] = LearningSession(self.store, self.kingdoms, self.difficulty)
+        return self.sessions[learner]
+
+    def handle(self, learner, session, request):
+        op = request["op"]
+        if op == "kingdoms":
+            return {name: {"language": data["language"], "cleared": session.kingdom_progress[name]}
+                    for name, data in self.kingdoms.items()}
+        if op == "state":
+            return session.state()
+        if op == "challenge":
+            return session.challenge()
+        if op == "enter":
+            return session.enter(request["kingdom"])
+        if op == "submit":
+            result = session.submit(request["code"])
+            if result["correct"] and self.leaderboard:
+                self.leaderboard.submit(learner, result["stats"]["level"], result["stats"]["xp"])
+            return result
+        raise KeyError(f"unknown op {op!r}")
+
+    async def handle_connection(self, reader, writer):
+        learner, session = None, None
+        try:
+            while line := await reader.readline():
+                self.requests += 1
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("requests must be JSON objects")
+                    if request.get("op") == "hello":
+                        learner, session = request.get("learner"), self.session(request.get("learner"))
+                        result = session.state()
+                    elif session is None:
+                        raise ValueError("send hello first")
+                    else:
+                        result = self.handle(learner, session, request)
+                    response = {"ok": True, "result": result}
+                except (ValueError, KeyError, TypeError) as error:
+                    response = {"ok": False, "error": str(error)}
+                except Exception as error:
+                    # A bug or a pathological submission fails this one request, not the learner's connection.
+                    response = {"ok": False, "error": f"internal error: {type(error).__name__}"}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass  # the client went away, or sent a line longer than the stream limit
+        finally:
+            writer.close()
+
+    async def start(self, port=DEFAULT_PORT, host="127.0.0.1"):
+        # A lab's worth of clients connect at once; the default backlog of 100 would make the rest retry after 1 s.
+        return await asyncio.start_server(self.handle_connection, host, port, limit=1 << 20, backlog=1024)
+
+# --- Client ---
+class SessionClient:
+    # What a thin client needs: send a request, await its reply. One request in flight per connection.
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    @classmethod
+    async def connect(cls, learner, port=DEFAULT_PORT, host="127.0.0.1"):
+        client = cls(*await asyncio.open_connection(host, port, limit=1 << 20))
+        client.state = await client.request("hello", learner=learner)
+        return client
+
+    async def request(self, op, **fields):
+        self.writer.write(json.dumps(dict(fields, op=op)).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if not response["ok"]:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+async def serve(port):
+    store = CurriculumStore()
+    server = await SessionServer(store).start(port)
+    print(f"Serving learners on 127.0.0.1:{server.sockets[0].getsockname()[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        store.close()
+
+def main(argv):
+    try:
+        asyncio.run(serve(int(argv[0]) if argv else DEFAULT_PORT))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
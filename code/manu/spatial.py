@@ -0,0 +1,121 @@
+import pygame
+
+# --- Spatial Hash ---
+# A uniform grid over world coordinates. Each item is listed in every cell its rect overlaps, so a query only
+# looks at the few cells under the query rect or point instead of every item. Moving an item within the same
+# cells just updates its rect; crossing a cell boundary touches only the cells it left and entered.
+
+CELL_SIZE = 128  # roughly the size of a sprite; much smaller means big sprites span many cells
+
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> {item: None}, a dict so items come back in insertion order
+        self.items = {}  # item -> (rect, cell range)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size, (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def cell_keys(self, cell_range):
+        x0, y0, x1, y1 = cell_range
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def insert(self, item, rect):
+        if item in self.items:
+            self.move(item, rect)
+            return
+        rect = pygame.Rect(rect)
+        cell_range = self.cell_range(rect)
+        self.items[item] = (rect, cell_range)
+        for key in self.cell_keys(cell_range):
+            self.cells.setdefault(key, {})[item] = None
+
+    def remove(self, item):
+        entry = self.items.pop(item, None)
+        if entry:
+            self.unlink(item, self.cell_keys(entry[1]))
+
+    def unlink(self, item, keys):
+        for key in keys:
+            cell = self.cells[key]
+            del cell[item]
+            if not cell:
+                del self.cells[key]
+
+    def move(self, item, rect):
+        old_rect, old_range = self.items[item]
+        if old_rect == rect:
+            return
+        rect = pygame.Rect(rect)
+        cell_range = self.cell_range(rect)
+        self.items[item] = (rect, cell_range)
+        if cell_range != old_range:
+            old_keys, new_keys = self.cell_keys(old_range), self.cell_keys(cell_range)
+            self.unlink(item, [key for key in old_keys if key not in new_keys])
+            for key in new_keys:
+                self.cells.setdefault(key, {})[item] = None
+
+    def rect(self, item):
+        return self.items[item][0]
+
+    # --- Queries ---
+    # The cells give the broadphase candidates; each is then checked against its exact rect.
+    def query_rect(self, rect):
+        rect = pygame.Rect(rect)
+        cells, items = self.cells, self.items
+        keys = self.cell_keys(self.cell_range(rect))
+        if len(keys) == 1:
+            candidates = cells.get(keys[0], ())
+        else:
+            candidates = {}
+            for key in keys:
+                candidates.update(cells.get(key, ()))
+        return [item for item in candidates if rect.colliderect(items[item][0])]
+
+    def query_point(self, pos):
+        size = self.cell_size
+        cell = self.cells.get((int(pos[0]) // size, int(pos[1]) // size), ())
+        return [item for item in cell if self.items[item][0].collidepoint(pos)]
+
+# --- Sprite Groups ---
+class SpatialGroup(pygame.sprite.Group):
+    # A sprite group that keeps its sprites in a SpatialHash. Sprites are indexed when added, dropped when removed
+    # and re-indexed after every update(); call reindex() after moving sprites any other way.
+    def __init__(self, *sprites, cell_size=CELL_SIZE):
+        self.index = SpatialHash(cell_size)
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self.index.insert(sprite, sprite.rect)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.index.remove(sprite)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.reindex()
+
+    def reindex(self):
+        move = self.index.move
+        for sprite in self.sprites():
+            move(sprite, sprite.rect)
+
+    def collide(self, sprite, dokill=False):
+        # Same result as pygame.sprite.spritecollide(sprite, self, dokill) with rect collision.
+        hits = [other for other in self.index.query_rect(sprite.rect) if other is not sprite]
+        if dokill:
+            for other in hits:
+                other.kill()
+        return hits
+
+    def at(self, pos):
+        return self.index.query_point(pos)
@@ -0,0 +1,124 @@
+import re
+import weakref
+
+# --- Per-line Syntax Highlighting ---
+# Each line is tokenized on its own, starting from the state the previous line ended in (inside a block comment
+# or a triple-quoted string, or not), so an edit re-tokenizes that line and the lines after it only as far as
+# they are drawn.
+
+PYTHON_KEYWORDS = {
+    "False", "None", "True", "and", "as", "assert", "async", "await", "break", "class", "continue", "def", "del",
+    "elif", "else", "except", "finally", "for", "from", "global", "if", "import", "in", "is", "lambda", "nonlocal",
+    "not", "or", "pass", "raise", "return", "try", "while", "with", "yield",
+}
+PYTHON_BUILTINS = {
+    "print", "len", "range", "int", "str", "float", "bool", "list", "dict", "set", "tuple", "input", "open", "abs",
+    "min", "max", "sum", "sorted", "enumerate", "zip", "map", "filter", "type", "isinstance", "self",
+}
+C_KEYWORDS = {
+    "auto", "break", "case", "const", "continue", "default", "do", "else", "enum", "extern", "for", "goto", "if",
+    "inline", "register", "restrict", "return", "sizeof", "static", "struct", "switch", "typedef", "union",
+    "volatile", "while", "NULL",
+}
+C_TYPES = {"char", "double", "float", "int", "long", "short", "signed", "unsigned", "void", "size_t", "bool", "FILE"}
+CPP_KEYWORDS = C_KEYWORDS | {
+    "catch", "class", "constexpr", "delete", "explicit", "friend", "namespace", "new", "noexcept", "nullptr",
+    "operator", "override", "private", "protected", "public", "template", "this", "throw", "try", "typename",
+    "using", "virtual", "true", "false",
+}
+CPP_TYPES = C_TYPES | {"auto", "string", "vector", "map", "std", "cout", "cin", "endl"}
+
+PYTHON_TOKEN = re.compile(r"""
+    (?P<comment>\#.*)
+  | (?P<string_open>[rRbBuUfF]{0,2}(?:'''|\"\"\"))
+  | (?P<string>[rRbBuUfF]{0,2}(?:'(?:\\.|[^'\\])*'?|"(?:\\.|[^"\\])*"?))
+  | (?P<number>\b(?:0[xXoObB][0-9a-fA-F_]+|\d[\d_]*\.?\d*(?:[eE][+-]?\d+)?j?)\b)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<space>\s+)
+  | (?P<other>.)
+""", re.VERBOSE)
+
+C_TOKEN = re.compile(r"""
+    (?P<comment>//.*)
+  | (?P<comment_open>/\*)
+  | (?P<preprocessor>^\s*\#.*)
+  | (?P<string>"(?:\\.|[^"\\])*"?|'(?:\\.|[^'\\])*'?)
+  | (?P<number>\b(?:0[xX][0-9a-fA-F]+|\d+\.?\d*(?:[eE][+-]?\d+)?)[uUlLfF]*\b)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<space>\s+)
+  | (?P<other>.)
+""", re.VERBOSE)
+
+LANGUAGES = {
+    "Python": (PYTHON_TOKEN, PYTHON_KEYWORDS, PYTHON_BUILTINS),
+    "C++": (C_TOKEN, CPP_KEYWORDS, CPP_TYPES),
+    "C": (C_TOKEN, C_KEYWORDS, C_TYPES),
+}
+
+def tokenize_line(language, text, state=None):
+    # Returns ([(kind, text), ...], end state). The state is None or the delimiter that closes the construct
+    # still open at the end of the line: '*/' for a C block comment, ''' or """ for a Python string.
+    token_re, keywords, builtins = LANGUAGES[language]
+    tokens, pos = [], 0
+
+    def add(kind, value):
+        if tokens and tokens[-1][0] == kind:
+            tokens[-1] = (kind, tokens[-1][1] + value)
+        else:
+            tokens.append((kind, value))
+
+    while pos < len(text):
+        if state is not None:
+            end = text.find(state, pos)
+            kind = "comment" if state == "*/" else "string"
+            if end < 0:
+                add(kind, text[pos:])
+                return tokens, state
+            add(kind, text[pos:end + len(state)])
+            pos, state = end + len(state), None
+            continue
+        match = token_re.match(text, pos)
+        kind, value = match.lastgroup, match.group()
+        pos = match.end()
+        if kind == "comment_open":
+            kind, state = "comment", "*/"
+        elif kind == "string_open":
+            kind, state = "string", value[-3:]
+        elif kind == "name":
+            kind = "keyword" if value in keywords else "builtin" if value in builtins else "text"
+        elif kind in ("space", "other"):
+            kind = "text"
+        add(kind, value)
+    return tokens, state
+
+class Highlighter:
+    # Caches tokens per Line object, keyed on the line's version and the state it starts in, plus the start state
+    # of every line down to the furthest one highlighted so far. Edits call invalidate() with the first line
+    # they touch; states above it stay valid, so scrolling and typing only ever tokenize what's new on screen.
+    def __init__(self, language):
+        self.language = language if language in LANGUAGES else None
+        self.entries = weakref.WeakKeyDictionary()
+        self.start_states = [None]
+
+    def invalidate(self, line_index):
+        # An edit can't change the state its own line starts in, only the states of the lines after it.
+        del self.start_states[line_index + 1:]
+
+    def tokens(self, line, state):
+        entry = self.entries.get(line)
+        if entry is None or entry[0] != line.version or entry[1] != state:
+            if self.language is None:
+                tokens, end_state = [("text", line.text())], None
+            else:
+                tokens, end_state = tokenize_line(self.language, line.text(), state)
+            entry = (line.version, state, tokens, end_state)
+            self.entries[line] = entry
+        return entry
+
+    def visible(self, lines, first, count):
+        # Returns (line, start state, tokens) for lines[first:first + count].
+        end = min(first + count, len(lines))
+        for index in range(len(self.start_states) - 1, end - 1):
+            self.start_states.append(self.tokens(lines[index], self.start_states[index])[3])
+        return [(lines[index], self.start_states[index], self.tokens(lines[index], self.start_states[index])[2])
+                for index in range(first, end)]
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from ai_gateway import AIGateway
+
+def test_identical_prompts_share_one_call():
+    calls, release = [], threading.Event()
+    def send(prompt, timeout):
+        calls.append(prompt)
+        release.wait(1.0)
+        yield "hi"
+        yield " there"
+    gateway = AIGateway(send, timeout=2.0)
+    late = []
+    first = gateway.submit("hello")
+    second = gateway.submit("hello", on_chunk=late.append)
+    release.set()
+    assert first.result(2.0) == second.result(2.0) == "hi there"
+    assert calls == ["hello"]
+    assert late == ["hi", " there"]
+    assert gateway.stats()["coalesced"] == 1
+
+def test_partial_output_is_not_retried():
+    calls = []
+    def send(prompt, timeout):
+        calls.append(prompt)
+        yield "half"
+        raise ConnectionError("dropped")
+    gateway = AIGateway(send, timeout=2.0, backoff=0.01)
+    future = gateway.submit("hello")
+    assert isinstance(future.exception(2.0), ConnectionError)
+    assert calls == ["hello"]
+
+def test_watchdogs_are_cancelled_when_requests_finish():
+    gateway = AIGateway(lambda prompt, timeout: iter([prompt]), timeout=30.0)
+    before = threading.active_count()
+    futures = [gateway.submit(f"prompt {i}") for i in range(50)]
+    assert [future.result(2.0) for future in futures] == [f"prompt {i}" for i in range(50)]
+    deadline = time.monotonic() + 2.0
+    while threading.active_count() > before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert threading.active_count() <= before
+
+def test_queued_requests_wait_their_turn():
+    running, peak, lock = [0], [0], threading.Lock()
+    def send(prompt, timeout):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        yield prompt
+    gateway = AIGateway(send, max_workers=1, timeout=5.0)
+    futures = [gateway.submit(f"prompt {i}") for i in range(10)]
+    assert [future.result(5.0) for future in futures] == [f"prompt {i}" for i in range(10)]
+    assert peak[0] == 1
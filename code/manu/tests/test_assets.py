@@ -0,0 +1,38 @@
+import headless  # noqa: F401  (selects the dummy SDL drivers before pygame opens a display)
+
+import pygame
+import pytest
+
+import asset_cache
+from game import SHARED_ASSETS, AssetManager, asset_manifest
+
+# The asset manager at a budget smaller than the pinned set, which is what a 1080p screen gets with a small
+# ASSET_MEMORY_BUDGET_MB: loading an unpinned asset must still hand it back rather than evicting it first.
+
+WIDTH, HEIGHT = 1920, 1080
+
+@pytest.fixture
+def assets(monkeypatch):
+    monkeypatch.setattr(asset_cache, "ENABLED", False)
+    pygame.display.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+    manager = AssetManager(budget_bytes=4 * 1024 * 1024, max_workers=1)
+    images, _ = asset_manifest(WIDTH, HEIGHT)
+    for name, path, size, fallback_color in images:
+        manager.register(name, path, size, fallback_color)
+    yield manager
+    manager.executor.shutdown()
+    pygame.display.quit()
+
+def test_over_budget_pinned_set_still_serves_unpinned_assets(assets):
+    pinned = SHARED_ASSETS + ("splash",)
+    assets.pin(pinned)
+    for name in pinned:
+        if name in assets.sources:
+            assets[name]
+    assert assets.resident_bytes() > assets.budget_bytes
+
+    boss = assets["cpp_boss"]
+    assert isinstance(boss, pygame.Surface)
+    assert assets["cpp_boss"].get_size() == boss.get_size()
+    assert all(name in assets.assets for name in pinned if name in assets.sources)
@@ -0,0 +1,138 @@
+import collections
+import queue
+import time
+
+import pytest
+
+from ai_gateway import AIGateway
+from chat_history import ConversationHistory
+from chatbot_app import BitByBitChatbot
+from fake_model import FakeGenerativeModel
+
+# Drives the assistant's real pipeline (send_to_model -> AIGateway -> response queue -> drain_responses) against
+# the fake model, with the Tk widgets swapped for a transcript so no display is needed.
+
+PROMPT = "How do I make a variable?"
+
+class ChatHarness:
+    def __init__(self, model, stream=True, timeout=2.0, max_retries=3):
+        bot = BitByBitChatbot.__new__(BitByBitChatbot)
+        bot.STREAM_RESPONSES = stream
+        bot.model = model
+        bot.history = ConversationHistory(BitByBitChatbot.HISTORY_TOKEN_BUDGET)
+        bot.hint_cache = None
+        bot.responses = queue.Queue()
+        bot.bubble_open = False
+        bot.bubble_marks = collections.deque()
+        bot.bubble_count = 0
+        bot.gateway = AIGateway(bot.send_to_model, max_workers=1, timeout=timeout, max_retries=max_retries, backoff=0.01)
+        # Stand-ins for the widget calls drain_responses makes.
+        bot.after = lambda delay, callback: None
+        bot.start_bubble = lambda: None
+        bot._add_message = lambda text, tag: self.on_text(text)
+        bot.add_ai_message = lambda text: self.messages.append(text)
+        bot.set_input_state = lambda state: self.states.append(state)
+        self.bot = bot
+        self.text = []
+        self.messages = []
+        self.states = []
+        self.first_text_at = None
+
+    def on_text(self, text):
+        if self.first_text_at is None and text.strip():
+            self.first_text_at = time.monotonic()
+        self.text.append(text)
+
+    def ask(self, prompt, deadline=5.0):
+        # Sends a prompt and pumps the Tk side until the input is re-enabled; returns seconds to first chunk.
+        self.text, self.messages, self.first_text_at = [], [], None
+        ready = len(self.states) + 1
+        started = time.monotonic()
+        self.bot.request_ai_response(prompt)
+        while len(self.states) < ready:
+            assert time.monotonic() - started < deadline, "the chat input was never re-enabled"
+            self.bot.drain_responses()
+            time.sleep(0.002)
+        return None if self.first_text_at is None else self.first_text_at - started
+
+    def shown(self):
+        return "".join(self.text).strip()
+
+@pytest.fixture
+def harness():
+    made = []
+    def make(model, **options):
+        made.append(ChatHarness(model, **options))
+        return made[-1]
+    yield make
+    for chat in made:
+        chat.bot.gateway.shutdown()
+
+def test_chunks_are_shown_in_order(harness):
+    model = FakeGenerativeModel(first_delay=0.0, chunk_delay=0.001, failures=0, chunk_size=5)
+    chat = harness(model)
+    chat.ask(PROMPT)
+    assert chat.shown() == model.make_reply(PROMPT)
+    assert len(chat.text) > 10
+    assert chat.messages == []
+    assert chat.states == ["normal"]
+
+def test_first_chunk_arrives_before_the_whole_answer(harness):
+    model = FakeGenerativeModel(first_delay=0.05, chunk_delay=0.02, failures=0)
+    chat = harness(model)
+    started = time.monotonic()
+    first_chunk = chat.ask(PROMPT)
+    total = time.monotonic() - started
+    chunks = -(-len(model.make_reply(PROMPT)) // model.chunk_size)
+    assert first_chunk < 0.05 + 0.1
+    assert total >= 0.05 + (chunks - 1) * 0.02
+    assert first_chunk < total / 2
+
+def test_whole_answer_mode_shows_one_chunk(harness):
+    model = FakeGenerativeModel(first_delay=0.0, chunk_delay=0.0, failures=0)
+    chat = harness(model, stream=False)
+    chat.ask(PROMPT)
+    assert chat.shown() == model.make_reply(PROMPT)
+    assert len([text for text in chat.text if text.strip()]) == 1
+
+def test_answered_turns_are_added_to_history(harness):
+    model = FakeGenerativeModel(first_delay=0.0, chunk_delay=0.0, failures=0)
+    chat = harness(model)
+    chat.ask(PROMPT)
+    chat.ask("And a list?")
+    assert chat.bot.history.turns == [(PROMPT, model.make_reply(PROMPT)), ("And a list?", model.make_reply("And a list?"))]
+    assert model.last_contents[-1] == {"role": "user", "parts": ["And a list?"]}
+    assert {"role": "user", "parts": [PROMPT]} in model.last_contents
+
+def test_connection_failures_are_retried(harness):
+    model = FakeGenerativeModel(first_delay=0.0, chunk_delay=0.0, failures=2)
+    chat = harness(model)
+    chat.ask(PROMPT)
+    assert chat.shown() == model.make_reply(PROMPT)
+    assert model.calls == 3
+    assert chat.bot.gateway.stats()["retries"] == 2
+    assert chat.messages == []
+
+def test_error_is_reported_once_retries_run_out(harness):
+    model = FakeGenerativeModel(first_delay=0.0, chunk_delay=0.0, failures=10)
+    chat = harness(model, max_retries=2)
+    chat.ask(PROMPT)
+    assert model.calls == 3
+    assert chat.shown() == ""
+    assert chat.messages == ["Error: fake model: simulated connection failure"]
+    assert chat.states == ["normal"]
+    assert chat.bot.gateway.stats()["failures"] == 1
+
+def test_timeout_is_reported_and_the_next_prompt_still_gets_an_answer(harness):
+    model = FakeGenerativeModel(first_delay=1.0, chunk_delay=0.0, failures=0)
+    chat = harness(model, timeout=0.2)
+    chat.ask(PROMPT)
+    assert chat.messages == ["The AI assistant took too long to answer. Please try again."]
+    assert chat.bot.gateway.stats()["timeouts"] == 1
+    # The first call is still asleep in the model; the next prompt must not queue up behind it.
+    model.first_delay = 0.0
+    chat.ask("And a list?")
+    assert chat.shown() == model.make_reply("And a list?")
+    assert model.calls == 2
+    time.sleep(1.0)
+    assert [user for user, _ in chat.bot.history.turns] == ["And a list?"]
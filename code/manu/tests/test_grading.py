@@ -0,0 +1,44 @@
+import pytest
+
+from grading import MAX_CANONICAL_LENGTH, grade, grade_batch
+
+# The grading rule: a submission passes if it matches the answer once whitespace is stripped, or if both reduce to
+# the same canonical form (the AST for Python, a comment-free token stream for C and C++).
+
+def test_python_quote_style_is_accepted():
+    assert grade("if age >= 18: print('adult')", 'if age >= 18: print("adult")', "Python")
+    assert grade("print('adult')", 'print("adult")', "Python")
+
+def test_python_layout_and_comments_are_ignored():
+    assert grade("if age >= 18: print('adult')", "if age >= 18:\n    print('adult')  # grown up", "Python")
+
+@pytest.mark.parametrize("language", ["C", "C++"])
+def test_c_comments_and_layout_are_ignored(language):
+    assert grade("int* ptr;", "int *ptr; // pointer", language)
+    assert grade("int* ptr;", "int /* the */ *ptr /* pointer */;", language)
+    assert grade('printf("hi");', 'printf( "hi" ) ;\n', language)
+
+@pytest.mark.parametrize("answer, submission, language", [
+    ("if age >= 18: print('adult')", "if age > 18: print('adult')", "Python"),
+    ("print('adult')", "print('child')", "Python"),
+    ("int* ptr;", "int ptr;", "C"),
+    ('printf("hi");', 'printf("// hi");', "C"),
+    ("x = 5", "", "Python"),
+])
+def test_wrong_answers_are_rejected(answer, submission, language):
+    assert not grade(answer, submission, language)
+
+@pytest.mark.parametrize("submission", [
+    "-" * (MAX_CANONICAL_LENGTH - 1) + "1",
+    "(" * 1000 + "1" + ")" * 1000,
+    "[" * (MAX_CANONICAL_LENGTH // 2),
+    "(" * (MAX_CANONICAL_LENGTH * 4),
+])
+def test_deeply_nested_input_is_rejected_without_raising(submission):
+    assert grade("x = 5", submission, "Python") is False
+    assert grade("int x = 5;", submission, "C") is False
+
+def test_batch_grading_matches_single_grading():
+    answers = {"py": ("print('adult')", "Python"), "c": ("int* ptr;", "C")}
+    submissions = [("py", 'print("adult")'), ("c", "int *ptr; // pointer"), ("py", "print('child')"), ("c", "int ptr;")]
+    assert grade_batch(answers, submissions, workers=0) == [True, True, False, False]
@@ -0,0 +1,12 @@
+from headless import HeadlessGame
+
+# A full scripted playthrough on the simulated clock: every kingdom, one wrong answer before each right one.
+
+EXPECTED = {"state": "gameover", "frames": 1897, "level": 4, "xp": 75}
+
+def play():
+    summary = HeadlessGame().play_through(mistakes=1)
+    return {key: summary[key] for key in EXPECTED}
+
+def test_playthrough_reaches_gameover():
+    assert play() == EXPECTED
@@ -0,0 +1,105 @@
+import bisect
+import json
+import random
+import socket
+
+import pytest
+
+from leaderboard import Leaderboard, LeaderboardClient, LeaderboardServer, SortedKeys
+
+# SortedKeys is checked against a plain sorted list, with a small LOAD so sublists split and empty out often.
+
+class SmallSortedKeys(SortedKeys):
+    LOAD = 4
+
+def check(keys, reference, rng):
+    assert len(keys) == len(reference)
+    assert keys.slice(0, len(keys)) == reference
+    for probe in rng.sample(range(-5, 1005), 20):
+        assert keys.index(probe) == bisect.bisect_left(reference, probe)
+    for _ in range(10):
+        start, stop = sorted(rng.randint(-3, len(reference) + 3) for _ in range(2))
+        assert keys.slice(start, stop) == reference[max(0, start):max(0, stop)]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sorted_keys_match_a_sorted_list(seed):
+    rng = random.Random(seed)
+    initial = rng.sample(range(1000), rng.randint(0, 60))
+    keys, reference = SmallSortedKeys(initial), sorted(initial)
+    check(keys, reference, rng)
+    for _ in range(400):
+        if reference and rng.random() < 0.45:
+            key = rng.choice(reference)
+            keys.remove(key)
+            reference.remove(key)
+        else:
+            key = rng.randrange(1000)
+            if key in reference:
+                continue
+            keys.add(key)
+            bisect.insort(reference, key)
+        if rng.random() < 0.1:
+            check(keys, reference, rng)
+    check(keys, reference, rng)
+
+def test_sorted_keys_can_empty_and_refill():
+    keys = SmallSortedKeys(range(10))
+    for key in range(10):
+        keys.remove(key)
+    assert len(keys) == 0 and keys.slice(0, 5) == [] and keys.index(3) == 0
+    keys.add(7)
+    assert keys.slice(0, 5) == [7]
+
+# --- Leaderboard ---
+@pytest.fixture
+def board(tmp_path):
+    board = Leaderboard(str(tmp_path / "leaderboard.sqlite3"), flush_interval=3600)
+    yield board
+    board.close()
+
+def test_best_score_is_kept(board, tmp_path):
+    board.submit("ada", 3, 50)
+    board.submit("ada", 2, 90)
+    board.submit("bob", 2, 10)
+    board.flush()
+    board.submit("ada", 1, 0)
+    board.flush()
+    assert board.rank("ada") == {"rank": 1, "player": "ada", "level": 3, "xp": 50}
+    board.submit("bob", 3, 60)
+    board.flush()
+    assert [row["player"] for row in board.top()] == ["bob", "ada"]
+    board.close()
+
+    reopened = Leaderboard(str(tmp_path / "leaderboard.sqlite3"), flush_interval=3600)
+    assert reopened.top() == [{"rank": 1, "player": "bob", "level": 3, "xp": 60},
+                              {"rank": 2, "player": "ada", "level": 3, "xp": 50}]
+    reopened.close()
+
+def test_server_round_trip(board):
+    for i in range(20):
+        board.submit(f"player{i}", i // 4, i * 10)
+    board.flush()
+    server = LeaderboardServer(board, port=0).start()
+    try:
+        client = LeaderboardClient(server.server_address[1])
+        assert client.rank("player19") == board.rank("player19") == {"rank": 1, "player": "player19", "level": 4, "xp": 190}
+        assert client.top(3) == board.top(3)
+        assert client.around("player10", 2) == board.around("player10", 2)
+        assert client.submit("newcomer", 9, 0) is True
+        board.flush()
+        assert client.rank("newcomer")["rank"] == 1
+        with pytest.raises(KeyError):
+            client.request("shout")
+        client.close()
+
+        # Malformed lines get an error reply and the connection stays usable.
+        with socket.create_connection(("127.0.0.1", server.server_address[1]), 5) as raw:
+            stream = raw.makefile("rwb")
+            for line in (b"not json\n", b"[1, 2]\n", b'{"op": "top", "k": "many"}\n', b'{"op": "top", "k": 1}\n'):
+                stream.write(line)
+                stream.flush()
+                response = json.loads(stream.readline())
+            assert response == {"ok": True, "result": board.top(1)}
+    finally:
+        server.shutdown()
+        server.server_close()
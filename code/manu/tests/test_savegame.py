@@ -0,0 +1,88 @@
+import errno
+import json
+import os
+
+import pytest
+
+import savegame
+from savegame import SaveJournal
+
+# The save journal against a real temp directory: torn lines, snapshots, resuming, and a failing writer.
+
+STATS = {"level": 2, "xp": 30, "next_level_xp": 100}
+
+def victories(journal, count, kingdom="Python"):
+    for i in range(count):
+        journal.record_victory(kingdom, i + 1, STATS)
+
+def journal_lines(directory):
+    with open(os.path.join(directory, "journal.jsonl"), encoding="utf-8") as f:
+        return f.readlines()
+
+def test_resume_replays_the_journal(tmp_path):
+    journal = SaveJournal(tmp_path)
+    victories(journal, 3)
+    journal.record_kingdom_complete("Python")
+    victories(journal, 1, kingdom="C")
+    journal.close()
+
+    resumed = SaveJournal(tmp_path)
+    assert resumed.state == journal.state
+    assert resumed.state["kingdom_progress"] == {"Python": True}
+    assert resumed.state["quests_completed"] == {"C": 1}
+    victories(resumed, 1, kingdom="C")
+    resumed.close()
+    assert SaveJournal(tmp_path).state["seq"] == 6
+
+def test_torn_final_line_is_ignored_and_appending_resumes_after_it(tmp_path):
+    journal = SaveJournal(tmp_path)
+    victories(journal, 2)
+    journal.close()
+    with open(os.path.join(tmp_path, "journal.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"type": "victory", "seq": 3, "kingd')
+
+    resumed = SaveJournal(tmp_path)
+    assert resumed.torn_tail
+    assert resumed.state["seq"] == 2
+    assert resumed.state["quests_completed"] == {"Python": 2}
+    victories(resumed, 1, kingdom="C")
+    resumed.close()
+
+    assert json.loads(journal_lines(tmp_path)[-1])["kingdom"] == "C"
+    assert SaveJournal(tmp_path).state["quests_completed"] == {"Python": 2, "C": 1}
+
+def test_snapshot_then_truncate(tmp_path, monkeypatch):
+    monkeypatch.setattr(savegame, "SNAPSHOT_EVERY", 5)
+    journal = SaveJournal(tmp_path)
+    victories(journal, 7)
+    journal.close()
+
+    with open(os.path.join(tmp_path, "snapshot.json"), encoding="utf-8") as f:
+        assert json.load(f)["seq"] >= 5
+    assert len(journal_lines(tmp_path)) < 7
+    assert SaveJournal(tmp_path).state == journal.state
+
+def test_journal_lines_older_than_the_snapshot_are_skipped(tmp_path):
+    journal = SaveJournal(tmp_path)
+    victories(journal, 2)
+    journal.record_reset()
+    journal.close()
+    # A crash between replacing the snapshot and truncating the journal leaves both behind.
+    with open(os.path.join(tmp_path, "snapshot.json"), "w", encoding="utf-8") as f:
+        json.dump(journal.state, f)
+    assert SaveJournal(tmp_path).state == journal.state
+
+def test_writer_failure_is_raised_from_record_and_close(tmp_path, monkeypatch):
+    def disk_full(fd):
+        raise OSError(errno.ENOSPC, "No space left on device")
+    monkeypatch.setattr(savegame.os, "fsync", disk_full)
+    journal = SaveJournal(tmp_path)
+    victories(journal, 1)
+    journal.writer.join(timeout=5)
+    assert not journal.writer.is_alive()
+    assert isinstance(journal.error, OSError)
+
+    with pytest.raises(OSError, match="no longer being saved"):
+        victories(journal, 1)
+    with pytest.raises(OSError, match="No space left"):
+        journal.close()
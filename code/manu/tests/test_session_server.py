@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+from curriculum import CurriculumStore
+from session_server import SessionClient, SessionServer
+
+# The session server over a real localhost socket: bad requests get an error line back and the same connection
+# keeps working.
+
+@pytest.fixture
+def store():
+    store = CurriculumStore()
+    yield store
+    store.close()
+
+def run(store, scenario):
+    async def main():
+        session_server = SessionServer(store)
+        server = await session_server.start(port=0)
+        try:
+            return await scenario(session_server, server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await server.wait_closed()
+    return asyncio.run(main())
+
+async def send_line(client, line):
+    client.writer.write(line)
+    await client.writer.drain()
+    return json.loads(await client.reader.readline())
+
+def test_bad_requests_get_an_error_and_keep_the_connection(store):
+    async def scenario(session_server, port):
+        client = await SessionClient.connect("sam", port)
+        replies = [await send_line(client, line) for line in (b"{not json\n", b"[1, 2]\n", b'{"op": "dance"}\n',
+                                                              b'{"op": "enter"}\n')]
+        kingdoms = await client.request("kingdoms")
+        await client.close()
+        return replies, kingdoms
+
+    replies, kingdoms = run(store, scenario)
+    for reply in replies:
+        assert reply["ok"] is False and isinstance(reply["error"], str)
+    assert replies[1]["error"] == "requests must be JSON objects"
+    assert "unknown op 'dance'" in replies[2]["error"]
+    assert set(kingdoms) == set(store.kingdoms())
+
+def test_hello_is_required_first(store):
+    async def scenario(session_server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        client = SessionClient(reader, writer)
+        reply = await send_line(client, b'{"op": "state"}\n')
+        state = await client.request("hello", learner="kim")
+        await client.close()
+        return reply, state
+
+    reply, state = run(store, scenario)
+    assert reply == {"ok": False, "error": "send hello first"}
+    assert state["kingdom"] is None and state["submissions"] == 0
+
+def test_internal_errors_fail_only_that_request(store):
+    async def scenario(session_server, port):
+        handle = session_server.handle
+        def flaky(learner, session, request):
+            if request["op"] == "state":
+                raise RuntimeError("boom")
+            return handle(learner, session, request)
+        session_server.handle = flaky
+        client = await SessionClient.connect("ana", port)
+        reply = await send_line(client, b'{"op": "state"}\n')
+        challenge = await client.request("enter", kingdom=next(iter(store.kingdoms())))
+        await client.close()
+        return reply, challenge
+
+    reply, challenge = run(store, scenario)
+    assert reply == {"ok": False, "error": "internal error: RuntimeError"}
+    assert challenge is not None
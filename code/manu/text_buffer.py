@@ -0,0 +1,142 @@
+# --- Gap Buffer ---
+# A list with a movable hole at the edit point: typing and deleting next to the last edit are O(1) amortized,
+# and only moving the edit point far away costs a copy proportional to the distance.
+
+class GapBuffer:
+    MIN_GAP = 16
+
+    def __init__(self, items=()):
+        items = list(items)
+        self.data = items + [None] * self.MIN_GAP
+        self.gap_start = len(items)
+        self.gap_end = len(self.data)
+
+    def __len__(self):
+        return len(self.data) - (self.gap_end - self.gap_start)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("gap buffer index out of range")
+        return self.data[index if index < self.gap_start else index + self.gap_end - self.gap_start]
+
+    def __iter__(self):
+        yield from self.data[:self.gap_start]
+        yield from self.data[self.gap_end:]
+
+    def move_gap(self, index):
+        if index < self.gap_start:
+            moved = self.gap_start - index
+            self.data[self.gap_end - moved:self.gap_end] = self.data[index:self.gap_start]
+            self.gap_start, self.gap_end = index, self.gap_end - moved
+        elif index > self.gap_start:
+            moved = index - self.gap_start
+            self.data[self.gap_start:index] = self.data[self.gap_end:self.gap_end + moved]
+            self.gap_start, self.gap_end = index, self.gap_end + moved
+
+    def grow(self, needed):
+        # Double the backing list so a run of inserts reallocates O(log n) times.
+        extra = max(needed, len(self.data), self.MIN_GAP)
+        self.data[self.gap_end:self.gap_end] = [None] * extra
+        self.gap_end += extra
+
+    def insert(self, index, item):
+        self.insert_many(index, (item,))
+
+    def insert_many(self, index, items):
+        items = list(items)
+        if not 0 <= index <= len(self):
+            raise IndexError("gap buffer index out of range")
+        self.move_gap(index)
+        if self.gap_end - self.gap_start < len(items):
+            self.grow(len(items))
+        self.data[self.gap_start:self.gap_start + len(items)] = items
+        self.gap_start += len(items)
+
+    def delete(self, index, count=1):
+        # Removes and returns `count` items starting at `index`.
+        if count < 0 or index < 0 or index + count > len(self):
+            raise IndexError("gap buffer index out of range")
+        self.move_gap(index)
+        removed = self.data[self.gap_end:self.gap_end + count]
+        self.data[self.gap_end:self.gap_end + count] = [None] * count
+        self.gap_end += count
+        return removed
+
+# --- Text Buffer ---
+class Line(GapBuffer):
+    # One editor line; the joined text is cached until the next edit, and `version` lets views cache renders.
+    def __init__(self, text=""):
+        super().__init__(text)
+        self.version = 0
+        self.cached_text = text
+
+    def text(self):
+        if self.cached_text is None:
+            self.cached_text = "".join(self)
+        return self.cached_text
+
+    def changed(self):
+        self.version += 1
+        self.cached_text = None
+
+class TextBuffer:
+    # Lines held in a gap buffer of Line gap buffers: inserting characters or whole lines at the cursor
+    # never shifts the rest of the document. `version` is bumped on every edit.
+    def __init__(self, text=""):
+        self.lines = GapBuffer(Line(line) for line in text.split("\n"))
+        self.version = 0
+
+    def line_count(self):
+        return len(self.lines)
+
+    def line_text(self, index):
+        return self.lines[index].text()
+
+    def line_length(self, index):
+        return len(self.lines[index])
+
+    def insert_text(self, line_index, char_index, text):
+        # Inserts text that may contain newlines; returns the (line, column) just past it.
+        self.version += 1
+        first, *rest = text.split("\n")
+        line = self.lines[line_index]
+        line.insert_many(char_index, first)
+        line.changed()
+        char_index += len(first)
+        for part in rest:
+            self.split_line(line_index, char_index)
+            line_index, char_index = line_index + 1, 0
+            line = self.lines[line_index]
+            line.insert_many(0, part)
+            line.changed()
+            char_index = len(part)
+        return line_index, char_index
+
+    def split_line(self, line_index, char_index):
+        self.version += 1
+        line = self.lines[line_index]
+        tail = line.delete(char_index, len(line) - char_index)
+        line.changed()
+        self.lines.insert(line_index + 1, Line("".join(tail)))
+
+    def delete_before(self, line_index, char_index):
+        # Backspace: removes one character or joins with the previous line; returns the new (line, column).
+        self.version += 1
+        if char_index > 0:
+            line = self.lines[line_index]
+            line.delete(char_index - 1)
+            line.changed()
+            return line_index, char_index - 1
+        if line_index == 0:
+            return line_index, char_index
+        previous = self.lines[line_index - 1]
+        joined_at = len(previous)
+        removed = self.lines.delete(line_index)[0]
+        previous.insert_many(joined_at, removed)
+        previous.changed()
+        return line_index - 1, joined_at
+
+    def text(self):
+        return "\n".join(line.text() for line in self.lines)